@@ -5,8 +5,6 @@ from aiogram.enums.parse_mode import ParseMode
 from aiogram.client.bot import DefaultBotProperties
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from .database.setup import init_db, get_session
-
 from .handlers import start, free_user
 from .handlers import daily_gift, minigames
 from .handlers.channel_access import router as channel_access_router
@@ -25,31 +23,61 @@ from .handlers.free_channel_admin import router as free_channel_admin_router
 from .handlers.publication_test import router as publication_test_router
 
 from .utils.config import BOT_TOKEN, VIP_CHANNEL_ID
-from .services import (
-    channel_request_scheduler,
-    vip_subscription_scheduler,
-    vip_membership_scheduler,
+from .services import register_scheduled_jobs
+# Background services keep process-wide state: import them under the same
+# absolute names the services use so both sides share one instance.
+from database.setup import (
+    init_db,
+    get_session,
+    get_pool_stats,
+    get_unit_of_work_stats,
+    unit_of_work,
+    close_db,
 )
-from .services.scheduler import auction_monitor_scheduler, free_channel_cleanup_scheduler
+from services.point_ledger import point_aggregator
+from services.activity_pipeline import activity_pipeline
+from services.outbound_dispatcher import outbound_dispatcher
+from services.notification_buffer import collect_notifications, get_notification_stats
+from services.due_scheduler import due_scheduler
+from services.config_service import warm_config_cache
+from services.reaction_markup import reaction_markup
+from services.reaction_counter import reaction_counter
+from services.point_holds import point_holds
+from services.auction_book import auction_books
+from services.bid_notifier import bid_notifier
+from utils.vip_membership import vip_index
 
 
 async def main() -> None:
     await init_db()
     Session = await get_session()
+    async with Session() as session:
+        await warm_config_cache(session)
+    await point_aggregator.start(Session)
+    await reaction_counter.start(Session)
+    await point_holds.load(Session)
+    await auction_books.load(Session)
 
     logging.basicConfig(level=logging.INFO)
     logging.info(f"VIP channel ID: {VIP_CHANNEL_ID}")
     logging.info("Bot starting...")
 
     bot = Bot(BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    bot.session.middleware(outbound_dispatcher)
+    outbound_dispatcher.start()
     dp = Dispatcher(storage=MemoryStorage())
+    activity_pipeline.start(bot)
 
     def session_middleware_factory(session_factory, bot_instance):
+        # Each update is one unit of work: the session is only opened if a
+        # middleware or handler uses it, and is committed once at the end.
+        # Notifications are sent as one digest per user after the commit.
         async def middleware(handler, event, data):
-            async with session_factory() as session:
-                data["session"] = session
-                data["bot"] = bot_instance
-                return await handler(event, data)
+            async with collect_notifications(bot_instance):
+                async with unit_of_work(lazy=True) as session:
+                    data["session"] = session
+                    data["bot"] = bot_instance
+                    return await handler(event, data)
         return middleware
 
     dp.message.outer_middleware(session_middleware_factory(Session, bot))
@@ -96,25 +124,31 @@ async def main() -> None:
     dp.include_router(channel_access_router)
 
     # Tareas programadas
-    pending_task = asyncio.create_task(channel_request_scheduler(bot, Session))
-    vip_task = asyncio.create_task(vip_subscription_scheduler(bot, Session))
-    membership_task = asyncio.create_task(vip_membership_scheduler(bot, Session))
-    auction_task = asyncio.create_task(auction_monitor_scheduler(bot, Session))
-    cleanup_task = asyncio.create_task(free_channel_cleanup_scheduler(bot, Session))
+    register_scheduled_jobs()
+    await due_scheduler.start(bot, Session)
 
     try:
         logging.info("Bot is starting polling...")
         await dp.start_polling(bot)
     finally:
-        pending_task.cancel()
-        vip_task.cancel()
-        membership_task.cancel()
-        auction_task.cancel()
-        cleanup_task.cancel()
-        await asyncio.gather(
-            pending_task, vip_task, membership_task, auction_task, cleanup_task,
-            return_exceptions=True
-        )
+        await due_scheduler.stop()
+        logging.info("Scheduled jobs: %s", due_scheduler.jobs())
+        await reaction_markup.stop()
+        logging.info("Reaction markup stats: %s", reaction_markup.stats())
+        await reaction_counter.stop()
+        logging.info("Reaction counter stats: %s", reaction_counter.stats())
+        await bid_notifier.stop()
+        logging.info("Bid notification stats: %s", bid_notifier.stats())
+        await activity_pipeline.stop()
+        logging.info("Activity pipeline stats: %s", activity_pipeline.stats())
+        await outbound_dispatcher.stop()
+        logging.info("Outbound dispatcher stats: %s", outbound_dispatcher.stats())
+        logging.info("Notification stats: %s", get_notification_stats())
+        await point_aggregator.stop()
+        logging.info("Database pool stats: %s", get_pool_stats())
+        logging.info("Unit of work stats: %s", get_unit_of_work_stats())
+        logging.info("VIP membership cache stats: %s", vip_index.stats())
+        await close_db()
 
 
 if __name__ == "__main__":
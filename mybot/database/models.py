@@ -12,6 +12,7 @@ from sqlalchemy import (
     Float,
     UniqueConstraint,
     Enum,
+    Index,
 )
 from uuid import uuid4
 from sqlalchemy.ext.declarative import declarative_base
@@ -56,6 +57,13 @@ class User(AsyncAttrs, Base):
         String, default="root"
     )  # e.g., "root", "profile", "missions", "rewards"
 
+    __table_args__ = (
+        # VIP expiry reminders and revocations
+        Index("ix_users_role_vip_expires_at", "role", "vip_expires_at"),
+        # Rankings
+        Index("ix_users_points", "points"),
+    )
+
 
 
 class Reward(AsyncAttrs, Base):
@@ -205,6 +213,58 @@ class VipSubscription(AsyncAttrs, Base):
     created_at = Column(DateTime, default=func.now())
 
 
+class PointLedgerEntry(AsyncAttrs, Base):
+    """Append-only record of point changes, folded into ``users.points`` in batches."""
+
+    __tablename__ = "point_ledger"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
+    amount = Column(Float, nullable=False)
+    reason = Column(String, nullable=True)
+    applied = Column(Boolean, default=False, index=True)
+    created_at = Column(DateTime, default=func.now())
+
+
+class PointHold(AsyncAttrs, Base):
+    """Points reserved by a user's leading auction bid until it is settled."""
+
+    __tablename__ = "point_holds"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
+    auction_id = Column(Integer, ForeignKey("auctions.id"), nullable=False)
+    amount = Column(Integer, nullable=False)
+    status = Column(String, default="held", index=True)  # held, released, captured
+    created_at = Column(DateTime, default=func.now())
+    settled_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_point_holds_auction_status", "auction_id", "status"),
+    )
+
+
+class BroadcastRun(AsyncAttrs, Base):
+    """Progress and outcome of one run of a broadcast job."""
+
+    __tablename__ = "broadcast_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job = Column(String, nullable=False)
+    status = Column(String, default="running")  # running, finished
+    # Users are processed in id order; ``cursor`` is the last one checkpointed
+    cursor = Column(BigInteger, nullable=True)
+    # "Now" for the whole run, so a resumed run selects the same users
+    reference_time = Column(DateTime, nullable=False)
+    sent = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    blocked = Column(Integer, default=0)
+    started_at = Column(DateTime, default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_broadcast_runs_job_status", "job", "status"),)
+
+
 class UserStats(AsyncAttrs, Base):
     """Activity and progression stats per user (points stored in User)."""
 
@@ -285,6 +345,14 @@ class ConfigEntry(AsyncAttrs, Base):
     value = Column(String, nullable=True)
 
 
+class ConfigVersion(AsyncAttrs, Base):
+    """Single row bumped on every config write, for cross-process invalidation."""
+
+    __tablename__ = "config_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
 class BotConfig(AsyncAttrs, Base):
     __tablename__ = "bot_config"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -309,6 +377,10 @@ class PendingChannelRequest(AsyncAttrs, Base):
     request_timestamp = Column(DateTime, default=func.now())
     approved = Column(Boolean, default=False)
 
+    __table_args__ = (
+        Index("ix_pending_channel_requests_approved_ts", "approved", "request_timestamp"),
+    )
+
 
 class Challenge(AsyncAttrs, Base):
     __tablename__ = "challenges"
@@ -343,6 +415,20 @@ class ButtonReaction(AsyncAttrs, Base):
     reaction_type = Column(String, nullable=False)
     created_at = Column(DateTime, default=func.now())
 
+    __table_args__ = (
+        Index("ix_button_reactions_message_user", "message_id", "user_id"),
+    )
+
+
+class ReactionCount(AsyncAttrs, Base):
+    """Running total of ``button_reactions`` per post and reaction."""
+
+    __tablename__ = "reaction_counts"
+
+    message_id = Column(BigInteger, primary_key=True)
+    reaction_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
 
 # NEW AUCTION SYSTEM MODELS
 class Auction(AsyncAttrs, Base):
@@ -385,6 +471,8 @@ class Bid(AsyncAttrs, Base):
     
     __table_args__ = (
         UniqueConstraint("auction_id", "user_id", "amount", name="uix_auction_user_bid"),
+        # Looking up a bidder's current winning bid
+        Index("ix_bids_auction_user_winning", "auction_id", "user_id", "is_winning"),
     )
 
 
@@ -400,6 +488,22 @@ class AuctionParticipant(AsyncAttrs, Base):
     last_notified_at = Column(DateTime, nullable=True)
 
 
+class AuctionSettlement(AsyncAttrs, Base):
+    """Outcome of an ended auction, written in the transaction that settles it.
+
+    The primary key keeps an auction from being settled (and its winner
+    charged) twice; ``notified_at`` is set once the result was broadcast.
+    """
+
+    __tablename__ = "auction_settlements"
+
+    auction_id = Column(Integer, ForeignKey("auctions.id"), primary_key=True)
+    winner_id = Column(BigInteger, ForeignKey("users.id"), nullable=True)
+    amount = Column(Integer, default=0)
+    settled_at = Column(DateTime, nullable=False)
+    notified_at = Column(DateTime, nullable=True, index=True)
+
+
 class MiniGamePlay(AsyncAttrs, Base):
     """Record usage of minigames such as roulette or challenges."""
 
@@ -1,18 +1,162 @@
 # database/setup.py
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool # NullPool es adecuado para Railway, para SQLite local puedes mantenerlo o quitarlo
-from .models import Base
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from .models import Base, ConfigVersion
 from utils.config import Config
 
 # Hacemos que el motor sea una variable global o pasada, no creada repetidamente
 _engine = None # Variable para almacenar el motor una vez inicializado
 
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait to check out a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        self.checkouts += 1
+        self.total_wait += waited
+        if waited > self.max_wait:
+            self.max_wait = waited
+        return conn
+
+    def recreate(self):
+        # Keep the counters when the pool is recreated after a disconnect
+        new_pool = super().recreate()
+        new_pool.checkouts = self.checkouts
+        new_pool.timeouts = self.timeouts
+        new_pool.total_wait = self.total_wait
+        new_pool.max_wait = self.max_wait
+        return new_pool
+
+
+class UnitOfWorkSession(AsyncSession):
+    """Session whose ``commit`` only flushes while ``defer_commit`` is set.
+
+    Services commit after each step; inside ``unit_of_work`` those commits
+    become flushes so the whole unit is written in a single transaction.
+    """
+
+    defer_commit = False
+
+    async def commit(self) -> None:
+        _UOW_STATS["commit_calls"] += 1
+        if self.defer_commit:
+            await self.flush()
+        else:
+            _UOW_STATS["commits"] += 1
+            await super().commit()
+
+
+class LazySession:
+    """Stand-in for an ``AsyncSession`` that is only opened on first use."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._session: UnitOfWorkSession | None = None
+
+    @property
+    def session(self) -> UnitOfWorkSession | None:
+        """The underlying session, or ``None`` if nothing has used it yet."""
+        return self._session
+
+    def open(self) -> UnitOfWorkSession:
+        if self._session is None:
+            self._session = self._factory()
+            _UOW_STATS["sessions"] += 1
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self.open(), name)
+
+
+# Counters for ``unit_of_work``: units run, sessions actually opened,
+# ``commit()`` calls made by callers and transactions really committed
+_UOW_STATS = {"units": 0, "sessions": 0, "commit_calls": 0, "commits": 0}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def _engine_options(url: str) -> dict:
+    """Return pool settings tuned for the database backend in ``url``."""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        database = make_url(url).database
+        if not database or database == ":memory:":
+            # In-memory databases only exist inside their one connection
+            return {"poolclass": StaticPool}
+        # Keep a fixed set of open connections. WAL lets readers proceed while
+        # one writer holds the lock, so a handful is enough; a single one would
+        # deadlock handlers that open a second session (e.g. /run_schedulers).
+        return {
+            "poolclass": TimedQueuePool,
+            "pool_size": Config.DB_POOL_SIZE,
+            "max_overflow": 0,
+            "pool_timeout": Config.DB_POOL_TIMEOUT,
+        }
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+        "pool_pre_ping": Config.DB_POOL_PRE_PING,
+    }
+
+
+def _create_missing_indexes(connection) -> None:
+    # create_all only builds indexes together with new tables, so add the
+    # ones declared later to databases created before them
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _seed_config_version(connection) -> None:
+    # Config writes only ever UPDATE this row, so two processes writing
+    # config for the first time don't race to insert it
+    if connection.scalar(select(ConfigVersion.id).where(ConfigVersion.id == 1)) is None:
+        connection.execute(insert(ConfigVersion).values(id=1, version=0))
+
+
 async def init_db():
     global _engine
     if _engine is None: # Solo crear el motor si no existe
-        _engine = create_async_engine(Config.DATABASE_URL, echo=False, poolclass=NullPool)
+        _engine = create_async_engine(
+            Config.DATABASE_URL, echo=False, **_engine_options(Config.DATABASE_URL)
+        )
+        if _engine.dialect.name == "sqlite":
+            event.listen(_engine.sync_engine, "connect", _set_sqlite_pragmas)
         async with _engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_create_missing_indexes)
+            await conn.run_sync(_seed_config_version)
     return _engine
 
 async def get_session() -> async_sessionmaker[AsyncSession]:
@@ -22,3 +166,122 @@ async def get_session() -> async_sessionmaker[AsyncSession]:
         raise RuntimeError("Database engine not initialized. Call init_db() first.")
     async_session = async_sessionmaker(bind=_engine, class_=AsyncSession, expire_on_commit=False)
     return async_session
+
+
+def _open_unit_session() -> UnitOfWorkSession:
+    session = UnitOfWorkSession(bind=_engine, expire_on_commit=False)
+    session.defer_commit = True
+    return session
+
+
+@asynccontextmanager
+async def unit_of_work(*, lazy: bool = False) -> AsyncIterator[AsyncSession]:
+    """Yield a session whose commits are deferred until the block exits.
+
+    The transaction is committed once on success and rolled back if the
+    block raises. With ``lazy=True`` a ``LazySession`` is yielded and no
+    session is opened unless the block actually uses it.
+    """
+    if _engine is None:
+        raise RuntimeError("Database engine not initialized. Call init_db() first.")
+    _UOW_STATS["units"] += 1
+    proxy = LazySession(_open_unit_session)
+    try:
+        yield proxy if lazy else proxy.open()
+        if proxy.session is not None:
+            proxy.session.defer_commit = False
+            await proxy.session.commit()
+    except BaseException:
+        if proxy.session is not None:
+            await proxy.session.rollback()
+        raise
+    finally:
+        if proxy.session is not None:
+            await proxy.session.close()
+
+
+# Key in ``Session.info`` set once the current transaction has written rows
+_WROTE_KEY = "transaction_wrote"
+# Key in ``Session.info`` holding ``after_commit`` callbacks waiting for the commit
+_CALLBACKS_KEY = "after_commit_callbacks"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session: Session, flush_context) -> None:
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_executed(orm_execute_state) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop(_CALLBACKS_KEY, ()):
+        callback()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_written(session: Session, transaction) -> None:
+    # Callbacks still queued belong to a transaction that was rolled back
+    if transaction.parent is None:
+        session.info.pop(_WROTE_KEY, None)
+        session.info.pop(_CALLBACKS_KEY, None)
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Call ``callback`` once the writes pending on ``session`` are committed.
+
+    Inside ``unit_of_work`` a service's ``commit`` is only a flush, so
+    anything that must not see (or announce) uncommitted rows waits for the
+    real commit. Nothing is called if the transaction is rolled back.
+
+    A transaction that hasn't written anything (e.g. one a ``refresh``
+    opened after a plain session's commit) has nothing to wait for and may
+    never be committed, so the callback runs right away.
+    """
+    pending = session.info.get(_WROTE_KEY) or session.new or session.dirty or session.deleted
+    if not session.in_transaction() or not pending:
+        callback()
+        return
+    session.info.setdefault(_CALLBACKS_KEY, []).append(callback)
+
+
+def get_unit_of_work_stats() -> dict:
+    """Return ``unit_of_work`` counters, including real commits per unit."""
+    stats = dict(_UOW_STATS)
+    units = stats["units"]
+    stats["commits_per_unit"] = stats["commits"] / units if units else 0.0
+    stats["sessions_per_unit"] = stats["sessions"] / units if units else 0.0
+    return stats
+
+
+def get_pool_stats() -> dict:
+    """Return connection pool usage, including checkout wait times in seconds."""
+    if _engine is None:
+        return {}
+    pool = _engine.pool
+    stats = {"pool": pool.__class__.__name__, "status": pool.status()}
+    if isinstance(pool, TimedQueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "checkouts": pool.checkouts,
+                "timeouts": pool.timeouts,
+                "avg_wait": pool.total_wait / pool.checkouts if pool.checkouts else 0.0,
+                "max_wait": pool.max_wait,
+            }
+        )
+    return stats
+
+
+async def close_db() -> None:
+    """Dispose of the engine and its pooled connections."""
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
@@ -18,6 +18,7 @@ from keyboards.admin_auction_kb import (
 )
 from keyboards.common import get_back_kb
 from services.auction_service import AuctionService
+from services.bid_notifier import bid_notifier
 from utils.text_utils import format_time_remaining, format_points, anonymize_username
 import logging
 
@@ -306,6 +307,13 @@ async def manage_auction(callback: CallbackQuery, session: AsyncSession):
     if auction.highest_bidder_id:
         details_text += f"🏆 **Pujador líder:** {auction_details['highest_bidder_display']}\n"
     
+    notify_stats = bid_notifier.auction_stats(auction_id)
+    if notify_stats:
+        details_text += (
+            f"📨 **Avisos de puja:** {notify_stats['sent']} enviados, "
+            f"{notify_stats['failed']} fallidos, {notify_stats['blocked']} bloqueados\n"
+        )
+    
     await callback.message.edit_text(
         details_text,
         reply_markup=get_auction_action_kb(auction_id, auction.status.value)
@@ -336,7 +344,7 @@ async def confirm_end_auction(callback: CallbackQuery, session: AsyncSession):
 
 
 @router.callback_query(F.data.startswith("confirm_end_auction_"))
-async def end_auction(callback: CallbackQuery, session: AsyncSession, bot: Bot):
+async def end_auction(callback: CallbackQuery, session: AsyncSession):
     """End an auction."""
     if not is_admin(callback.from_user.id):
         return await callback.answer()
@@ -344,7 +352,7 @@ async def end_auction(callback: CallbackQuery, session: AsyncSession, bot: Bot):
     auction_id = int(callback.data.split("_")[-1])
     auction_service = AuctionService(session)
     
-    ended_auction = await auction_service.end_auction(auction_id, bot)
+    ended_auction = await auction_service.end_auction(auction_id)
     
     if ended_auction:
         winner_text = "Sin ganador"
@@ -357,7 +365,7 @@ async def end_auction(callback: CallbackQuery, session: AsyncSession, bot: Bot):
             f"📝 **Subasta:** {ended_auction.name}\n"
             f"🏆 **Ganador:** {winner_text}\n"
             f"💰 **Puja ganadora:** {ended_auction.current_highest_bid} pts\n\n"
-            f"Se han enviado las notificaciones correspondientes.",
+            f"Los participantes recibirán el resultado en breve.",
             reply_markup=get_admin_auction_main_kb()
         )
         
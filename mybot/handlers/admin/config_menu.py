@@ -17,6 +17,7 @@ from utils.keyboard_utils import get_back_keyboard
 from services.config_service import ConfigService
 from services.channel_service import ChannelService
 from services.scheduler import run_channel_request_check, run_vip_subscription_check
+from services.due_scheduler import due_scheduler
 from database.setup import get_session
 from utils.admin_state import AdminConfigStates
 from aiogram.fsm.context import FSMContext
@@ -128,9 +129,13 @@ async def scheduler_menu(callback: CallbackQuery, session: AsyncSession):
     if not is_admin(callback.from_user.id):
         return await callback.answer()
     config = ConfigService(session)
-    ch = await config.get_value("channel_scheduler_interval") or "30"
     vip = await config.get_value("vip_scheduler_interval") or "3600"
-    text = f"Intervalos actuales:\nCanal: {ch}s\nVIP: {vip}s"
+    lines = [f"Intervalo membresía VIP: {vip}s", "", "Tareas (UTC):"]
+    for job in due_scheduler.jobs():
+        last = job["last_run"].strftime("%d/%m %H:%M:%S") if job["last_run"] else "-"
+        nxt = job["next_run"].strftime("%d/%m %H:%M:%S") if job["next_run"] else "-"
+        lines.append(f"• {job['name']}: última {last}, próxima {nxt}")
+    text = "\n".join(lines)
     await update_menu(callback, text, get_scheduler_config_kb(), session, "scheduler_config")
     await callback.answer()
 
@@ -186,18 +191,6 @@ async def channel_mode_both(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "set_channel_interval")
-async def prompt_channel_interval(callback: CallbackQuery, state: FSMContext):
-    if not is_admin(callback.from_user.id):
-        return await callback.answer()
-    await callback.message.edit_text(
-        "Ingresa el intervalo en segundos para revisar solicitudes de canal:",
-        reply_markup=get_back_keyboard("config_scheduler"),
-    )
-    await state.set_state(AdminConfigStates.waiting_for_channel_interval)
-    await callback.answer()
-
-
 @router.callback_query(F.data == "set_vip_interval")
 async def prompt_vip_interval(callback: CallbackQuery, state: FSMContext):
     if not is_admin(callback.from_user.id):
@@ -220,20 +213,6 @@ async def run_schedulers_now(callback: CallbackQuery, bot: Bot, session: AsyncSe
     await callback.answer("Schedulers ejecutados", show_alert=True)
 
 
-@router.message(AdminConfigStates.waiting_for_channel_interval)
-async def set_channel_interval(message: Message, state: FSMContext, session: AsyncSession):
-    if not is_admin(message.from_user.id):
-        return
-    try:
-        seconds = int(message.text.strip())
-    except ValueError:
-        await message.answer("Ingresa un número válido.")
-        return
-    await ConfigService(session).set_value("channel_scheduler_interval", str(seconds))
-    await message.answer("Intervalo actualizado.", reply_markup=get_admin_config_kb())
-    await state.clear()
-
-
 @router.message(AdminConfigStates.waiting_for_vip_channel_id)
 async def receive_vip_channel(message: Message, state: FSMContext, session: AsyncSession):
     if not is_admin(message.from_user.id):
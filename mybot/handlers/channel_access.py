@@ -4,9 +4,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
 
-from database.models import PendingChannelRequest, BotConfig
+from database.models import PendingChannelRequest, BotConfig, User
 from services.config_service import ConfigService
+from services.subscription_service import SubscriptionService
 from services.free_channel_service import FreeChannelService
+from utils.config import VIP_CHANNEL_ID
+from utils.vip_membership import vip_index
 
 router = Router()
 
@@ -25,6 +28,21 @@ async def handle_chat_member(update: ChatMemberUpdated, bot: Bot, session: Async
     Manejar cambios de membresía en el canal.
     Limpia solicitudes pendientes cuando el usuario se une o sale.
     """
+    vip_id = await ConfigService(session).get_vip_channel_id() or VIP_CHANNEL_ID
+    if vip_id and update.chat.id == vip_id:
+        member_id = update.new_chat_member.user.id
+        if update.new_chat_member.status in {"member", "administrator", "creator"}:
+            # Joining is what the membership sweep used to poll for
+            user = await session.get(User, member_id)
+            if user:
+                await SubscriptionService(session).sync_channel_member(user)
+            else:
+                vip_index.set(member_id, True)
+        else:
+            # Leaving the channel doesn't end a paid subscription: resolve again
+            vip_index.discard(member_id)
+        return
+
     free_service = FreeChannelService(session, bot)
     free_id = await free_service.get_free_channel_id()
     
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from services.message_service import MessageService
 from services.channel_service import ChannelService
 from services.message_registry import validate_message
+from services.notification_buffer import notify
 from utils.messages import BOT_MESSAGES
 from lexicon.lucien_messages import LUCIEN_MESSAGES
 import random
@@ -69,8 +70,8 @@ async def handle_reaction_callback(
 
     from services.point_service import PointService
 
-    points_dict = await channel_service.get_reaction_points(channel_id)
-    points = float(points_dict.get(reaction_type, 0.0))
+    profile = await channel_service.get_reaction_profile(channel_id)
+    points = profile.points_for(reaction_type)
 
     await PointService(session).add_points(callback.from_user.id, points, bot=bot)
     from services.mission_service import MissionService
@@ -96,11 +97,9 @@ async def handle_reaction_callback(
 
     await service.update_reaction_markup(chat_id, message_id)
     await callback.answer(BOT_MESSAGES["reaction_registered_points"].format(points=points))
-    await bot.send_message(
+    await notify(
+        bot,
         callback.from_user.id,
         BOT_MESSAGES["reaction_registered_points"].format(points=points),
     )
-    await bot.send_message(
-        callback.from_user.id,
-        random.choice(LUCIEN_MESSAGES),
-    )
+    await notify(bot, callback.from_user.id, random.choice(LUCIEN_MESSAGES))
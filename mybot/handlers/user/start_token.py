@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import User
 from utils.text_utils import sanitize_text
 from services.token_service import TokenService
-from services.subscription_service import SubscriptionService
+from services.subscription_service import SubscriptionService, schedule_vip_expiry
 from utils.menu_utils import send_temporary_reply
 from utils.messages import BOT_MESSAGES
 from services.achievement_service import AchievementService
@@ -71,6 +71,7 @@ async def start_with_token(message: Message, command: CommandObject, session: As
         logger.info(f"Created new subscription for user {user_id}")
 
     await session.commit()
+    schedule_vip_expiry(session, expires_at)
 
     # Grant VIP achievement
     ach_service = AchievementService(session)
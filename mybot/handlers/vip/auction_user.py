@@ -16,6 +16,7 @@ from keyboards.auction_kb import (
     get_bid_history_kb
 )
 from services.auction_service import AuctionService
+from services.point_service import PointService
 from database.models import User, AuctionParticipant
 from utils.text_utils import format_points, format_time_remaining, anonymize_username
 import logging
@@ -101,7 +102,12 @@ async def view_auction_details(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("Esta función está disponible solo para miembros VIP.", show_alert=True)
         return
     
-    auction_id = int(callback.data.split("_")[-1])
+    # "Actualizar" sends the version on screen: view_auction_v<version>_<id>
+    parts = callback.data.split("_")
+    auction_id = int(parts[-1])
+    shown_version = None
+    if parts[-2].startswith("v") and parts[-2][1:].isdigit():
+        shown_version = int(parts[-2][1:])
     auction_service = AuctionService(session)
     
     details = await auction_service.get_auction_details(auction_id, user_id)
@@ -109,6 +115,10 @@ async def view_auction_details(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("❌ Subasta no encontrada", show_alert=True)
         return
     
+    if details['version'] == shown_version:
+        await callback.answer(f"Sin cambios · ⏰ {details['time_remaining']}")
+        return
+    
     auction = details['auction']
     
     # Build detailed message
@@ -139,10 +149,11 @@ async def view_auction_details(callback: CallbackQuery, session: AsyncSession):
     
     # Check if user can bid
     user = await session.get(User, user_id)
+    balance = await PointService(session).get_available_points(user_id)
     user_can_bid = (
         auction.status.value == 'active' and 
         user and 
-        user.points >= details['min_next_bid'] and
+        balance >= details['min_next_bid'] and
         auction.highest_bidder_id != user_id
     )
     
@@ -152,7 +163,8 @@ async def view_auction_details(callback: CallbackQuery, session: AsyncSession):
             auction_id, 
             details['is_participating'], 
             auction.status.value,
-            user_can_bid
+            user_can_bid,
+            details['version']
         )
     )
     await callback.answer()
@@ -189,9 +201,10 @@ async def start_place_bid(callback: CallbackQuery, session: AsyncSession, state:
         return
     
     min_bid = details['min_next_bid']
-    if not user or user.points < min_bid:
+    balance = await PointService(session).get_available_points(user_id)
+    if not user or balance < min_bid:
         await callback.answer(
-            f"❌ No tienes suficientes puntos. Necesitas {min_bid}, tienes {format_points(user.points)}",
+            f"❌ No tienes suficientes puntos. Necesitas {min_bid}, tienes {format_points(balance)} disponibles",
             show_alert=True
         )
         return
@@ -274,10 +287,11 @@ async def process_custom_bid(message: Message, state: FSMContext, session: Async
         return
     
     user = await session.get(User, user_id)
-    if not user or user.points < amount:
+    balance = await PointService(session).get_available_points(user_id)
+    if not user or balance < amount:
         await send_temporary_reply(
             message, 
-            f"❌ No tienes suficientes puntos. Tienes {format_points(user.points)}, necesitas {amount}."
+            f"❌ No tienes suficientes puntos. Tienes {format_points(balance)} disponibles, necesitas {amount}."
         )
         return
     
@@ -104,13 +104,15 @@ async def show_user_level(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("Debes iniciar con /start", show_alert=True)
         return
 
-    from services.level_service import get_next_level_info
+    from services.level_service import LevelService, get_next_level_info
     from utils.messages import NIVEL_TEMPLATE
     
-    info = get_next_level_info(int(user.points))
+    points = await PointService(session).get_user_points(user_id)
+    await LevelService(session).load_level_table()
+    info = get_next_level_info(int(points))
     text = NIVEL_TEMPLATE.format(
         current_level=info["current_level"],
-        points=int(user.points),
+        points=int(points),
         percentage=info["percentage_to_next"],
         points_needed=info["points_needed"],
         next_level=info["next_level"],
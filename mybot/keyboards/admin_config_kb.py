@@ -25,7 +25,6 @@ def get_channel_type_kb():
 
 def get_scheduler_config_kb():
     builder = InlineKeyboardBuilder()
-    builder.button(text="⏲ Intervalo Canal", callback_data="set_channel_interval")
     builder.button(text="⏲ Intervalo VIP", callback_data="set_vip_interval")
     builder.button(text="▶ Ejecutar Ahora", callback_data="run_schedulers_now")
     builder.button(text="🔙 Volver", callback_data="admin_config")
@@ -52,8 +52,18 @@ def get_auction_list_kb(auctions: list, page: int = 0, per_page: int = 5):
     return builder.as_markup()
 
 
-def get_auction_details_kb(auction_id: int, is_participating: bool, auction_status: str, user_can_bid: bool = True):
-    """Keyboard for auction details view."""
+def get_auction_details_kb(
+    auction_id: int,
+    is_participating: bool,
+    auction_status: str,
+    user_can_bid: bool = True,
+    version: int | None = None,
+):
+    """Keyboard for auction details view.
+
+    ``version`` is the snapshot version shown, so "Actualizar" can tell
+    whether anything changed.
+    """
     builder = InlineKeyboardBuilder()
     
     if auction_status == 'active' and user_can_bid:
@@ -62,7 +72,8 @@ def get_auction_details_kb(auction_id: int, is_participating: bool, auction_stat
     if is_participating:
         builder.button(text="🔔 Notificaciones", callback_data=f"toggle_notifications_{auction_id}")
     
-    builder.button(text="🔄 Actualizar", callback_data=f"view_auction_{auction_id}")
+    refresh = f"view_auction_{auction_id}" if version is None else f"view_auction_v{version}_{auction_id}"
+    builder.button(text="🔄 Actualizar", callback_data=refresh)
     builder.button(text="📊 Ver Pujas", callback_data=f"view_bids_{auction_id}")
     builder.button(text="🔙 Volver", callback_data="view_active_auctions")
     builder.adjust(1)
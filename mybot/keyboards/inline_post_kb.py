@@ -1,6 +1,6 @@
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.types import InlineKeyboardMarkup
-from typing import Dict
+from typing import Dict, Sequence
 import logging
 
 from utils.config import DEFAULT_REACTION_BUTTONS
@@ -9,7 +9,7 @@ logger = logging.getLogger(__name__)
 
 
 def get_reaction_kb(
-    reactions: list[str],
+    reactions: Sequence[str],
     current_counts: Dict[str, int] | None,
     message_id: int,
     channel_id: int,
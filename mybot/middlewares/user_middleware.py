@@ -7,9 +7,13 @@ from aiogram.types import Update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.user_service import UserService
+from utils.cache import AsyncTTLCache
 
 logger = logging.getLogger(__name__)
 
+# Users already known to exist, so most updates never need the session
+_REGISTERED_USERS = AsyncTTLCache(max_size=50000, ttl=3600)
+
 
 class UserRegistrationMiddleware(BaseMiddleware):
     async def __call__(
@@ -32,7 +36,7 @@ class UserRegistrationMiddleware(BaseMiddleware):
         elif getattr(event, "user", None):  # e.g., PollAnswer
             user_info = event.user
 
-        if user_info:
+        if user_info and not _REGISTERED_USERS.get(user_info.id):
             service = UserService(session)
             user = await service.get_user(user_info.id)
             if not user:
@@ -43,6 +47,9 @@ class UserRegistrationMiddleware(BaseMiddleware):
                     username=getattr(user_info, "username", None),
                 )
                 logger.info("Created new user via middleware: %s", user_info.id)
+            else:
+                # Only rows already stored; a new one could still be rolled back
+                _REGISTERED_USERS.set(user_info.id, True)
             data.setdefault("user", user)
 
         return await handler(event, data)
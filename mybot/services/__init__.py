@@ -16,7 +16,7 @@ from .auction_service import AuctionService
 from .lore_piece_service import LorePieceService
 from .user_service import UserService
 from .backpack_service import BackpackService
-from .scheduler import channel_request_scheduler, vip_subscription_scheduler, vip_membership_scheduler
+from .scheduler import register_scheduled_jobs
 
 __all__ = [
     "AchievementService",
@@ -32,9 +32,7 @@ __all__ = [
     "ConfigService",
     "SubscriptionPlanService",
     "ChannelService",
-    "channel_request_scheduler",
-    "vip_subscription_scheduler",
-    "vip_membership_scheduler",
+    "register_scheduled_jobs",
     "EventService",
     "RaffleService",
     "MessageService",
@@ -15,6 +15,9 @@ from database.models import (
     UserStats,
     UserMissionEntry,
 )
+from database.setup import after_commit
+from services.badge_rules import BadgeRule, rule_engine
+from services.notification_buffer import notify
 
 PREDEFINED_ACHIEVEMENTS = [
     {
@@ -73,31 +76,26 @@ class AchievementService:
                 self.session.add(obj)
         if self.session.new:
             await self.session.commit()
+            after_commit(self.session, rule_engine.invalidate)
 
-    async def _grant(self, user_id: int, achievement: Achievement, *, bot: Bot | None = None) -> bool:
-        stmt = select(UserAchievement).where(
-            UserAchievement.user_id == user_id,
-            UserAchievement.achievement_id == achievement.id,
-        )
-        result = await self.session.execute(stmt)
-        if result.scalar_one_or_none():
-            return False
-        obj = UserAchievement(user_id=user_id, achievement_id=achievement.id)
-        self.session.add(obj)
-        await self.session.commit()
-        if bot:
-            await bot.send_message(user_id, achievement.reward_text)
-        return True
+    async def _ensure_rules(self) -> None:
+        if not rule_engine.loaded:
+            await self.ensure_achievements_exist()
 
     async def _check_and_grant(self, user_id: int, condition_type: str, value: int, bot: Bot | None = None):
-        await self.ensure_achievements_exist()
-        stmt = select(Achievement).where(
-            Achievement.condition_type == condition_type,
-            Achievement.condition_value <= value,
+        await self._ensure_rules()
+        achievements = await rule_engine.new_achievements(
+            self.session, user_id, condition_type, value
         )
-        achievements = (await self.session.execute(stmt)).scalars().all()
+        if not achievements:
+            return
         for ach in achievements:
-            await self._grant(user_id, ach, bot=bot)
+            self.session.add(UserAchievement(user_id=user_id, achievement_id=ach.id))
+            rule_engine.mark_achievement(self.session, user_id, ach.id)
+        await self.session.commit()
+        if bot:
+            for ach in achievements:
+                await notify(bot, user_id, ach.reward_text)
 
     async def check_message_achievements(self, user_id: int, messages_sent: int, *, bot: Bot | None = None):
         await self._check_and_grant(user_id, "messages", messages_sent, bot=bot)
@@ -112,6 +110,7 @@ class AchievementService:
         )
         count = (await self.session.execute(stmt)).scalar() or 0
         await self._check_and_grant(user_id, "invites", count, bot=bot)
+        await self.grant_badges_for(user_id, "invites", count, bot=bot)
 
     async def check_vip_achievement(self, user_id: int, *, bot: Bot | None = None):
         stmt = select(func.count()).select_from(VipSubscription).where(VipSubscription.user_id == user_id)
@@ -120,59 +119,82 @@ class AchievementService:
 
     # ----- Badge related methods -----
     async def _badge_condition_met(self, user_id: int, badge: Badge) -> bool:
-        progress = await self.session.get(UserStats, user_id)
-        if not progress:
-            return False
-        if badge.condition_type == "messages":
-            return progress.messages_sent >= badge.condition_value
-        if badge.condition_type == "login_streak":
-            return progress.checkin_streak >= badge.condition_value
-        if badge.condition_type == "missions":
+        value = await self.get_stat_value(user_id, badge.condition_type)
+        return value is not None and value >= badge.condition_value
+
+    async def get_stat_value(self, user_id: int, condition_type: str) -> int | None:
+        if condition_type in ("messages", "login_streak"):
+            progress = await self.session.get(UserStats, user_id)
+            if not progress:
+                return None
+            if condition_type == "messages":
+                return progress.messages_sent
+            return progress.checkin_streak
+        if condition_type == "missions":
             stmt = select(func.count()).select_from(UserMissionEntry).where(
                 UserMissionEntry.user_id == user_id,
                 UserMissionEntry.completed == True,
             )
-            count = (await self.session.execute(stmt)).scalar() or 0
-            return count >= badge.condition_value
-        if badge.condition_type == "invites":
+            return (await self.session.execute(stmt)).scalar() or 0
+        if condition_type == "invites":
             stmt = select(func.count()).select_from(InviteToken).where(
                 InviteToken.created_by == user_id,
                 InviteToken.used_by.is_not(None),
             )
-            count = (await self.session.execute(stmt)).scalar() or 0
-            return count >= badge.condition_value
-        return False
-
-    async def check_user_badges(self, user_id: int) -> list[Badge]:
-        stmt = select(Badge).where(Badge.is_active == True)
-        badges = (await self.session.execute(stmt)).scalars().all()
+            return (await self.session.execute(stmt)).scalar() or 0
+        return None
+
+    async def check_badges_for(
+        self, user_id: int, condition_type: str, value: int
+    ) -> list[BadgeRule]:
+        """Return badges newly reached after ``condition_type`` changed to ``value``."""
+        await self._ensure_rules()
+        return await rule_engine.new_badges(self.session, user_id, condition_type, value)
+
+    async def check_user_badges(self, user_id: int) -> list[BadgeRule]:
+        """Return every active badge the user qualifies for but does not have."""
+        await self._ensure_rules()
         unlockable = []
-        for badge in badges:
-            stmt = select(UserBadge).where(
-                UserBadge.user_id == user_id,
-                UserBadge.badge_id == badge.id,
-            )
-            existing = (await self.session.execute(stmt)).scalar_one_or_none()
-            if existing:
-                continue
-            if await self._badge_condition_met(user_id, badge):
-                unlockable.append(badge)
+        for condition_type in await rule_engine.badge_types(self.session):
+            value = await self.get_stat_value(user_id, condition_type)
+            if value is not None:
+                unlockable += await self.check_badges_for(user_id, condition_type, value)
         return unlockable
 
+    async def award_badges(self, user_id: int, badges: list[BadgeRule]) -> None:
+        """Grant badges already matched by the rule engine in one commit."""
+        if not badges:
+            return
+        for badge in badges:
+            self.session.add(UserBadge(user_id=user_id, badge_id=badge.id))
+            rule_engine.mark_badge(self.session, user_id, badge.id)
+        await self.session.commit()
+
+    async def grant_badges_for(
+        self, user_id: int, condition_type: str, value: int, *, bot: Bot | None = None
+    ) -> list[BadgeRule]:
+        """Award and announce badges unlocked by a stat change."""
+        badges = await self.check_badges_for(user_id, condition_type, value)
+        await self.award_badges(user_id, badges)
+        if bot:
+            for badge in badges:
+                await notify(
+                    bot,
+                    user_id,
+                    f"🏅 Has obtenido la insignia {badge.icon or ''} {badge.name}!",
+                )
+        return badges
+
     async def award_badge(self, user_id: int, badge_id: int, *, force: bool = False) -> bool:
         badge = await self.session.get(Badge, badge_id)
         if not badge or not badge.is_active:
             return False
-        stmt = select(UserBadge).where(
-            UserBadge.user_id == user_id,
-            UserBadge.badge_id == badge_id,
-        )
-        existing = (await self.session.execute(stmt)).scalar_one_or_none()
-        if existing:
+        if await rule_engine.has_badge(self.session, user_id, badge_id):
             return False
         if not force and not await self._badge_condition_met(user_id, badge):
             return False
         self.session.add(UserBadge(user_id=user_id, badge_id=badge_id))
+        rule_engine.mark_badge(self.session, user_id, badge_id)
         await self.session.commit()
         return True
 
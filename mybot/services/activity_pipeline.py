@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from aiogram import Bot
+
+from database.models import User
+from database.setup import unit_of_work
+from utils.config import (
+    ACTIVITY_BATCH_SIZE,
+    ACTIVITY_BATCH_WINDOW,
+    ACTIVITY_ENQUEUE_TIMEOUT,
+    ACTIVITY_QUEUE_SIZE,
+)
+from utils.messages import BOT_MESSAGES
+from services.notification_buffer import collect_notifications, notify
+from services.outbound_dispatcher import PRIORITY_NOTIFICATION, outbound_priority
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ActivityRecord:
+    user_id: int
+    kind: str  # "message", "reaction" or "poll"
+    message_id: int | None = None
+
+
+@dataclass
+class _UserActivity:
+    messages: int = 0
+    reactions: list[int] = field(default_factory=list)
+    polls: int = 0
+
+
+class ActivityPipeline:
+    """Apply message, reaction and poll rewards outside the update handlers.
+
+    Middlewares ``submit`` a compact record and return at once. A worker
+    collects records for ``window`` seconds (or ``batch_size`` records),
+    coalesces them per user and applies points, missions and challenges
+    for the whole batch in one transaction. The queue is bounded: when it
+    is full ``submit`` waits up to ``enqueue_timeout`` seconds and then
+    drops the record. ``stop`` drains whatever is queued.
+    """
+
+    def __init__(
+        self, window: float, batch_size: int, max_queue: int, enqueue_timeout: float
+    ):
+        self.window = window
+        self.batch_size = batch_size
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: asyncio.Queue[ActivityRecord] = asyncio.Queue(max_queue)
+        self._task: asyncio.Task | None = None
+        self._bot: Bot | None = None
+        self.processed = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+
+    async def submit(self, record: ActivityRecord) -> bool:
+        """Queue ``record``; returns ``False`` if it was dropped."""
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self._queue.put(record), self.enqueue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            logger.warning("Activity queue full, dropped %s from user %s", record.kind, record.user_id)
+            return False
+
+    def start(self, bot: Bot) -> None:
+        self._bot = bot
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 30) -> None:
+        """Apply queued records, then stop the worker."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Activity pipeline not drained, %s records left", self._queue.qsize())
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "processed": self.processed,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    async def _next_batch(self) -> list[ActivityRecord]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                # Reward notifications queue behind interactive replies
+                with outbound_priority(PRIORITY_NOTIFICATION):
+                    await self._apply(batch)
+            except Exception:
+                logger.exception("Error applying activity batch")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _apply(self, batch: list[ActivityRecord]) -> None:
+        activity: dict[int, _UserActivity] = defaultdict(_UserActivity)
+        for record in batch:
+            entry = activity[record.user_id]
+            if record.kind == "message":
+                entry.messages += 1
+            elif record.kind == "reaction":
+                entry.reactions.append(record.message_id)
+            elif record.kind == "poll":
+                entry.polls += 1
+
+        try:
+            async with collect_notifications(self._bot), unit_of_work() as session:
+                for user_id, entry in activity.items():
+                    await self._apply_user(session, user_id, entry)
+        except Exception:
+            if len(activity) == 1:
+                self.failed += 1
+                raise
+            # Retry user by user so one bad record doesn't lose the batch
+            logger.exception("Activity batch failed, retrying per user")
+            for user_id, entry in activity.items():
+                try:
+                    async with collect_notifications(self._bot), unit_of_work() as session:
+                        await self._apply_user(session, user_id, entry)
+                except Exception:
+                    self.failed += 1
+                    logger.exception("Error applying activity for user %s", user_id)
+        self.batches += 1
+        self.processed += len(batch)
+
+    async def _apply_user(self, session, user_id: int, entry: _UserActivity) -> None:
+        from services.mission_service import MissionService
+        from services.point_service import PointService
+
+        bot = self._bot
+        service = PointService(session)
+        mission_service = MissionService(session)
+        completed = []
+
+        if entry.messages:
+            # award_message has its own cooldown, so one call covers the burst
+            await service.award_message(user_id, bot)
+            await mission_service.update_progress(
+                user_id, "messages", increment=entry.messages, bot=bot
+            )
+            completed += await mission_service.increment_challenge_progress(
+                user_id, "messages", increment=entry.messages, bot=bot
+            )
+
+        if entry.reactions:
+            user = await session.get(User, user_id)
+            if not user:
+                user = User(id=user_id)
+                session.add(user)
+                await session.commit()
+            for message_id in entry.reactions:
+                await service.award_reaction(user, message_id, bot)
+            await mission_service.update_progress(
+                user_id, "reaction", increment=len(entry.reactions), bot=bot
+            )
+            # Not every message catalog defines this text; a KeyError here
+            # would roll back the whole batch
+            registered = BOT_MESSAGES.get("reaction_registered")
+            if registered:
+                await notify(bot, user_id, registered)
+            completed += await mission_service.increment_challenge_progress(
+                user_id, "reactions", increment=len(entry.reactions), bot=bot
+            )
+
+        for _ in range(entry.polls):
+            await service.award_poll(user_id, bot)
+
+        for ch in completed:
+            await notify(
+                bot,
+                user_id,
+                BOT_MESSAGES["challenge_completed"].format(
+                    challenge_type=ch.type,
+                    points=100,
+                ),
+            )
+
+
+activity_pipeline = ActivityPipeline(
+    ACTIVITY_BATCH_WINDOW, ACTIVITY_BATCH_SIZE, ACTIVITY_QUEUE_SIZE, ACTIVITY_ENQUEUE_TIMEOUT
+)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from database.models import Auction, AuctionParticipant, AuctionStatus, Bid
+from database.setup import get_session
+
+logger = logging.getLogger(__name__)
+
+# Key in ``Session.info`` holding auctions closed for its open transaction
+_SESSION_KEY = "closed_auction_books"
+
+
+@dataclass
+class AuctionBook:
+    """In-memory state of one active auction.
+
+    Bids on the auction are placed while holding ``lock``; the book only
+    changes once the bid it describes has been committed.
+    """
+
+    auction_id: int
+    name: str
+    initial_price: int
+    min_bid_increment: int
+    max_participants: int | None
+    auto_extend_minutes: int
+    end_time: datetime
+    high_bid: int = 0
+    high_bidder: int | None = None
+    participants: set[int] = field(default_factory=set)
+    closed: bool = False
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def min_bid(self) -> int:
+        return max(self.initial_price, self.high_bid + self.min_bid_increment)
+
+
+class AuctionBooks:
+    """Order books of the active auctions, keyed by auction id.
+
+    ``load`` rebuilds every active auction's book from ``bids`` and
+    ``auction_participants`` at startup; auctions started later get their
+    book the first time someone bids. Once ``close``d, an auction gets no
+    new book until the next ``load``, unless the transaction that closed it
+    rolls back.
+    """
+
+    def __init__(self):
+        self._books: dict[int, AuctionBook] = {}
+        self._closed: set[int] = set()
+        self._build_lock = asyncio.Lock()
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+
+    async def session_factory(self) -> async_sessionmaker[AsyncSession]:
+        if self._session_factory is None:
+            self._session_factory = await get_session()
+        return self._session_factory
+
+    async def load(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """Rebuild the books of all active auctions."""
+        self._session_factory = session_factory
+        async with session_factory() as session:
+            ids = (
+                await session.scalars(
+                    select(Auction.id).where(Auction.status == AuctionStatus.ACTIVE)
+                )
+            ).all()
+            books = {}
+            for auction_id in ids:
+                book = await self._build(session, auction_id)
+                if book is not None:
+                    books[auction_id] = book
+        self._books = books
+        self._closed.clear()
+        logger.info("Loaded order books for %s active auctions", len(books))
+
+    async def get(self, auction_id: int) -> AuctionBook | None:
+        """Return the book of an active auction, building it if needed."""
+        book = self._books.get(auction_id)
+        if book is not None or auction_id in self._closed:
+            return book
+        async with self._build_lock:
+            book = self._books.get(auction_id)
+            if book is None and auction_id not in self._closed:
+                async with (await self.session_factory())() as session:
+                    book = await self._build(session, auction_id)
+                if book is not None:
+                    self._books[auction_id] = book
+        return book
+
+    async def rebuild(self, auction_id: int) -> AuctionBook | None:
+        """Drop the cached book and read it again from the database."""
+        self._books.pop(auction_id, None)
+        return await self.get(auction_id)
+
+    async def close(self, session: AsyncSession, auction_id: int) -> None:
+        """Stop taking bids on an auction ``session`` is ending or cancelling.
+
+        Waits for a bid in progress to be written, so the caller reads the
+        final high bid afterwards. The auction is ``reopen``ed if the
+        session's transaction rolls back.
+        """
+        self._closed.add(auction_id)
+        session.info.setdefault(_SESSION_KEY, []).append(auction_id)
+        book = self._books.pop(auction_id, None)
+        if book is not None:
+            async with book.lock:
+                book.closed = True
+
+    def reopen(self, auction_id: int) -> None:
+        """Take bids on a ``close``d auction again; its book is rebuilt on next use."""
+        self._closed.discard(auction_id)
+
+    async def _build(self, session: AsyncSession, auction_id: int) -> AuctionBook | None:
+        auction = await session.get(Auction, auction_id)
+        if not auction or auction.status != AuctionStatus.ACTIVE:
+            return None
+        top = (
+            await session.execute(
+                select(Bid.amount, Bid.user_id)
+                .where(Bid.auction_id == auction_id)
+                .order_by(Bid.amount.desc(), Bid.id.desc())
+                .limit(1)
+            )
+        ).first()
+        participants = set(
+            (
+                await session.scalars(
+                    select(AuctionParticipant.user_id).where(
+                        AuctionParticipant.auction_id == auction_id
+                    )
+                )
+            ).all()
+        )
+        return AuctionBook(
+            auction_id=auction.id,
+            name=auction.name,
+            initial_price=auction.initial_price,
+            min_bid_increment=auction.min_bid_increment or 0,
+            max_participants=auction.max_participants,
+            auto_extend_minutes=auction.auto_extend_minutes or 0,
+            end_time=auction.end_time,
+            high_bid=top.amount if top else 0,
+            high_bidder=top.user_id if top else None,
+            participants=participants,
+        )
+
+
+auction_books = AuctionBooks()
+
+
+@event.listens_for(Session, "after_commit")
+def _keep_committed_closed(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _reopen_rolled_back(session: Session, transaction) -> None:
+    # Committed closes were already popped; anything left was rolled back
+    if transaction.parent is None:
+        for auction_id in session.info.pop(_SESSION_KEY, ()):
+            auction_books.reopen(auction_id)
@@ -6,18 +6,25 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Tuple
 
 from aiogram import Bot
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import bindparam, select, func, and_, or_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import (
     Auction, 
     Bid, 
     AuctionParticipant, 
-    User, 
+    AuctionSettlement,
     AuctionStatus
 )
-from utils.text_utils import anonymize_username, format_points, format_time_remaining
+from utils.text_utils import format_points, format_time_remaining
 from services.point_service import PointService
+from services.auction_book import AuctionBook, auction_books
+from services.auction_snapshot import auction_snapshots
+from services.bid_notifier import bid_notifier
+from services.point_holds import capture_holds, place_hold, point_holds, release_holds
+from services.point_ledger import outstanding_debits, record_points
+from services.outbound_dispatcher import PRIORITY_NOTIFICATION, outbound_dispatcher
+from services.due_scheduler import AUCTIONS_JOB, due_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +81,8 @@ class AuctionService:
         auction.status = AuctionStatus.ACTIVE
         auction.start_time = datetime.utcnow()
         await self.session.commit()
+        due_scheduler.schedule_on_commit(self.session, AUCTIONS_JOB, auction.end_time)
+        auction_snapshots.bump_on_commit(self.session, auction_id)
         
         logger.info(f"Auction {auction_id} started")
         return True
@@ -88,111 +97,169 @@ class AuctionService:
         """
         Place a bid in an auction.
         
+        Bids on the same auction are serialized on its order book, checked
+        against the book in memory and written in one short transaction of
+        their own, independent of the caller's session.
+        
         Returns:
             Tuple[bool, str]: (success, message)
         """
-        auction = await self.session.get(Auction, auction_id)
-        if not auction:
-            return False, "Subasta no encontrada"
-        
-        if auction.status != AuctionStatus.ACTIVE:
+        book = await auction_books.get(auction_id)
+        if not book:
+            auction = await self.session.get(Auction, auction_id)
+            if not auction:
+                return False, "Subasta no encontrada"
             return False, "La subasta no está activa"
         
-        if datetime.utcnow() > auction.end_time:
-            return False, "La subasta ha finalizado"
+        # Check if user has enough points not held by other bids
+        balance = await self.point_service.get_user_points(user_id)
+        if point_holds.available(user_id, balance) < amount:
+            return False, self._not_enough_points(user_id, amount, balance)
+        
+        async with book.lock:
+            error = self._check_bid(book, user_id, amount)
+            if error:
+                return False, error
+            # Points another session is spending right now can't be bid
+            spendable = balance - outstanding_debits(self.session, user_id)
+            if not point_holds.reserve(user_id, amount, spendable):
+                return False, self._not_enough_points(user_id, amount, spendable)
+            
+            now = datetime.utcnow()
+            end_time = book.end_time
+            # Auto-extend if bid is placed in the last few minutes
+            if (end_time - now).total_seconds() < book.auto_extend_minutes * 60:
+                end_time = now + timedelta(minutes=book.auto_extend_minutes)
+            
+            try:
+                written = await self._write_bid(book, user_id, amount, end_time)
+            except BaseException:
+                point_holds.release(user_id, amount)
+                raise
+            if not written:
+                point_holds.release(user_id, amount)
+                # Another process changed the auction: reload it and tell the user why
+                book = await auction_books.rebuild(auction_id)
+                error = self._check_bid(book, user_id, amount) if book else "La subasta no está activa"
+                return False, error or "La subasta ha cambiado, inténtalo de nuevo"
+            
+            if end_time != book.end_time:
+                logger.info(f"Auction {auction_id} auto-extended due to late bid")
+            book.high_bid = amount
+            book.high_bidder = user_id
+            book.end_time = end_time
+            book.participants.add(user_id)
+        auction_snapshots.bump(auction_id)
+        
+        # Outbid participants are told in the background
+        if bot:
+            bid_notifier.publish(bot, book)
+        
+        logger.info(f"User {user_id} placed bid of {amount} points in auction {auction_id}")
+        return True, f"¡Puja de {amount} puntos realizada con éxito!"
+
+    @staticmethod
+    def _not_enough_points(user_id: int, amount: int, balance: float) -> str:
+        available = point_holds.available(user_id, balance)
+        if available == balance:
+            return f"No tienes suficientes puntos. Necesitas {amount}, tienes {format_points(balance)}"
+        return (
+            f"No tienes suficientes puntos disponibles. Necesitas {amount}, tienes "
+            f"{format_points(available)} libres ({format_points(balance - available)} reservados en otras pujas)"
+        )
+
+    @staticmethod
+    def _check_bid(book: AuctionBook, user_id: int, amount: int) -> Optional[str]:
+        """Validate a bid against the order book; return the error, if any."""
+        if book.closed:
+            return "La subasta no está activa"
         
-        # Check if user has enough points
-        user = await self.session.get(User, user_id)
-        if not user or user.points < amount:
-            return False, f"No tienes suficientes puntos. Necesitas {amount}, tienes {format_points(user.points)}"
+        if datetime.utcnow() > book.end_time:
+            return "La subasta ha finalizado"
         
         # Validate bid amount
-        min_bid = max(auction.initial_price, auction.current_highest_bid + auction.min_bid_increment)
+        min_bid = book.min_bid()
         if amount < min_bid:
-            return False, f"La puja mínima es {min_bid} puntos"
+            return f"La puja mínima es {min_bid} puntos"
         
         # Check if user is already the highest bidder
-        if auction.highest_bidder_id == user_id:
-            return False, "Ya eres el pujador más alto"
+        if book.high_bidder == user_id:
+            return "Ya eres el pujador más alto"
         
         # Check participant limit
-        if auction.max_participants:
-            participant_count = await self._get_participant_count(auction_id)
-            if participant_count >= auction.max_participants:
-                # Check if user is already a participant
-                is_participant = await self._is_participant(auction_id, user_id)
-                if not is_participant:
-                    return False, f"La subasta está limitada a {auction.max_participants} participantes"
-        
-        # Create the bid
-        bid = Bid(
-            auction_id=auction_id,
-            user_id=user_id,
-            amount=amount,
-            is_winning=True
-        )
-        
-        # Update previous winning bid
-        if auction.highest_bidder_id:
-            await self._update_previous_winning_bid(auction_id, auction.highest_bidder_id)
-        
-        # Update auction
-        auction.current_highest_bid = amount
-        auction.highest_bidder_id = user_id
-        
-        # Auto-extend if bid is placed in the last few minutes
-        time_remaining = auction.end_time - datetime.utcnow()
-        if time_remaining.total_seconds() < (auction.auto_extend_minutes * 60):
-            auction.end_time = datetime.utcnow() + timedelta(minutes=auction.auto_extend_minutes)
-            logger.info(f"Auction {auction_id} auto-extended due to late bid")
-        
-        self.session.add(bid)
-        
-        # Add user as participant if not already
-        await self._ensure_participant(auction_id, user_id)
-        
-        await self.session.commit()
-        
-        # Send notifications to other participants
-        if bot:
-            await self._notify_participants(auction, user_id, amount, bot)
-        
-        logger.info(f"User {user_id} placed bid of {amount} points in auction {auction_id}")
-        return True, f"¡Puja de {amount} puntos realizada con éxito!"
+        if (
+            book.max_participants
+            and user_id not in book.participants
+            and len(book.participants) >= book.max_participants
+        ):
+            return f"La subasta está limitada a {book.max_participants} participantes"
+        return None
 
-    async def end_auction(self, auction_id: int, bot: Optional[Bot] = None) -> Optional[Auction]:
-        """End an auction and determine the winner."""
-        auction = await self.session.get(Auction, auction_id)
-        if not auction or auction.status != AuctionStatus.ACTIVE:
-            return None
-        
-        auction.status = AuctionStatus.ENDED
-        auction.ended_at = datetime.utcnow()
-        
-        if auction.highest_bidder_id and auction.current_highest_bid > 0:
-            auction.winner_id = auction.highest_bidder_id
+    async def _write_bid(
+        self, book: AuctionBook, user_id: int, amount: int, end_time: datetime
+    ) -> bool:
+        """Persist a validated bid; ``False`` if the auction moved meanwhile."""
+        auction_id = book.auction_id
+        session_factory = await auction_books.session_factory()
+        async with session_factory() as session:
+            # The same rules as ``_check_bid``, enforced by the row update
+            # itself so that other bot processes can't slip a bid in between
+            result = await session.execute(
+                update(Auction)
+                .where(
+                    Auction.id == auction_id,
+                    Auction.status == AuctionStatus.ACTIVE,
+                    Auction.end_time >= datetime.utcnow(),
+                    Auction.initial_price <= amount,
+                    func.coalesce(Auction.current_highest_bid, 0)
+                    + func.coalesce(Auction.min_bid_increment, 0)
+                    <= amount,
+                    or_(Auction.highest_bidder_id.is_(None), Auction.highest_bidder_id != user_id),
+                )
+                .values(
+                    current_highest_bid=amount,
+                    highest_bidder_id=user_id,
+                    end_time=end_time,
+                )
+            )
+            if result.rowcount != 1:
+                await session.rollback()
+                return False
             
-            # Deduct points from winner
-            await self.point_service.deduct_points(auction.winner_id, auction.current_highest_bid)
+            # Update previous winning bid and move the hold to the new one
+            await session.execute(
+                update(Bid)
+                .where(Bid.auction_id == auction_id, Bid.is_winning == True)
+                .values(is_winning=False)
+            )
+            await release_holds(session, auction_id)
+            session.add(Bid(auction_id=auction_id, user_id=user_id, amount=amount, is_winning=True))
+            place_hold(session, auction_id, user_id, amount)
             
-            # Notify winner
-            if bot:
-                try:
-                    await bot.send_message(
-                        auction.winner_id,
-                        f"🎉 ¡Felicidades! Has ganado la subasta '{auction.name}'\n"
-                        f"🏆 Premio: {auction.prize_description}\n"
-                        f"💰 Puja ganadora: {auction.current_highest_bid} puntos\n\n"
-                        f"Te contactaremos pronto para entregarte tu premio."
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to notify auction winner {auction.winner_id}: {e}")
-                
-                # Notify all participants about the result
-                await self._notify_auction_ended(auction, bot)
+            # Add user as participant if not already
+            if user_id not in book.participants:
+                session.add(AuctionParticipant(auction_id=auction_id, user_id=user_id))
+            
+            await session.commit()
+        return True
+
+    async def end_auction(self, auction_id: int) -> Optional[Auction]:
+        """End an auction and determine the winner.
         
-        await self.session.commit()
+        The result is announced by the auctions job, like for auctions
+        that end on their own.
+        """
+        auction = await self.session.get(Auction, auction_id, populate_existing=True)
+        if not auction or auction.status != AuctionStatus.ACTIVE:
+            return None
+        await auction_books.close(self.session, auction_id)
+        # Bids are written by their own sessions: read the final high bid
         await self.session.refresh(auction)
+        if auction.status != AuctionStatus.ACTIVE:
+            return None
+        
+        await self._settle([auction])
+        due_scheduler.schedule_on_commit(self.session, AUCTIONS_JOB)
         
         logger.info(f"Auction {auction_id} ended. Winner: {auction.winner_id}")
         return auction
@@ -202,9 +269,12 @@ class AuctionService:
         auction = await self.session.get(Auction, auction_id)
         if not auction or auction.status == AuctionStatus.ENDED:
             return False
+        await auction_books.close(self.session, auction_id)
         
         auction.status = AuctionStatus.CANCELLED
         auction.ended_at = datetime.utcnow()
+        await release_holds(self.session, auction_id)
+        auction_snapshots.bump_on_commit(self.session, auction_id)
         
         # Notify participants
         if bot:
@@ -235,49 +305,33 @@ class AuctionService:
         return result.scalars().all()
 
     async def get_auction_details(self, auction_id: int, viewer_user_id: int) -> Optional[dict]:
-        """Get detailed auction information with anonymized participant data."""
-        auction = await self.session.get(Auction, auction_id)
-        if not auction:
-            return None
-        
-        # Get highest bidder info (anonymized)
-        highest_bidder = None
-        if auction.highest_bidder_id:
-            highest_bidder = await self.session.get(User, auction.highest_bidder_id)
-        
-        # Get recent bids (last 5)
-        stmt = select(Bid).where(Bid.auction_id == auction_id).order_by(Bid.timestamp.desc()).limit(5)
-        result = await self.session.execute(stmt)
-        recent_bids = result.scalars().all()
+        """Get detailed auction information with anonymized participant data.
         
-        # Get participant count
-        participant_count = await self._get_participant_count(auction_id)
-        
-        # Check if viewer is participating
-        is_participating = await self._is_participant(auction_id, viewer_user_id)
-        
-        # Get viewer's highest bid
-        viewer_highest_bid = await self._get_user_highest_bid(auction_id, viewer_user_id)
+        Built from the auction's cached snapshot; ``version`` changes only
+        when the auction does, so callers can skip re-rendering.
+        """
+        snapshot = await auction_snapshots.get(auction_id)
+        if not snapshot:
+            return None
+        auction = snapshot.auction
         
         return {
             'auction': auction,
-            'highest_bidder_display': anonymize_username(highest_bidder, viewer_user_id) if highest_bidder else None,
+            'version': snapshot.version,
+            'highest_bidder_display': snapshot.leader.display(viewer_user_id) if snapshot.leader else None,
             'recent_bids': [
                 {
                     'amount': bid.amount,
                     'timestamp': bid.timestamp,
-                    'bidder_display': anonymize_username(
-                        await self.session.get(User, bid.user_id), 
-                        viewer_user_id
-                    )
+                    'bidder_display': bid.display(viewer_user_id)
                 }
-                for bid in recent_bids
+                for bid in snapshot.recent_bids
             ],
-            'participant_count': participant_count,
-            'is_participating': is_participating,
-            'viewer_highest_bid': viewer_highest_bid,
+            'participant_count': snapshot.participant_count,
+            'is_participating': viewer_user_id in snapshot.participants,
+            'viewer_highest_bid': snapshot.top_bids.get(viewer_user_id),
             'time_remaining': format_time_remaining(auction.end_time),
-            'min_next_bid': max(auction.initial_price, auction.current_highest_bid + auction.min_bid_increment)
+            'min_next_bid': max(auction.initial_price, (auction.current_highest_bid or 0) + auction.min_bid_increment)
         }
 
     async def get_user_auctions(self, user_id: int, include_ended: bool = False) -> List[Auction]:
@@ -294,23 +348,111 @@ class AuctionService:
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
-    async def check_expired_auctions(self, bot: Optional[Bot] = None) -> List[Auction]:
-        """Check for expired auctions and end them automatically."""
-        stmt = select(Auction).where(
-            Auction.status == AuctionStatus.ACTIVE,
-            Auction.end_time <= datetime.utcnow()
-        )
+    async def check_expired_auctions(self) -> List[Auction]:
+        """End every expired auction, settling them all in one transaction."""
+        now = datetime.utcnow()
+        ids = (
+            await self.session.scalars(
+                select(Auction.id).where(
+                    Auction.status == AuctionStatus.ACTIVE,
+                    Auction.end_time <= now
+                )
+            )
+        ).all()
+        if not ids:
+            return []
+        
+        # Let bids in flight on these auctions finish before reading them
+        for auction_id in ids:
+            await auction_books.close(self.session, auction_id)
+        stmt = select(Auction).where(Auction.id.in_(ids)).execution_options(populate_existing=True)
+        expired_auctions = []
+        for auction in (await self.session.execute(stmt)).scalars().all():
+            if auction.status == AuctionStatus.ACTIVE and auction.end_time <= now:
+                expired_auctions.append(auction)
+            else:
+                # A late bid extended it meanwhile
+                auction_books.reopen(auction.id)
+        if not expired_auctions:
+            return []
+        
+        await self._settle(expired_auctions)
+        return expired_auctions
+
+    async def _settle(self, auctions: List[Auction]) -> None:
+        """Mark auctions ended and charge their winners in a single commit.
         
-        result = await self.session.execute(stmt)
-        expired_auctions = result.scalars().all()
+        A settlement row is inserted for every auction first: if another
+        run already settled one of them, the insert fails and nothing of
+        this transaction is kept, so no winner is ever charged twice.
+        """
+        now = datetime.utcnow()
+        ids = [auction.id for auction in auctions]
+        winners = {
+            auction.id: auction
+            for auction in auctions
+            if auction.highest_bidder_id and (auction.current_highest_bid or 0) > 0
+        }
+        
+        self.session.add_all([
+            AuctionSettlement(
+                auction_id=auction.id,
+                winner_id=auction.highest_bidder_id if auction.id in winners else None,
+                amount=auction.current_highest_bid if auction.id in winners else 0,
+                settled_at=now,
+            )
+            for auction in auctions
+        ])
+        await self.session.flush()
+        
+        for auction in auctions:
+            auction.status = AuctionStatus.ENDED
+            auction.ended_at = now
+            if auction.id in winners:
+                auction.winner_id = auction.highest_bidder_id
+        
+        if winners:
+            # Deduct the points held by the winning bids
+            captured = await capture_holds(
+                self.session, {aid: auction.winner_id for aid, auction in winners.items()}
+            )
+            for aid, auction in winners.items():
+                if aid in captured:
+                    continue
+                # The winning bid was placed before bids held points
+                amount = auction.current_highest_bid
+                if await self.point_service.get_available_points(auction.winner_id) >= amount:
+                    record_points(self.session, auction.winner_id, -amount, "auction")
+                else:
+                    logger.warning(
+                        f"Auction {aid} winner {auction.winner_id} can't pay {amount} points"
+                    )
+        await release_holds(self.session, *ids)
         
-        ended_auctions = []
-        for auction in expired_auctions:
-            ended_auction = await self.end_auction(auction.id, bot)
-            if ended_auction:
-                ended_auctions.append(ended_auction)
+        # Winning bids stay marked, every other bid on these auctions lost
+        await self.session.execute(
+            update(Bid).where(Bid.auction_id.in_(ids)).values(is_winning=False)
+        )
+        if winners:
+            bids = Bid.__table__
+            await self.session.execute(
+                update(bids)
+                .where(
+                    bids.c.auction_id == bindparam("aid"),
+                    bids.c.user_id == bindparam("uid"),
+                    bids.c.amount == bindparam("amt"),
+                )
+                .values(is_winning=True),
+                [
+                    {"aid": aid, "uid": auction.winner_id, "amt": auction.current_highest_bid}
+                    for aid, auction in winners.items()
+                ],
+            )
         
-        return ended_auctions
+        for aid in ids:
+            auction_snapshots.bump_on_commit(self.session, aid)
+        await self.session.commit()
+        logger.info(f"Settled {len(auctions)} auctions, {len(winners)} with a winner")
 
     # Private helper methods
     async def _get_participant_count(self, auction_id: int) -> int:
@@ -321,24 +463,6 @@ class AuctionService:
         result = await self.session.execute(stmt)
         return result.scalar() or 0
 
-    async def _is_participant(self, auction_id: int, user_id: int) -> bool:
-        """Check if user is participating in auction."""
-        stmt = select(AuctionParticipant).where(
-            AuctionParticipant.auction_id == auction_id,
-            AuctionParticipant.user_id == user_id
-        )
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none() is not None
-
-    async def _ensure_participant(self, auction_id: int, user_id: int):
-        """Ensure user is registered as participant."""
-        if not await self._is_participant(auction_id, user_id):
-            participant = AuctionParticipant(
-                auction_id=auction_id,
-                user_id=user_id
-            )
-            self.session.add(participant)
-
     async def _get_user_highest_bid(self, auction_id: int, user_id: int) -> Optional[int]:
         """Get user's highest bid in an auction."""
         stmt = select(func.max(Bid.amount)).where(
@@ -348,83 +472,6 @@ class AuctionService:
         result = await self.session.execute(stmt)
         return result.scalar()
 
-    async def _update_previous_winning_bid(self, auction_id: int, previous_bidder_id: int):
-        """Mark previous winning bid as no longer winning."""
-        stmt = select(Bid).where(
-            Bid.auction_id == auction_id,
-            Bid.user_id == previous_bidder_id,
-            Bid.is_winning == True
-        )
-        result = await self.session.execute(stmt)
-        previous_bid = result.scalar_one_or_none()
-        
-        if previous_bid:
-            previous_bid.is_winning = False
-
-    async def _notify_participants(self, auction: Auction, new_bidder_id: int, amount: int, bot: Bot):
-        """Notify all participants about a new bid."""
-        stmt = select(AuctionParticipant).where(
-            AuctionParticipant.auction_id == auction.id,
-            AuctionParticipant.user_id != new_bidder_id,
-            AuctionParticipant.notifications_enabled == True
-        )
-        result = await self.session.execute(stmt)
-        participants = result.scalars().all()
-        
-        new_bidder = await self.session.get(User, new_bidder_id)
-        
-        for participant in participants:
-            try:
-                bidder_display = anonymize_username(new_bidder, participant.user_id)
-                time_remaining = format_time_remaining(auction.end_time)
-                
-                message = (
-                    f"🔔 Nueva puja en '{auction.name}'\n"
-                    f"💰 Puja actual: {amount} puntos\n"
-                    f"👤 Pujador: {bidder_display}\n"
-                    f"⏰ Tiempo restante: {time_remaining}\n\n"
-                    f"¡Haz tu puja para no perder la oportunidad!"
-                )
-                
-                await bot.send_message(participant.user_id, message)
-                participant.last_notified_at = datetime.utcnow()
-                
-            except Exception as e:
-                logger.error(f"Failed to notify participant {participant.user_id}: {e}")
-        
-        await self.session.commit()
-
-    async def _notify_auction_ended(self, auction: Auction, bot: Bot):
-        """Notify all participants that auction has ended."""
-        stmt = select(AuctionParticipant).where(
-            AuctionParticipant.auction_id == auction.id
-        )
-        result = await self.session.execute(stmt)
-        participants = result.scalars().all()
-        
-        winner = None
-        if auction.winner_id:
-            winner = await self.session.get(User, auction.winner_id)
-        
-        for participant in participants:
-            try:
-                if participant.user_id == auction.winner_id:
-                    continue  # Winner already notified separately
-                
-                winner_display = anonymize_username(winner, participant.user_id) if winner else "Nadie"
-                
-                message = (
-                    f"🏁 Subasta finalizada: '{auction.name}'\n"
-                    f"🏆 Ganador: {winner_display}\n"
-                    f"💰 Puja ganadora: {auction.current_highest_bid} puntos\n"
-                    f"🎁 Premio: {auction.prize_description}"
-                )
-                
-                await bot.send_message(participant.user_id, message)
-                
-            except Exception as e:
-                logger.error(f"Failed to notify participant {participant.user_id} about auction end: {e}")
-
     async def _notify_auction_cancelled(self, auction: Auction, bot: Bot):
         """Notify all participants that auction was cancelled."""
         stmt = select(AuctionParticipant).where(
@@ -441,7 +488,10 @@ class AuctionService:
                     f"Disculpa las molestias."
                 )
                 
-                await bot.send_message(participant.user_id, message)
+                outbound_dispatcher.submit(
+                    bot.send_message(participant.user_id, message),
+                    priority=PRIORITY_NOTIFICATION,
+                )
                 
             except Exception as e:
                 logger.error(f"Failed to notify participant {participant.user_id} about cancellation: {e}")
\ No newline at end of file
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import logging
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Auction, AuctionParticipant, Bid, User
+from database.setup import after_commit
+from services.auction_book import auction_books
+from utils.cache import AsyncTTLCache
+from utils.text_utils import anonymize_username
+
+logger = logging.getLogger(__name__)
+
+# Number of bids listed on the detail view
+RECENT_BIDS = 5
+
+
+@dataclass(frozen=True)
+class BidView:
+    """A bid with its bidder's name already anonymized."""
+
+    user_id: int
+    amount: int
+    timestamp: datetime | None
+    public_name: str
+    own_name: str
+
+    def display(self, viewer_id: int) -> str:
+        # Bidders see their own full name, everybody else the anonymized one
+        return self.own_name if viewer_id == self.user_id else self.public_name
+
+
+@dataclass(frozen=True)
+class AuctionSnapshot:
+    """Read-only view of an auction at one ``version``.
+
+    ``version`` is a checksum of what the view shows, so it is the same
+    in every bot process and across restarts. ``auction`` is detached from
+    any session and must not be modified.
+    """
+
+    version: int
+    auction: Auction
+    leader: BidView | None
+    recent_bids: tuple[BidView, ...]
+    participants: frozenset[int]
+    top_bids: Mapping[int, int]
+    generation: int = field(default=0, repr=False, compare=False)
+
+    @property
+    def participant_count(self) -> int:
+        return len(self.participants)
+
+
+def _bid_view(
+    user_id: int, amount: int, timestamp: datetime | None, user: User | None
+) -> BidView:
+    return BidView(
+        user_id=user_id,
+        amount=amount,
+        timestamp=timestamp,
+        # Telegram user ids are never 0: this is how any other viewer sees it
+        public_name=anonymize_username(user, 0),
+        own_name=anonymize_username(user, user_id),
+    )
+
+
+class AuctionSnapshots:
+    """Cached ``AuctionSnapshot`` per auction.
+
+    Every committed change to an auction (a bid, its start, end or
+    cancellation) ``bump``s it, dropping its snapshot; the next read
+    rebuilds it with a few queries whose size doesn't grow with the bids. Changes made by other bot processes
+    show up once the snapshot's ``ttl`` runs out.
+    """
+
+    def __init__(self, max_auctions: int = 500, ttl: float = 60):
+        self.ttl = ttl
+        self._cache = AsyncTTLCache(max_auctions, ttl)
+        self._generations: dict[int, int] = {}
+
+    def _generation(self, auction_id: int) -> int:
+        return self._generations.get(auction_id, 0)
+
+    def bump(self, auction_id: int) -> None:
+        self._generations[auction_id] = self._generation(auction_id) + 1
+        self._cache.discard(auction_id)
+
+    def bump_on_commit(self, session: AsyncSession, auction_id: int) -> None:
+        after_commit(session, lambda: self.bump(auction_id))
+
+    async def get(self, auction_id: int) -> AuctionSnapshot | None:
+        """Return the current snapshot of an auction, or ``None`` if it doesn't exist."""
+        snapshot = await self._load(auction_id)
+        if snapshot is not None and snapshot.generation != self._generation(auction_id):
+            # Bumped while it was being built
+            self._cache.discard(auction_id)
+            snapshot = await self._load(auction_id)
+        return snapshot
+
+    async def _load(self, auction_id: int) -> AuctionSnapshot | None:
+        return await self._cache.get_or_load(
+            auction_id,
+            lambda: self._build(auction_id),
+            ttl=lambda snapshot: self.ttl if snapshot else 0,
+        )
+
+    async def _build(self, auction_id: int) -> AuctionSnapshot | None:
+        generation = self._generation(auction_id)
+        session_factory = await auction_books.session_factory()
+        async with session_factory() as session:
+            auction = await session.get(Auction, auction_id)
+            if not auction:
+                return None
+            recent = (
+                await session.execute(
+                    select(Bid, User)
+                    .outerjoin(User, User.id == Bid.user_id)
+                    .where(Bid.auction_id == auction_id)
+                    .order_by(Bid.timestamp.desc(), Bid.id.desc())
+                    .limit(RECENT_BIDS)
+                )
+            ).all()
+            # Every participant with their highest bid, if they bid at all
+            maxima = (
+                select(Bid.user_id, func.max(Bid.amount).label("amount"))
+                .where(Bid.auction_id == auction_id)
+                .group_by(Bid.user_id)
+                .subquery()
+            )
+            participants = (
+                await session.execute(
+                    select(AuctionParticipant.user_id, maxima.c.amount)
+                    .outerjoin(maxima, maxima.c.user_id == AuctionParticipant.user_id)
+                    .where(AuctionParticipant.auction_id == auction_id)
+                )
+            ).all()
+            views = [_bid_view(bid.user_id, bid.amount, bid.timestamp, user) for bid, user in recent]
+            leader = None
+            if auction.highest_bidder_id:
+                leader = next(
+                    (view for view in views if view.user_id == auction.highest_bidder_id), None
+                )
+                if leader is None:
+                    leader = _bid_view(
+                        auction.highest_bidder_id,
+                        auction.current_highest_bid,
+                        None,
+                        await session.get(User, auction.highest_bidder_id),
+                    )
+        top_bids = {user_id: amount for user_id, amount in participants if amount is not None}
+        last_bid = max((bid.id for bid, _ in recent), default=0)
+        version = zlib.crc32(
+            f"{auction.status.value}|{auction.current_highest_bid}|{auction.highest_bidder_id}"
+            f"|{auction.end_time}|{auction.winner_id}|{last_bid}|{len(participants)}".encode()
+        )
+        return AuctionSnapshot(
+            version=version,
+            auction=auction,
+            leader=leader,
+            recent_bids=tuple(views),
+            participants=frozenset(user_id for user_id, _ in participants),
+            top_bids=MappingProxyType(top_bids),
+            generation=generation,
+        )
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+auction_snapshots = AuctionSnapshots()
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database.models import Achievement, Badge, UserAchievement, UserBadge
+from utils.cache import AsyncTTLCache
+
+logger = logging.getLogger(__name__)
+
+# Key in ``Session.info`` holding awards added but not yet committed
+_SESSION_KEY = "rule_awards"
+BADGE = "badge"
+ACHIEVEMENT = "achievement"
+
+
+@dataclass(frozen=True)
+class BadgeRule:
+    id: int
+    name: str
+    icon: str | None
+    condition_type: str
+    condition_value: int
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    id: str
+    name: str
+    reward_text: str
+    condition_type: str
+    condition_value: int
+    bit: int
+
+
+class _RuleIndex:
+    """Rules of one ``condition_type`` sorted by threshold."""
+
+    def __init__(self, rules: list):
+        rules = sorted(rules, key=lambda r: r.condition_value)
+        self.thresholds = [r.condition_value for r in rules]
+        self.rules = rules
+
+    def reached(self, value: int) -> list:
+        """Return the rules whose threshold is ``<= value``."""
+        return self.rules[: bisect_right(self.thresholds, value)]
+
+
+class RuleEngine:
+    """In-memory badge and achievement catalog with per-user award bitmaps.
+
+    The catalog is loaded once and indexed by ``condition_type``; each user's
+    awarded badges (bit = badge id) and achievements (bit = catalog position)
+    are loaded on first use and kept as integers, so a stat change is checked
+    with one bisect and no queries.
+
+    Awards only set their bit once the session granting them commits; until
+    then they are only seen by that session. A catalog or bitmap read from
+    the database while an invalidation or an award happened is used but not
+    kept.
+    """
+
+    def __init__(self, max_users: int = 10000, ttl: float = 3600):
+        self._badges: dict[str, _RuleIndex] | None = None
+        self._achievements: dict[str, _RuleIndex] = {}
+        self._achievement_bits: dict[str, int] = {}
+        self._user_badges = AsyncTTLCache(max_users, ttl)
+        self._user_achievements = AsyncTTLCache(max_users, ttl)
+        # Bumped by ``invalidate`` and by every committed award respectively
+        self._generation = 0
+        self._awarded = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._badges is not None
+
+    def invalidate(self) -> None:
+        """Drop the catalog and bitmaps; they are reloaded on next use."""
+        self._generation += 1
+        self._badges = None
+        self._achievements = {}
+        self._achievement_bits = {}
+        self._user_badges.clear()
+        self._user_achievements.clear()
+
+    async def _load(self, session: AsyncSession) -> None:
+        if self._badges is not None:
+            return
+        async with self._lock:
+            while self._badges is None:
+                generation = self._generation
+                badges = (
+                    await session.execute(select(Badge).where(Badge.is_active == True))
+                ).scalars().all()
+                achievements = (
+                    await session.execute(select(Achievement).order_by(Achievement.id))
+                ).scalars().all()
+                if generation != self._generation:
+                    # Invalidated while loading: read the catalog again
+                    continue
+
+                badge_rules: dict[str, list] = {}
+                for b in badges:
+                    badge_rules.setdefault(b.condition_type, []).append(
+                        BadgeRule(b.id, b.name, b.icon, b.condition_type, b.condition_value)
+                    )
+                ach_rules: dict[str, list] = {}
+                bits: dict[str, int] = {}
+                for bit, a in enumerate(achievements):
+                    bits[a.id] = bit
+                    ach_rules.setdefault(a.condition_type, []).append(
+                        AchievementRule(
+                            a.id, a.name, a.reward_text, a.condition_type, a.condition_value, bit
+                        )
+                    )
+                self._achievements = {k: _RuleIndex(v) for k, v in ach_rules.items()}
+                self._achievement_bits = bits
+                self._badges = {k: _RuleIndex(v) for k, v in badge_rules.items()}
+                logger.info(
+                    "Loaded rule catalog: %s badges, %s achievements",
+                    len(badges),
+                    len(achievements),
+                )
+
+    def _keep_mask(
+        self, cache: AsyncTTLCache, user_id: int, mask: int, seen: tuple[int, int]
+    ) -> None:
+        # Not kept if the catalog changed or an award committed meanwhile
+        if seen == (self._generation, self._awarded):
+            cache.set(user_id, mask)
+
+    async def _badge_mask(self, session: AsyncSession, user_id: int) -> int:
+        mask = self._user_badges.get(user_id)
+        if mask is None:
+            seen = (self._generation, self._awarded)
+            stmt = select(UserBadge.badge_id).where(UserBadge.user_id == user_id)
+            mask = 0
+            for badge_id in (await session.execute(stmt)).scalars():
+                mask |= 1 << badge_id
+            self._keep_mask(self._user_badges, user_id, mask, seen)
+        return mask
+
+    async def _achievement_mask(self, session: AsyncSession, user_id: int) -> int:
+        mask = self._user_achievements.get(user_id)
+        if mask is None:
+            seen = (self._generation, self._awarded)
+            stmt = select(UserAchievement.achievement_id).where(
+                UserAchievement.user_id == user_id
+            )
+            mask = 0
+            for ach_id in (await session.execute(stmt)).scalars():
+                bit = self._achievement_bits.get(ach_id)
+                if bit is not None:
+                    mask |= 1 << bit
+            self._keep_mask(self._user_achievements, user_id, mask, seen)
+        return mask
+
+    async def badge_types(self, session: AsyncSession) -> list[str]:
+        """Return the condition types used by active badges."""
+        await self._load(session)
+        return list(self._badges)
+
+    async def new_badges(
+        self, session: AsyncSession, user_id: int, condition_type: str, value: int
+    ) -> list[BadgeRule]:
+        """Return badges of ``condition_type`` reached by ``value`` and not yet awarded."""
+        await self._load(session)
+        index = self._badges.get(condition_type)
+        if not index:
+            return []
+        reached = index.reached(value)
+        if not reached:
+            return []
+        mask = await self._badge_mask(session, user_id)
+        pending = session.info.get(_SESSION_KEY, ())
+        return [
+            r for r in reached
+            if not mask >> r.id & 1 and (BADGE, user_id, r.id) not in pending
+        ]
+
+    async def new_achievements(
+        self, session: AsyncSession, user_id: int, condition_type: str, value: int
+    ) -> list[AchievementRule]:
+        """Return achievements of ``condition_type`` reached by ``value`` and not yet granted."""
+        await self._load(session)
+        index = self._achievements.get(condition_type)
+        if not index:
+            return []
+        reached = index.reached(value)
+        if not reached:
+            return []
+        mask = await self._achievement_mask(session, user_id)
+        pending = session.info.get(_SESSION_KEY, ())
+        return [
+            r for r in reached
+            if not mask >> r.bit & 1 and (ACHIEVEMENT, user_id, r.id) not in pending
+        ]
+
+    async def has_badge(self, session: AsyncSession, user_id: int, badge_id: int) -> bool:
+        if (BADGE, user_id, badge_id) in session.info.get(_SESSION_KEY, ()):
+            return True
+        return bool(await self._badge_mask(session, user_id) >> badge_id & 1)
+
+    def mark_badge(self, session: AsyncSession, user_id: int, badge_id: int) -> None:
+        """Set the badge's bit once ``session`` commits the ``UserBadge``."""
+        session.info.setdefault(_SESSION_KEY, set()).add((BADGE, user_id, badge_id))
+
+    def mark_achievement(self, session: AsyncSession, user_id: int, achievement_id: str) -> None:
+        """Set the achievement's bit once ``session`` commits the ``UserAchievement``."""
+        session.info.setdefault(_SESSION_KEY, set()).add((ACHIEVEMENT, user_id, achievement_id))
+
+    def _apply(self, kind: str, user_id: int, rule_id) -> None:
+        self._awarded += 1
+        if kind == BADGE:
+            cache, bit = self._user_badges, rule_id
+        else:
+            cache, bit = self._user_achievements, self._achievement_bits.get(rule_id)
+        mask = cache.get(user_id)
+        if mask is not None and bit is not None:
+            cache.set(user_id, mask | 1 << bit)
+
+
+rule_engine = RuleEngine()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_awards(session: Session) -> None:
+    for kind, user_id, rule_id in session.info.pop(_SESSION_KEY, ()):
+        rule_engine._apply(kind, user_id, rule_id)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_rolled_back_awards(session: Session, transaction) -> None:
+    # Committed awards were already popped; anything left was rolled back
+    if transaction.parent is None:
+        session.info.pop(_SESSION_KEY, None)
@@ -3,6 +3,9 @@ from sqlalchemy import select
 from aiogram import Bot
 
 from database.models import Badge, UserBadge, User, UserStats
+from database.setup import after_commit
+from services.badge_rules import rule_engine
+from services.notification_buffer import notify
 import re
 
 class BadgeService:
@@ -13,6 +16,7 @@ class BadgeService:
         badge = Badge(name=name.strip(), description=description.strip(), requirement=requirement.strip(), emoji=emoji)
         self.session.add(badge)
         await self.session.commit()
+        after_commit(self.session, rule_engine.invalidate)
         await self.session.refresh(badge)
         return badge
 
@@ -26,6 +30,7 @@ class BadgeService:
             return False
         await self.session.delete(badge)
         await self.session.commit()
+        after_commit(self.session, rule_engine.invalidate)
         return True
 
     async def grant_badge(self, user_id: int, badge: Badge) -> bool:
@@ -37,6 +42,7 @@ class BadgeService:
         if existing:
             return False
         self.session.add(UserBadge(user_id=user_id, badge_id=badge.id))
+        rule_engine.mark_badge(self.session, user_id, badge.id)
         await self.session.commit()
         return True
 
@@ -62,7 +68,7 @@ class BadgeService:
                 await self.grant_badge(user.id, badge)
                 if bot:
                     text = f"🏅 Has obtenido la insignia {badge.emoji or ''} {badge.name}!"
-                    await bot.send_message(user.id, text)
+                    await notify(bot, user.id, text)
 
     async def update_badge(
         self,
@@ -85,6 +91,7 @@ class BadgeService:
         if emoji is not None:
             badge.emoji = emoji
         await self.session.commit()
+        after_commit(self.session, rule_engine.invalidate)
         return True
 
     async def toggle_badge_status(self, badge_id: int, status: bool) -> bool:
@@ -92,5 +99,6 @@ class BadgeService:
         if badge:
             badge.is_active = status
             await self.session.commit()
+            after_commit(self.session, rule_engine.invalidate)
             return True
         return False
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError
+from sqlalchemy import select, update
+
+from database.models import AuctionParticipant, User
+from services.auction_book import AuctionBook, auction_books
+from services.broadcast_engine import BLOCKED, FAILED, SENT
+from services.outbound_dispatcher import PRIORITY_NOTIFICATION, outbound_priority
+from utils.config import BID_NOTIFY_CONCURRENCY, BID_NOTIFY_WINDOW
+from utils.text_utils import anonymize_username, format_time_remaining
+
+logger = logging.getLogger(__name__)
+
+
+class _Feed:
+    __slots__ = ("bot", "book", "dirty", "task", "last_round", "stats")
+
+    def __init__(self, bot: Bot, book: AuctionBook):
+        self.bot = bot
+        self.book = book
+        self.dirty = False
+        self.task: asyncio.Task | None = None
+        self.last_round = 0.0
+        self.stats = {"bids": 0, "rounds": 0, SENT: 0, FAILED: 0, BLOCKED: 0}
+
+
+class BidNotifier:
+    """Tells auction participants they have been outbid, off the bid path.
+
+    ``publish`` only marks the auction's feed dirty. A background task
+    sends at most one round per auction every ``window`` seconds, with the
+    book's high bid at that moment, so participants get one "outbid"
+    message per window however many bids came in.
+
+    Once its book is closed and no round is pending, a feed is dropped
+    after logging its counters, which are added to ``stats``' totals.
+    """
+
+    def __init__(self, window: float, concurrency: int):
+        self.window = window
+        self._feeds: dict[int, _Feed] = {}
+        self._totals = {"bids": 0, "rounds": 0, SENT: 0, FAILED: 0, BLOCKED: 0}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Set by ``stop``: rounds waiting for their window are sent right away
+        self._stopping = asyncio.Event()
+
+    def publish(self, bot: Bot, book: AuctionBook) -> None:
+        """Queue an outbid notice for a bid committed on ``book``."""
+        self._trim()
+        feed = self._feeds.get(book.auction_id)
+        if feed is None:
+            feed = self._feeds[book.auction_id] = _Feed(bot, book)
+        feed.book = book
+        feed.dirty = True
+        feed.stats["bids"] += 1
+        if feed.task is None:
+            feed.task = asyncio.create_task(self._send_when_due(feed))
+
+    def _trim(self) -> None:
+        """Drop the feeds of closed auctions with no round pending."""
+        for auction_id, feed in list(self._feeds.items()):
+            if feed.book.closed and feed.task is None:
+                del self._feeds[auction_id]
+                logger.info("Bid notices for auction %s: %s", auction_id, feed.stats)
+                for name, count in feed.stats.items():
+                    self._totals[name] += count
+
+    async def _send_when_due(self, feed: _Feed) -> None:
+        try:
+            while feed.dirty:
+                delay = feed.last_round + self.window - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                feed.dirty = False
+                feed.last_round = time.monotonic()
+                await self._send_round(feed)
+        except Exception:
+            logger.exception("Failed to notify bids on auction %s", feed.book.auction_id)
+        finally:
+            feed.task = None
+            if feed.book.closed:
+                self._trim()
+
+    async def _send_round(self, feed: _Feed) -> None:
+        book = feed.book
+        if book.closed or book.high_bidder is None:
+            # The auction ended meanwhile: its end notice says it all
+            return
+        amount, leader_id = book.high_bid, book.high_bidder
+        session_factory = await auction_books.session_factory()
+        async with session_factory() as session:
+            user_ids = (
+                await session.scalars(
+                    select(AuctionParticipant.user_id).where(
+                        AuctionParticipant.auction_id == book.auction_id,
+                        AuctionParticipant.user_id != leader_id,
+                        AuctionParticipant.notifications_enabled == True,
+                    )
+                )
+            ).all()
+            leader = await session.get(User, leader_id)
+        if not user_ids:
+            return
+        # No connection is held while the sends wait on the rate limiter
+        time_remaining = format_time_remaining(book.end_time)
+        outcomes = await asyncio.gather(
+            *(
+                self._deliver(
+                    feed.bot,
+                    user_id,
+                    f"🔔 Te han superado en '{book.name}'\n"
+                    f"💰 Puja actual: {amount} puntos\n"
+                    f"👤 Pujador: {anonymize_username(leader, user_id)}\n"
+                    f"⏰ Tiempo restante: {time_remaining}\n\n"
+                    f"¡Haz tu puja para no perder la oportunidad!",
+                )
+                for user_id in user_ids
+            )
+        )
+        notified = [user_id for user_id, outcome in zip(user_ids, outcomes) if outcome == SENT]
+        if notified:
+            async with session_factory() as session:
+                await session.execute(
+                    update(AuctionParticipant)
+                    .where(
+                        AuctionParticipant.auction_id == book.auction_id,
+                        AuctionParticipant.user_id.in_(notified),
+                    )
+                    .values(last_notified_at=datetime.utcnow())
+                )
+                await session.commit()
+        feed.stats["rounds"] += 1
+        for outcome in outcomes:
+            feed.stats[outcome] += 1
+
+    async def _deliver(self, bot: Bot, user_id: int, text: str) -> str:
+        async with self._semaphore:
+            try:
+                with outbound_priority(PRIORITY_NOTIFICATION):
+                    await bot.send_message(user_id, text)
+                return SENT
+            except TelegramForbiddenError:
+                return BLOCKED
+            except Exception as e:
+                logger.warning("Failed to notify participant %s: %s", user_id, e)
+                return FAILED
+
+    async def stop(self) -> None:
+        """Send the rounds still waiting for their window, then stop.
+
+        Rounds already being sent are left to finish, not restarted, so
+        nobody gets the same notice twice.
+        """
+        self._stopping.set()
+        tasks = [feed.task for feed in self._feeds.values() if feed.task is not None]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def auction_stats(self, auction_id: int) -> dict | None:
+        """Delivery counters of one auction, or ``None`` if it has no feed."""
+        feed = self._feeds.get(auction_id)
+        return dict(feed.stats) if feed else None
+
+    def stats(self) -> dict:
+        """Counters summed over every feed, current and dropped."""
+        self._trim()
+        totals = dict(self._totals)
+        for feed in self._feeds.values():
+            for name, count in feed.stats.items():
+                totals[name] += count
+        totals["feeds"] = len(self._feeds)
+        return totals
+
+
+bid_notifier = BidNotifier(BID_NOTIFY_WINDOW, BID_NOTIFY_CONCURRENCY)
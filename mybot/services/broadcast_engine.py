@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+from abc import ABC, abstractmethod
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.models import BroadcastRun, User
+from utils.config import BROADCAST_CHUNK_SIZE, BROADCAST_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+SENT = "sent"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+
+class BroadcastJob(ABC):
+    """A message (or other per-user action) delivered to a set of users.
+
+    ``query`` selects the target users, ``deliver`` talks to Telegram for one
+    of them (raising on failure) and ``apply`` records the outcome on the
+    user row. ``deliver`` gets a detached ``User``; ``apply`` runs serially
+    inside the transaction that commits the chunk, on the row selected
+    again by ``query`` and locked, and is skipped for users the query no
+    longer matches (e.g. a VIP who renewed while the chunk was sending).
+    """
+
+    name: str
+
+    @abstractmethod
+    def query(self, now: datetime.datetime) -> Select:
+        ...
+
+    @abstractmethod
+    async def deliver(self, bot: Bot, user: User) -> None:
+        ...
+
+    def apply(self, user: User, outcome: str, now: datetime.datetime) -> None:
+        pass
+
+
+class BroadcastEngine:
+    """Run ``BroadcastJob``s in checkpointed, concurrently delivered chunks.
+
+    Users are walked in id order, ``chunk_size`` at a time. Deliveries in a
+    chunk run with at most ``concurrency`` in flight (sends still pass the
+    outbound rate limiter) with no session open; then every outcome, the
+    run's counters and its cursor are committed together in a short
+    transaction. A run interrupted by a crash is picked up
+    by the next ``run`` of the same job after the last committed user.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        chunk_size: int = BROADCAST_CHUNK_SIZE,
+        concurrency: int = BROADCAST_CONCURRENCY,
+    ):
+        self.bot = bot
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _start_run(self, job: BroadcastJob) -> int:
+        async with self.session_factory() as session:
+            stmt = (
+                select(BroadcastRun)
+                .where(BroadcastRun.job == job.name, BroadcastRun.status == "running")
+                .order_by(BroadcastRun.id.desc())
+                .limit(1)
+            )
+            run = (await session.execute(stmt)).scalar_one_or_none()
+            if run:
+                logger.info(
+                    "Resuming broadcast %s (run %s) after user %s", job.name, run.id, run.cursor
+                )
+                return run.id
+            run = BroadcastRun(job=job.name, reference_time=datetime.datetime.utcnow())
+            session.add(run)
+            await session.commit()
+            return run.id
+
+    async def _deliver(self, job: BroadcastJob, user: User) -> str:
+        async with self._semaphore:
+            try:
+                await job.deliver(self.bot, user)
+                return SENT
+            except TelegramForbiddenError:
+                return BLOCKED
+            except Exception as e:
+                logger.warning("Broadcast %s failed for user %s: %s", job.name, user.id, e)
+                return FAILED
+
+    async def run(self, job: BroadcastJob) -> BroadcastRun:
+        """Run ``job`` to completion and return its report row."""
+        run_id = await self._start_run(job)
+        while True:
+            async with self.session_factory() as session:
+                run = await session.get(BroadcastRun, run_id)
+                stmt = job.query(run.reference_time)
+                if run.cursor is not None:
+                    stmt = stmt.where(User.id > run.cursor)
+                stmt = stmt.order_by(User.id).limit(self.chunk_size)
+                users = (await session.execute(stmt)).scalars().all()
+                if not users:
+                    run.status = "finished"
+                    run.finished_at = datetime.datetime.utcnow()
+                    await session.commit()
+                    break
+            # No connection or transaction is held while the sends wait
+            outcomes = await asyncio.gather(*(self._deliver(job, u) for u in users))
+            async with self.session_factory() as session:
+                run = await session.get(BroadcastRun, run_id)
+                stmt = (
+                    job.query(run.reference_time)
+                    .where(User.id.in_([u.id for u in users]))
+                    .with_for_update()
+                )
+                rows = {user.id: user for user in (await session.scalars(stmt)).all()}
+                for user, outcome in zip(users, outcomes):
+                    if user.id in rows:
+                        job.apply(rows[user.id], outcome, run.reference_time)
+                    setattr(run, outcome, (getattr(run, outcome) or 0) + 1)
+                run.cursor = users[-1].id
+                await session.commit()
+        logger.info(
+            "Broadcast %s (run %s) finished: sent=%s failed=%s blocked=%s",
+            job.name,
+            run.id,
+            run.sent,
+            run.failed,
+            run.blocked,
+        )
+        return run
@@ -1,16 +1,70 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
+from types import MappingProxyType
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import Union
+from typing import Mapping, Union
 
 from database.models import Channel
+from database.setup import after_commit
 from utils.text_utils import sanitize_text
 from utils.config import DEFAULT_REACTION_BUTTONS
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_REACTION_POINTS = 0.5
+
+
+@dataclass(frozen=True)
+class ReactionProfile:
+    """Reaction buttons of a channel and the points each one is worth."""
+
+    reactions: tuple[str, ...]
+    points: Mapping[str, float]
+
+    def points_for(self, reaction: str) -> float:
+        return self.points.get(reaction, 0.0)
+
+
+def _compile_profile(channel: Channel | None) -> ReactionProfile:
+    reactions: list[str] = []
+    configured_points: dict[str, float] = {}
+    if channel:
+        if channel.reactions and isinstance(channel.reactions, list):
+            reactions = [r for r in channel.reactions if isinstance(r, str)][:10]
+        if channel.reaction_points and isinstance(channel.reaction_points, dict):
+            configured_points = {
+                k: float(v)
+                for k, v in channel.reaction_points.items()
+                if isinstance(v, (int, float))
+            }
+    if not reactions:
+        reactions = DEFAULT_REACTION_BUTTONS
+    points = {
+        emoji: configured_points.get(emoji, DEFAULT_REACTION_POINTS) for emoji in reactions
+    }
+    return ReactionProfile(tuple(reactions), MappingProxyType(points))
+
+
+DEFAULT_REACTION_PROFILE = _compile_profile(None)
+
+# Compiled profiles by channel id, dropped when the channel is written
+_PROFILE_CACHE: dict[int, ReactionProfile] = {}
+# Bumped on every invalidation so a load racing with a write is discarded
+_PROFILE_GENERATION = 0
+
+
+def invalidate_reaction_profile(chat_id: int | None = None) -> None:
+    """Forget the cached profile of ``chat_id`` (of every channel if ``None``)."""
+    global _PROFILE_GENERATION
+    _PROFILE_GENERATION += 1
+    if chat_id is None:
+        _PROFILE_CACHE.clear()
+    else:
+        _PROFILE_CACHE.pop(chat_id, None)
+
 
 class ChannelService:
     def __init__(self, session: AsyncSession):
@@ -26,6 +80,7 @@ class ChannelService:
             channel = Channel(id=chat_id, title=clean_title)
             self.session.add(channel)
         await self.session.commit()
+        self._invalidate_on_commit(chat_id)
         await self.session.refresh(channel)
         return channel
 
@@ -38,6 +93,7 @@ class ChannelService:
         if channel:
             await self.session.delete(channel)
             await self.session.commit()
+            self._invalidate_on_commit(chat_id)
 
     async def set_reactions(
         self,
@@ -75,6 +131,7 @@ class ChannelService:
             self.session.add(new_channel)
 
         await self.session.commit()
+        self._invalidate_on_commit(channel_id_int)
         await self.session.refresh(channel or new_channel)
         logger.info(
             "Reacciones actualizadas para el canal %s: %s, Puntos: %s",
@@ -84,55 +141,36 @@ class ChannelService:
         )
         return channel or new_channel
 
-    async def get_reactions_and_points(
-        self, chat_id: Union[int, str]
-    ) -> tuple[list[str], dict[str, float]]:
-        """Return configured reactions and points for a channel."""
+    def _invalidate_on_commit(self, chat_id: int) -> None:
+        # Inside a unit of work the write is only visible after the real commit
+        after_commit(self.session, lambda: invalidate_reaction_profile(chat_id))
+
+    async def get_reaction_profile(self, chat_id: Union[int, str]) -> ReactionProfile:
+        """Return the cached reaction profile of a channel."""
         try:
             channel_id_int = int(chat_id)
         except ValueError:
             logger.error(
                 "Invalid chat_id '%s' provided, cannot convert to int.", chat_id
             )
-            return DEFAULT_REACTION_BUTTONS, {
-                r: 0.5 for r in DEFAULT_REACTION_BUTTONS
-            }
-
-        channel = await self.session.get(Channel, channel_id_int)
+            return DEFAULT_REACTION_PROFILE
 
-        configured_reactions: list[str] = []
-        configured_points: dict[str, float] = {}
+        profile = _PROFILE_CACHE.get(channel_id_int)
+        if profile is None:
+            generation = _PROFILE_GENERATION
+            channel = await self.session.get(Channel, channel_id_int)
+            profile = _compile_profile(channel)
+            if generation == _PROFILE_GENERATION:
+                _PROFILE_CACHE[channel_id_int] = profile
+        return profile
 
-        if channel:
-            if channel.reactions and isinstance(channel.reactions, list):
-                configured_reactions = [
-                    r for r in channel.reactions if isinstance(r, str)
-                ][:10]
-
-            if channel.reaction_points and isinstance(channel.reaction_points, dict):
-                configured_points = {
-                    k: float(v)
-                    for k, v in channel.reaction_points.items()
-                    if isinstance(v, (int, float))
-                }
-
-        if not configured_reactions:
-            configured_reactions = DEFAULT_REACTION_BUTTONS
-
-        final_points = {
-            emoji: configured_points.get(emoji, 0.5)
-            for emoji in configured_reactions
-        }
-
-        logger.debug(
-            "Reacciones y puntos obtenidos para canal %s: Reacciones=%s, Puntos=%s",
-            chat_id,
-            configured_reactions,
-            final_points,
-        )
-        return configured_reactions, final_points
+    async def get_reactions_and_points(
+        self, chat_id: Union[int, str]
+    ) -> tuple[list[str], dict[str, float]]:
+        """Return configured reactions and points for a channel."""
+        profile = await self.get_reaction_profile(chat_id)
+        return list(profile.reactions), dict(profile.points)
 
     async def get_reaction_points(self, chat_id: int) -> dict[str, float]:
         """Return only reaction points for a channel."""
-        _, points = await self.get_reactions_and_points(chat_id)
-        return points
+        return dict((await self.get_reaction_profile(chat_id)).points)
@@ -1,10 +1,127 @@
 from __future__ import annotations
 
+import logging
+from typing import Any, Callable
+
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.models import ConfigEntry
+from database.models import ConfigEntry, ConfigVersion
+from database.setup import after_commit
 from utils.text_utils import sanitize_text
 
+logger = logging.getLogger(__name__)
+
+ConfigListener = Callable[[str, "str | None"], None]
+
+# Process-wide copy of ``config_entries``: loaded by the first read and
+# kept current by ``set_value``, which also notifies subscribers. Parsed
+# values (ids, lists) are memoized per (key, parser) alongside it.
+_SNAPSHOT: dict[str, str] | None = None
+_PARSED: dict[tuple[str, Callable], Any] = {}
+# Bumped on every change so a load racing with a write is discarded
+_GENERATION = 0
+# ``config_version`` row value the snapshot is known to reflect
+_SYNCED_VERSION: int | None = None
+_SUBSCRIBERS: dict[str, list[ConfigListener]] = {}
+# ``session.info`` key of values written but not yet committed, so a unit
+# of work reads its own writes
+_PENDING = "config_pending"
+
+
+def subscribe_config(key: str, listener: ConfigListener) -> Callable[[], None]:
+    """Call ``listener(key, value)`` after every committed change of ``key``.
+
+    Returns a function that removes the subscription.
+    """
+    listeners = _SUBSCRIBERS.setdefault(key, [])
+    listeners.append(listener)
+    return lambda: listeners.remove(listener) if listener in listeners else None
+
+
+def invalidate_config_snapshot() -> None:
+    """Drop the snapshot so the next read reloads it (e.g. after direct SQL)."""
+    global _SNAPSHOT, _GENERATION
+    _SNAPSHOT = None
+    _PARSED.clear()
+    _GENERATION += 1
+
+
+async def sync_config_version(session: AsyncSession) -> bool:
+    """Reload the snapshot if another process changed the config.
+
+    Subscribers of the keys that changed are notified. Returns ``True`` if
+    the snapshot was reloaded.
+    """
+    global _SYNCED_VERSION
+    version = await session.scalar(
+        select(ConfigVersion.version).where(ConfigVersion.id == 1)
+    ) or 0
+    if version == _SYNCED_VERSION:
+        return False
+    old = _SNAPSHOT
+    invalidate_config_snapshot()
+    _SYNCED_VERSION = version
+    new = await ConfigService(session)._snapshot()
+    for key in (old.keys() | new.keys()) if old is not None else ():
+        if old.get(key) != new.get(key):
+            _publish(key, new.get(key))
+    return True
+
+
+async def warm_config_cache(session: AsyncSession) -> None:
+    """Load the snapshot and parse the hot typed values ahead of the first update."""
+    await sync_config_version(session)
+    config = ConfigService(session)
+    await config.get_vip_channel_id()
+    await config.get_free_channel_id()
+    await config.get_reaction_buttons()
+    await config.get_reaction_points()
+    await config.get_vip_reactions()
+
+
+def _parse_int(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_reaction_buttons(value: str | None) -> tuple[str, ...]:
+    texts = [t.strip() for t in value.split(";") if t.strip()] if value else []
+    return tuple(texts[:10])
+
+
+def _parse_vip_reactions(value: str | None) -> tuple[str, ...]:
+    emojis = [e.strip() for e in value.split(";") if e.strip()] if value else []
+    return tuple(emojis[:5])
+
+
+def _parse_reaction_points(value: str | None) -> tuple[float, ...] | None:
+    if not value:
+        return None
+    try:
+        return tuple(float(p) for p in value.split(";") if p.strip())[:10]
+    except ValueError:
+        return None
+
+
+def _publish(key: str, value: str | None) -> None:
+    global _GENERATION
+    _GENERATION += 1
+    for memo_key in [k for k in _PARSED if k[0] == key]:
+        del _PARSED[memo_key]
+    if _SNAPSHOT is not None:
+        if value is None:
+            _SNAPSHOT.pop(key, None)
+        else:
+            _SNAPSHOT[key] = value
+    for listener in list(_SUBSCRIBERS.get(key, ())):
+        try:
+            listener(key, value)
+        except Exception:
+            logger.exception("Config listener for %s failed", key)
+
 
 class ConfigService:
     VIP_CHANNEL_KEY = "VIP_CHANNEL_ID"
@@ -16,9 +133,46 @@ class ConfigService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    async def _snapshot(self) -> dict[str, str]:
+        global _SNAPSHOT
+        snapshot = _SNAPSHOT
+        if snapshot is None:
+            generation = _GENERATION
+            rows = await self.session.execute(select(ConfigEntry.key, ConfigEntry.value))
+            snapshot = {key: value for key, value in rows if value is not None}
+            if generation == _GENERATION:
+                _SNAPSHOT = snapshot
+        return snapshot
+
     async def get_value(self, key: str) -> str | None:
-        entry = await self.session.get(ConfigEntry, key)
-        return entry.value if entry else None
+        pending = self.session.info.get(_PENDING)
+        if pending and key in pending:
+            return pending[key]
+        return (await self._snapshot()).get(key)
+
+    async def _get_parsed(self, key: str, parse: Callable[[str | None], Any]) -> Any:
+        pending = self.session.info.get(_PENDING)
+        if pending and key in pending:
+            return parse(pending[key])
+        memo_key = (key, parse)
+        if memo_key in _PARSED:
+            return _PARSED[memo_key]
+        generation = _GENERATION
+        parsed = parse(await self.get_value(key))
+        if generation == _GENERATION:
+            _PARSED[memo_key] = parsed
+        return parsed
+
+    async def _bump_version(self) -> int:
+        # The row is seeded by ``init_db``
+        await self.session.execute(
+            update(ConfigVersion)
+            .where(ConfigVersion.id == 1)
+            .values(version=ConfigVersion.version + 1)
+        )
+        return await self.session.scalar(
+            select(ConfigVersion.version).where(ConfigVersion.id == 1)
+        )
 
     async def set_value(self, key: str, value: str) -> ConfigEntry:
         """Store a configuration value, sanitizing text to avoid encoding issues."""
@@ -29,40 +183,43 @@ class ConfigService:
         else:
             entry = ConfigEntry(key=key, value=clean_value)
             self.session.add(entry)
+        pending = self.session.info.setdefault(_PENDING, {})
+        pending[key] = clean_value
+        version = await self._bump_version()
         await self.session.commit()
+
+        def committed() -> None:
+            global _SYNCED_VERSION
+            pending.pop(key, None)
+            _publish(key, clean_value)
+            # Only our own write happened since the last sync
+            if _SYNCED_VERSION is not None and version == _SYNCED_VERSION + 1:
+                _SYNCED_VERSION = version
+
+        after_commit(self.session, committed)
         await self.session.refresh(entry)
         return entry
 
     async def get_vip_channel_id(self) -> int | None:
-        value = await self.get_value(self.VIP_CHANNEL_KEY)
-        try:
-            return int(value) if value is not None else None
-        except (TypeError, ValueError):
-            return None
+        return await self._get_parsed(self.VIP_CHANNEL_KEY, _parse_int)
 
     async def set_vip_channel_id(self, chat_id: int) -> ConfigEntry:
         return await self.set_value(self.VIP_CHANNEL_KEY, str(chat_id))
 
     async def get_free_channel_id(self) -> int | None:
-        value = await self.get_value(self.FREE_CHANNEL_KEY)
-        try:
-            return int(value) if value is not None else None
-        except (TypeError, ValueError):
-            return None
+        return await self._get_parsed(self.FREE_CHANNEL_KEY, _parse_int)
 
     async def set_free_channel_id(self, chat_id: int) -> ConfigEntry:
         return await self.set_value(self.FREE_CHANNEL_KEY, str(chat_id))
 
     async def get_reaction_buttons(self) -> list[str]:
         """Return custom reaction button texts or defaults."""
-        value = await self.get_value(self.REACTION_BUTTONS_KEY)
-        if value:
-            texts = [t.strip() for t in value.split(";") if t.strip()]
-            if texts:
-                return texts[:10]
+        texts = await self._get_parsed(self.REACTION_BUTTONS_KEY, _parse_reaction_buttons)
+        if texts:
+            return list(texts)
         from utils.config import DEFAULT_REACTION_BUTTONS
 
-        return DEFAULT_REACTION_BUTTONS
+        return list(DEFAULT_REACTION_BUTTONS)
 
     async def set_reaction_buttons(self, buttons: list[str]) -> ConfigEntry:
         """Store custom reaction button texts."""
@@ -70,11 +227,7 @@ class ConfigService:
 
     async def get_vip_reactions(self) -> list[str]:
         """Return the list of default VIP message reactions."""
-        value = await self.get_value(self.VIP_REACTIONS_KEY)
-        if value:
-            emojis = [e.strip() for e in value.split(";") if e.strip()]
-            return emojis[:5]
-        return []
+        return list(await self._get_parsed(self.VIP_REACTIONS_KEY, _parse_vip_reactions))
 
     async def set_vip_reactions(self, reactions: list[str]) -> ConfigEntry:
         """Store the default VIP message reactions as a semicolon string."""
@@ -82,13 +235,9 @@ class ConfigService:
 
     async def get_reaction_points(self) -> list[float]:
         """Return configured points for each reaction button."""
-        value = await self.get_value(self.REACTION_POINTS_KEY)
-        if value:
-            try:
-                points = [float(p) for p in value.split(";") if p.strip()]
-                return points[:10]
-            except ValueError:
-                pass
+        points = await self._get_parsed(self.REACTION_POINTS_KEY, _parse_reaction_points)
+        if points is not None:
+            return list(points)
         # Default: 0.5 points for each configured reaction button
         buttons = await self.get_reaction_buttons()
         return [0.5] * len(buttons)
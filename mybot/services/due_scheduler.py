@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.setup import after_commit
+from utils.config import SCHEDULER_MAX_IDLE, SCHEDULER_RETRY_DELAY
+
+logger = logging.getLogger(__name__)
+
+# Job names, shared with the services that schedule them on writes
+AUCTIONS_JOB = "auctions"
+CHANNEL_REQUESTS_JOB = "channel_requests"
+VIP_SUBSCRIPTIONS_JOB = "vip_subscriptions"
+VIP_MEMBERSHIP_JOB = "vip_membership"
+FREE_CHANNEL_CLEANUP_JOB = "free_channel_cleanup"
+CONFIG_SYNC_JOB = "config_sync"
+
+JobRunner = Callable[[Bot, async_sessionmaker[AsyncSession]], Awaitable[None]]
+NextDue = Callable[[AsyncSession], Awaitable[datetime | None]]
+
+
+def _epoch(when: datetime) -> float:
+    # Database timestamps are naive UTC
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+def _utc(ts: float | None) -> datetime | None:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    run: JobRunner
+    next_due: NextDue | None
+    max_idle: float | None
+    next_run: float | None = None
+    last_run: float | None = None
+    last_duration: float | None = None
+    last_error: str | None = None
+    runs: int = 0
+    running: bool = False
+    rerun: bool = field(default=False, repr=False)
+
+
+class DueScheduler:
+    """Single timer that runs each job when its next item is due.
+
+    Jobs are kept in a heap by due time. After every run a job's
+    ``next_due`` reads the earliest pending item from the database (the
+    next auction end, VIP expiry, ...), and services call ``schedule``
+    when a write makes something due earlier. Every job still runs at
+    least once per ``max_idle`` seconds in case a write went unseen, and
+    items a run left behind (a failed approval, say) are retried after
+    ``SCHEDULER_RETRY_DELAY`` seconds rather than in a tight loop.
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self._bot: Bot | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+
+    def register(
+        self,
+        name: str,
+        run: JobRunner,
+        *,
+        next_due: NextDue | None = None,
+        max_idle: float | None = SCHEDULER_MAX_IDLE,
+    ) -> None:
+        """Add a job; with ``max_idle=None`` only ``next_due`` decides when it runs."""
+        self._jobs[name] = ScheduledJob(name, run, next_due, max_idle)
+
+    def schedule(self, name: str, when: datetime | None = None) -> None:
+        """Make sure job ``name`` runs no later than ``when`` (UTC, default now)."""
+        job = self._jobs.get(name)
+        if job is None:
+            return
+        ts = time.time() if when is None else _epoch(when)
+        if job.next_run is not None and job.next_run <= ts:
+            return
+        self._set_next_run(job, ts)
+
+    def reschedule(self, name: str, when: datetime) -> None:
+        """Move job ``name``'s next run to ``when``, later or earlier."""
+        job = self._jobs.get(name)
+        if job is not None and not job.running:
+            self._set_next_run(job, _epoch(when))
+
+    def _set_next_run(self, job: ScheduledJob, ts: float) -> None:
+        job.next_run = ts
+        heapq.heappush(self._heap, (ts, next(self._seq), job.name))
+        self._wake.set()
+
+    def schedule_on_commit(
+        self, session: AsyncSession, name: str, when: datetime | None = None
+    ) -> None:
+        """Like ``schedule``, but only once the writes on ``session`` are committed."""
+        after_commit(session, lambda: self.schedule(name, when))
+
+    async def start(
+        self, bot: Bot, session_factory: async_sessionmaker[AsyncSession]
+    ) -> None:
+        """Load every job's next due time from the database and start the timer."""
+        self._bot = bot
+        self._session_factory = session_factory
+        for job in self._jobs.values():
+            await self._plan(job)
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    def jobs(self) -> list[dict]:
+        """Registry snapshot: last and next run (naive UTC) for every job."""
+        return [
+            {
+                "name": job.name,
+                "next_run": _utc(job.next_run),
+                "last_run": _utc(job.last_run),
+                "last_duration": job.last_duration,
+                "runs": job.runs,
+                "running": job.running,
+                "last_error": job.last_error,
+            }
+            for job in self._jobs.values()
+        ]
+
+    async def _plan(self, job: ScheduledJob, *, after_run: bool = False) -> None:
+        now = time.time()
+        ceiling = now + job.max_idle if job.max_idle is not None else None
+        due = None
+        if job.next_due is not None:
+            try:
+                async with self._session_factory() as session:
+                    due = await job.next_due(session)
+            except Exception:
+                logger.exception("Error computing next run of %s", job.name)
+        candidates = [t for t in (ceiling, _epoch(due) if due else None) if t is not None]
+        if not candidates:
+            # next_due failed and there is no ceiling: try again later
+            candidates = [now + SCHEDULER_RETRY_DELAY]
+        ts = min(candidates)
+        if after_run and ts <= now:
+            # The run left this item due: don't spin on it
+            ts = now + SCHEDULER_RETRY_DELAY
+        self.schedule(job.name, _utc(ts))
+
+    async def _sleep(self, timeout: float | None) -> None:
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _loop(self) -> None:
+        while True:
+            # Drop entries superseded by an earlier ``schedule`` call
+            while self._heap and self._jobs[self._heap[0][2]].next_run != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                await self._sleep(None)
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                await self._sleep(delay)
+                continue
+            _, _, name = heapq.heappop(self._heap)
+            job = self._jobs[name]
+            job.next_run = None
+            if job.running:
+                # Due again while still running: go once more right after
+                job.rerun = True
+                continue
+            task = asyncio.create_task(self._run(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, job: ScheduledJob) -> None:
+        job.running = True
+        started = time.time()
+        try:
+            await job.run(self._bot, self._session_factory)
+            job.last_error = None
+        except Exception as e:
+            job.last_error = str(e)
+            logger.exception("Scheduled job %s failed", job.name)
+        finally:
+            job.running = False
+            job.runs += 1
+            job.last_run = started
+            job.last_duration = time.time() - started
+        if job.rerun:
+            job.rerun = False
+            self.schedule(job.name)
+        else:
+            await self._plan(job, after_run=True)
+
+
+due_scheduler = DueScheduler()
@@ -4,6 +4,19 @@ import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from database.models import Event
+from database.setup import after_commit
+
+# Process-wide (multiplier, valid_until) for the active events; ``valid_until``
+# is the next scheduled start or end, after which the product is recomputed
+_MULTIPLIER_CACHE: tuple[int, datetime.datetime | None] | None = None
+# Bumped on every invalidation so a load racing with a write is discarded
+_MULTIPLIER_GENERATION = 0
+
+
+def invalidate_multiplier_cache() -> None:
+    global _MULTIPLIER_CACHE, _MULTIPLIER_GENERATION
+    _MULTIPLIER_GENERATION += 1
+    _MULTIPLIER_CACHE = None
 
 
 class EventService:
@@ -20,6 +33,7 @@ class EventService:
         )
         self.session.add(event)
         await self.session.commit()
+        after_commit(self.session, invalidate_multiplier_cache)
         await self.session.refresh(event)
         return event
 
@@ -39,15 +53,42 @@ class EventService:
             event.is_active = False
             event.end_time = datetime.datetime.utcnow()
             await self.session.commit()
+            after_commit(self.session, invalidate_multiplier_cache)
             await self.session.refresh(event)
         return event
 
-    async def get_multiplier(self) -> int:
-        events = await self.list_active_events()
+    async def _compute_multiplier(self) -> tuple[int, datetime.datetime | None]:
+        now = datetime.datetime.utcnow()
+        stmt = select(Event.multiplier, Event.start_time, Event.end_time).where(
+            Event.is_active == True
+        )
         mult = 1
-        for ev in events:
-            try:
-                mult *= int(ev.multiplier)
-            except Exception:
-                pass
-        return mult
+        valid_until = None
+        for multiplier, start_time, end_time in (await self.session.execute(stmt)).all():
+            if start_time is not None and start_time > now:
+                boundary = start_time
+            elif end_time is not None and end_time <= now:
+                continue
+            else:
+                boundary = end_time
+                try:
+                    mult *= int(multiplier)
+                except Exception:
+                    pass
+            if boundary is not None and (valid_until is None or boundary < valid_until):
+                valid_until = boundary
+        return mult, valid_until
+
+    async def get_multiplier(self) -> int:
+        """Return the product of the multipliers of the events running now."""
+        global _MULTIPLIER_CACHE
+        cached = _MULTIPLIER_CACHE
+        if cached is not None and (
+            cached[1] is None or datetime.datetime.utcnow() < cached[1]
+        ):
+            return cached[0]
+        generation = _MULTIPLIER_GENERATION
+        computed = await self._compute_multiplier()
+        if generation == _MULTIPLIER_GENERATION:
+            _MULTIPLIER_CACHE = computed
+        return computed[0]
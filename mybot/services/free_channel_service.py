@@ -24,6 +24,7 @@ from sqlalchemy import select, func
 from database.models import PendingChannelRequest, User, BotConfig
 from services.config_service import ConfigService
 from services.message_registry import store_message
+from services.due_scheduler import CHANNEL_REQUESTS_JOB, due_scheduler
 from utils.text_utils import sanitize_text
 
 logger = logging.getLogger(__name__)
@@ -69,6 +70,8 @@ class FreeChannelService:
                 config.free_channel_wait_time_minutes = minutes
             
             await self.session.commit()
+            # Pending requests may be due under the new wait time
+            due_scheduler.schedule_on_commit(self.session, CHANNEL_REQUESTS_JOB)
             logger.info(f"Wait time set to {minutes} minutes")
             return True
         except Exception as e:
@@ -113,6 +116,11 @@ class FreeChannelService:
             
             # Notificar al usuario sobre el tiempo de espera
             wait_minutes = await self.get_wait_time_minutes()
+            due_scheduler.schedule_on_commit(
+                self.session,
+                CHANNEL_REQUESTS_JOB,
+                pending_request.request_timestamp + timedelta(minutes=wait_minutes),
+            )
             
             if wait_minutes > 0:
                 wait_text = f"{wait_minutes} minutos"
@@ -1,9 +1,14 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from aiogram import Bot
 
 from database.models import User, Level, LorePiece, UserLorePiece
+from database.setup import after_commit
 from utils.messages import BOT_MESSAGES
+from services.notification_buffer import notify
 import logging
 
 logger = logging.getLogger(__name__)
@@ -46,6 +51,52 @@ LEVELS = [
     (10, 5000),
 ]
 
+
+@dataclass(frozen=True)
+class _LevelTable:
+    """Levels as parallel arrays sorted by ``min_points``."""
+
+    thresholds: list[int]
+    ids: list[int]
+    levels: list[Level]
+    by_id: dict[int, Level]
+
+    @classmethod
+    def build(cls, levels: list[Level]) -> "_LevelTable":
+        # Detached copies so cached levels never touch a closed session
+        copies = [
+            Level(
+                level_id=lvl.level_id,
+                name=lvl.name,
+                min_points=lvl.min_points,
+                reward=lvl.reward,
+                unlocks_lore_piece_code=lvl.unlocks_lore_piece_code,
+            )
+            for lvl in sorted(levels, key=lambda lvl: lvl.min_points)
+        ]
+        return cls(
+            thresholds=[lvl.min_points for lvl in copies],
+            ids=[lvl.level_id for lvl in copies],
+            levels=copies,
+            by_id={lvl.level_id: lvl for lvl in copies},
+        )
+
+    def index_for(self, points: float) -> int:
+        return max(bisect_right(self.thresholds, points) - 1, 0)
+
+
+# Process-wide level table, rebuilt after any level is created, updated or deleted
+_LEVEL_TABLE: _LevelTable | None = None
+# Bumped on every invalidation so a load racing with a write is discarded
+_LEVEL_GENERATION = 0
+
+
+def invalidate_level_table() -> None:
+    global _LEVEL_TABLE, _LEVEL_GENERATION
+    _LEVEL_GENERATION += 1
+    _LEVEL_TABLE = None
+
+
 class LevelService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -58,10 +109,24 @@ class LevelService:
             self.session.add(Level(level_id=level_id, name=name, min_points=min_points, reward=reward))
         await self.session.commit()
 
+    async def _get_table(self) -> _LevelTable:
+        global _LEVEL_TABLE
+        table = _LEVEL_TABLE
+        if table is None:
+            generation = _LEVEL_GENERATION
+            await self._init_levels()
+            result = await self.session.execute(select(Level).order_by(Level.min_points))
+            table = _LevelTable.build(result.scalars().all())
+            if generation == _LEVEL_GENERATION:
+                _LEVEL_TABLE = table
+        return table
+
     async def _get_levels(self) -> list[Level]:
-        await self._init_levels()
-        result = await self.session.execute(select(Level).order_by(Level.min_points))
-        return result.scalars().all()
+        return (await self._get_table()).levels
+
+    async def load_level_table(self) -> None:
+        """Load the level table so the synchronous helpers can use it."""
+        await self._get_table()
 
     async def list_levels(self) -> list[Level]:
         """Return all levels ordered by their number."""
@@ -83,6 +148,7 @@ class LevelService:
         )
         self.session.add(new_level)
         await self.session.commit()
+        after_commit(self.session, invalidate_level_table)
         await self.session.refresh(new_level)
         return new_level
 
@@ -107,6 +173,7 @@ class LevelService:
         if reward is not None:
             level.reward = reward
         await self.session.commit()
+        after_commit(self.session, invalidate_level_table)
         return True
 
     async def delete_level(self, level_id: int) -> bool:
@@ -115,27 +182,24 @@ class LevelService:
             return False
         await self.session.delete(level)
         await self.session.commit()
+        after_commit(self.session, invalidate_level_table)
         return True
 
     async def get_level_threshold(self, level_id: int) -> int:
-        levels = await self._get_levels()
-        for lvl in levels:
-            if lvl.level_id == level_id:
-                return lvl.min_points
-        return float("inf")
+        level = (await self._get_table()).by_id.get(level_id)
+        return level.min_points if level else float("inf")
 
     async def get_level_for_points(self, points: float) -> Level:
-        levels = await self._get_levels()
-        current = levels[0]
-        for lvl in levels:
-            if points >= lvl.min_points:
-                current = lvl
-            else:
-                break
-        return current
-
-    async def check_for_level_up(self, user: User, *, bot: Bot | None = None) -> bool:
-        new_level = await self.get_level_for_points(user.points)
+        table = await self._get_table()
+        return table.levels[table.index_for(points)]
+
+    async def check_for_level_up(
+        self, user: User, *, bot: Bot | None = None, points: float | None = None
+    ) -> bool:
+        """Update ``user.level`` for ``points`` (defaults to ``user.points``)."""
+        if points is None:
+            points = user.points
+        new_level = await self.get_level_for_points(points)
         if new_level.level_id != user.level:
             user.level = new_level.level_id
             await self.session.commit()
@@ -146,13 +210,13 @@ class LevelService:
                     level_name=new_level.name,
                     reward=new_level.reward or "",
                 )
-                await bot.send_message(user.id, msg)
+                await notify(bot, user.id, msg)
                 if new_level.level_id in {5, 10, 15, 20}:
                     special_msg = BOT_MESSAGES["special_level_reward"].format(
                         level=new_level.level_id,
                         reward=new_level.reward or "",
                     )
-                    await bot.send_message(user.id, special_msg)
+                    await notify(bot, user.id, special_msg)
 
             # Desbloquear pistas de lore asociadas al nivel alcanzado
             unlock_code = getattr(new_level, "unlocks_lore_piece_code", None)
@@ -169,7 +233,7 @@ class LevelService:
                         self.session.add(UserLorePiece(user_id=user.id, lore_piece_id=lore_piece.id))
                         await self.session.commit()
                         if bot:
-                            await bot.send_message(user.id, f"Has desbloqueado una nueva pista: {lore_piece.title}")
+                            await notify(bot, user.id, f"Has desbloqueado una nueva pista: {lore_piece.title}")
                         logger.info(
                             f"User {user.id} unlocked lore piece {unlock_code} via level {new_level.level_id}"
                         )
@@ -177,32 +241,30 @@ class LevelService:
         return False
 
 
+_DEFAULT_IDS = [level for level, _ in LEVELS]
+_DEFAULT_THRESHOLDS = [threshold for _, threshold in LEVELS]
+
+
+def _level_arrays() -> tuple[list[int], list[int]]:
+    """Return ``(ids, thresholds)`` from the cached table, or from ``LEVELS``."""
+    if _LEVEL_TABLE is not None and _LEVEL_TABLE.levels:
+        return _LEVEL_TABLE.ids, _LEVEL_TABLE.thresholds
+    return _DEFAULT_IDS, _DEFAULT_THRESHOLDS
+
+
 def get_user_level(points: int) -> int:
     """Calculate user level based on accumulated points."""
-    current_level = LEVELS[0][0]
-    for level, threshold in LEVELS:
-        if points >= threshold:
-            current_level = level
-        else:
-            break
-    return current_level
+    ids, thresholds = _level_arrays()
+    return ids[max(bisect_right(thresholds, points) - 1, 0)]
 
 
 def get_next_level_info(points: int) -> dict:
     """Return progress information towards the next level."""
-    current_level = get_user_level(points)
-
-    # Find thresholds for current and next levels
-    current_threshold = 0
-    next_threshold = None
-    for level, threshold in LEVELS:
-        if level == current_level:
-            current_threshold = threshold
-        elif level > current_level and next_threshold is None:
-            next_threshold = threshold
-            break
-
-    if next_threshold is None:
+    ids, thresholds = _level_arrays()
+    idx = max(bisect_right(thresholds, points) - 1, 0)
+    current_level, current_threshold = ids[idx], thresholds[idx]
+
+    if idx + 1 >= len(ids):
         # At max level
         return {
             "current_level": current_level,
@@ -211,13 +273,14 @@ def get_next_level_info(points: int) -> dict:
             "percentage_to_next": 1.0,
         }
 
+    next_level, next_threshold = ids[idx + 1], thresholds[idx + 1]
     points_needed = max(0, next_threshold - points)
     total_range = next_threshold - current_threshold
     percentage = (points - current_threshold) / total_range if total_range else 1
 
     return {
         "current_level": current_level,
-        "next_level": current_level + 1,
+        "next_level": next_level,
         "points_needed": points_needed,
         "percentage_to_next": min(max(percentage, 0), 1),
     }
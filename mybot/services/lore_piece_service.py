@@ -1,6 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
 from database.models import LorePiece
 from utils.text_utils import sanitize_text
 import logging
@@ -39,12 +38,11 @@ class LorePieceService:
             category=sanitize_text(category) if category else None,
             is_main_story=is_main_story,
         )
-        self.session.add(new_piece)
-        try:
-            await self.session.commit()
-        except IntegrityError:
-            await self.session.rollback()
-            raise
+        # A duplicate code only rolls back this savepoint, not the rest of
+        # the caller's unit of work
+        async with self.session.begin_nested():
+            self.session.add(new_piece)
+        await self.session.commit()
         await self.session.refresh(new_piece)
         return new_piece
 
@@ -17,6 +17,8 @@ from .channel_service import ChannelService
 from database.models import ButtonReaction
 from keyboards.inline_post_kb import get_reaction_kb
 from services.message_registry import store_message
+from services.reaction_counter import reaction_counter, record_reaction
+from services.reaction_markup import reaction_markup
 from utils.config import VIP_CHANNEL_ID, FREE_CHANNEL_ID
 
 logger = logging.getLogger(__name__)
@@ -62,7 +64,7 @@ class MessageService:
             text = "\u00a1Un nuevo post interactivo! Reacciona para ganar puntos."
 
         try:
-            raw_reactions, _ = await self.channel_service.get_reactions_and_points(target_channel_id)
+            profile = await self.channel_service.get_reaction_profile(target_channel_id)
 
             sent = await self.bot.send_message(
                 chat_id=target_channel_id_str,
@@ -75,7 +77,7 @@ class MessageService:
             counts = await self.get_reaction_counts(real_message_id)
 
             updated_markup = get_reaction_kb(
-                reactions=raw_reactions,
+                reactions=profile.reactions,
                 current_counts=counts,
                 message_id=real_message_id,
                 channel_id=target_channel_id,
@@ -142,6 +144,7 @@ class MessageService:
             reaction_type=reaction_type,
         )
         self.session.add(reaction)
+        record_reaction(self.session, message_id, reaction_type)
         await self.session.commit()
         await self.session.refresh(reaction)
 
@@ -162,46 +165,15 @@ class MessageService:
 
     async def get_reaction_counts(self, message_id: int) -> dict[str, int]:
         """Return reaction counts for the given message."""
-        stmt = (
-            select(ButtonReaction.reaction_type, func.count(ButtonReaction.id))
-            .where(ButtonReaction.message_id == message_id)
-            .group_by(ButtonReaction.reaction_type)
-        )
-        result = await self.session.execute(stmt)
-        return {row[0]: row[1] for row in result.all()}
+        return await reaction_counter.get(message_id)
 
     async def update_reaction_markup(self, chat_id: int, message_id: int) -> None:
-        """Update inline keyboard of an interactive post with current counts."""
-        chat_id_str = str(chat_id)
-
-        counts = await self.get_reaction_counts(message_id)
-
-        raw_reactions, _ = await self.channel_service.get_reactions_and_points(chat_id)
-
-        try:
-            markup_to_edit = get_reaction_kb(
-                reactions=raw_reactions,
-                current_counts=counts,
-                message_id=message_id,
-                channel_id=chat_id,
-            )
-            logger.info(f"DEBUG: Markup being sent for update: {markup_to_edit}")
+        """Queue an update of an interactive post's keyboard with current counts.
 
-            await self.bot.edit_message_reply_markup(
-                chat_id=chat_id_str,
-                message_id=message_id,
-                reply_markup=markup_to_edit,
-            )
-        except TelegramBadRequest as e:
-            logger.error(
-                f"Failed to update reaction markup for chat {chat_id}, message {message_id}: {e}",
-                exc_info=True,
-            )
-        except TelegramAPIError as e:
-            logger.error(
-                f"Unexpected API error updating reaction markup for chat {chat_id}, message {message_id}: {e}",
-                exc_info=True,
-            )
+        Edits are coalesced by ``reaction_markup``.
+        """
+        profile = await self.channel_service.get_reaction_profile(chat_id)
+        reaction_markup.record(self.session, self.bot, chat_id, message_id, profile.reactions)
 
     async def get_weekly_reaction_ranking(self, limit: int = 3) -> list[tuple[int, int]]:
         """Return a list of (user_id, count) for reactions in last 7 days."""
@@ -13,6 +13,7 @@ from database.models import (
     UserLorePiece,
 )
 from utils.text_utils import sanitize_text
+from services.notification_buffer import notify
 import logging
 
 logger = logging.getLogger(__name__)
@@ -180,7 +181,8 @@ class MissionService:
             from utils.keyboard_utils import get_mission_completed_keyboard
 
             text = await get_mission_completed_message(mission)
-            await bot.send_message(
+            await notify(
+                bot,
                 user_id,
                 text,
                 reply_markup=get_mission_completed_keyboard(),
@@ -251,6 +253,7 @@ class MissionService:
         bot=None,
     ) -> None:
         missions = await self.get_active_missions(mission_type=mission_type)
+        completed_any = False
         for mission in missions:
             stmt = select(UserMissionEntry).where(
                 UserMissionEntry.user_id == user_id,
@@ -276,16 +279,24 @@ class MissionService:
                 record.completed_at = datetime.datetime.utcnow()
                 await self.point_service.add_points(user_id, mission.reward_points, bot=bot)
                 if bot:
-                    from ..utils.message_utils import get_mission_completed_message
-from ..utils.keyboard_utils import get_mission_completed_keyboardd
+                    from utils.message_utils import get_mission_completed_message
+                    from utils.keyboard_utils import get_mission_completed_keyboard
 
                     text = await get_mission_completed_message(mission)
-                    await bot.send_message(
+                    await notify(
+                        bot,
                         user_id,
                         text,
                         reply_markup=get_mission_completed_keyboard(),
                     )
+                completed_any = True
         await self.session.commit()
+        if completed_any:
+            from services.achievement_service import AchievementService
+
+            ach_service = AchievementService(self.session)
+            count = await ach_service.get_stat_value(user_id, "missions")
+            await ach_service.grant_badges_for(user_id, "missions", count, bot=bot)
 
     async def delete_mission(self, mission_id: str) -> bool:
         mission = await self.session.get(Mission, mission_id)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects longer texts
+MAX_MESSAGE_LENGTH = 4096
+_SEPARATOR = "\n\n"
+
+_current: ContextVar["NotificationBuffer | None"] = ContextVar(
+    "notification_buffer", default=None
+)
+
+# Notifications requested vs. private messages actually sent
+_STATS = {"events": 0, "messages": 0}
+
+
+@dataclass
+class _Notice:
+    text: str
+    reply_markup: Any = None
+    key: str | None = None
+
+
+class NotificationBuffer:
+    """Collects the notifications produced while handling one update.
+
+    ``flush`` sends each user a single digest with every notice joined in
+    order. Notices sharing a ``key`` (e.g. the running points total) keep
+    only the latest text. A digest is split only to stay under Telegram's
+    length limit or because two notices carry different keyboards.
+    """
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self._notices: dict[int, list[_Notice]] = {}
+
+    def add(self, user_id: int, text: str, reply_markup: Any = None, key: str | None = None) -> None:
+        notices = self._notices.setdefault(user_id, [])
+        if key is not None:
+            notices[:] = [n for n in notices if n.key != key]
+        notices.append(_Notice(text, reply_markup, key))
+
+    @staticmethod
+    def _render(notices: list[_Notice]) -> list[tuple[str, Any]]:
+        messages: list[tuple[str, Any]] = []
+        text, markup = "", None
+        for notice in notices:
+            joined = f"{text}{_SEPARATOR}{notice.text}" if text else notice.text
+            if text and (
+                len(joined) > MAX_MESSAGE_LENGTH
+                or (markup is not None and notice.reply_markup is not None)
+            ):
+                messages.append((text, markup))
+                text, markup = notice.text, None
+            else:
+                text = joined
+            if notice.reply_markup is not None:
+                markup = notice.reply_markup
+        if text:
+            messages.append((text, markup))
+        return messages
+
+    async def flush(self) -> None:
+        notices, self._notices = self._notices, {}
+        for user_id, user_notices in notices.items():
+            for text, markup in self._render(user_notices):
+                try:
+                    await self.bot.send_message(user_id, text, reply_markup=markup)
+                    _STATS["messages"] += 1
+                except Exception as e:
+                    logger.warning("Failed to send notifications to %s: %s", user_id, e)
+                    break
+
+
+@asynccontextmanager
+async def collect_notifications(bot: Bot) -> AsyncIterator[NotificationBuffer]:
+    """Buffer ``notify`` calls made inside the block and send digests at exit.
+
+    Nothing is sent if the block raises, so rolled-back rewards are never
+    announced. Nested blocks share the outermost buffer.
+    """
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+    buffer = NotificationBuffer(bot)
+    token = _current.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _current.reset(token)
+    await buffer.flush()
+
+
+async def notify(
+    bot: Bot, user_id: int, text: str, *, reply_markup: Any = None, key: str | None = None
+) -> None:
+    """Send ``text`` to ``user_id``, or add it to the active digest if any."""
+    _STATS["events"] += 1
+    buffer = _current.get()
+    if buffer is not None:
+        buffer.add(user_id, text, reply_markup, key)
+        return
+    await bot.send_message(user_id, text, reply_markup=reply_markup)
+    _STATS["messages"] += 1
+
+
+def get_notification_stats() -> dict:
+    stats = dict(_STATS)
+    stats["events_per_message"] = stats["events"] / stats["messages"] if stats["messages"] else 0.0
+    return stats
@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendChatAction, TelegramMethod
+
+from utils.config import (
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_GROUP_RATE,
+    OUTBOUND_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Lower values are sent first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NOTIFICATION = 1
+PRIORITY_BROADCAST = 2
+
+_priority: ContextVar[int] = ContextVar("outbound_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def outbound_priority(priority: int):
+    """Send the messages issued inside the block with ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate + max(self.updated - now, 0.0)
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def pause_until(self, when: float) -> None:
+        self.tokens = 0
+        self.updated = max(self.updated, when)
+
+    def idle(self, now: float) -> bool:
+        return self.wait_time(now) == 0 and self.tokens >= self.capacity
+
+
+@dataclass(eq=False)
+class _Request:
+    priority: int
+    seq: int
+    chat_id: int | str
+    bot: Bot
+    method: TelegramMethod
+    make_request: NextRequestMiddlewareType
+    future: asyncio.Future
+    enqueued_at: float
+    attempts: int = field(default=0)
+
+
+def _is_rate_limited(method: TelegramMethod) -> bool:
+    name = type(method).__name__
+    return (
+        name.startswith(("Send", "Copy", "Forward"))
+        and not isinstance(method, SendChatAction)
+        and getattr(method, "chat_id", None) is not None
+    )
+
+
+class OutboundDispatcher(BaseRequestMiddleware):
+    """Rate-limited queue for every message the bot sends.
+
+    Registered as a request middleware on the bot session, it intercepts
+    ``send*``/``copy*``/``forward*`` calls and releases them through a
+    global token bucket and a bucket per chat. Lower priority values go
+    first (see ``outbound_priority``); messages for a throttled chat wait
+    without holding up other chats. ``RetryAfter`` pauses that chat for the
+    delay Telegram asks for and requeues the message. Callers either await
+    the send as usual or hand it to ``submit`` and move on.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        chat_rate: float,
+        chat_burst: int,
+        group_rate: float,
+        max_retries: int,
+    ):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self._seq = itertools.count()
+        self._heap: list[tuple[int, int, _Request]] = []
+        self._held: dict[int | str, deque[_Request]] = {}
+        self._releases: list[tuple[float, int | str]] = []
+        self._chats: dict[int | str, _TokenBucket] = {}
+        self._global: _TokenBucket | None = None
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._in_flight: set[asyncio.Task] = set()
+        self._detached: set[asyncio.Task] = set()
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+
+    # -- submission -------------------------------------------------------
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        if self._task is None or not _is_rate_limited(method):
+            return await make_request(bot, method)
+        loop = asyncio.get_running_loop()
+        request = _Request(
+            priority=_priority.get(),
+            seq=next(self._seq),
+            chat_id=method.chat_id,
+            bot=bot,
+            method=method,
+            make_request=make_request,
+            future=loop.create_future(),
+            enqueued_at=loop.time(),
+        )
+        self._push(request)
+        return await request.future
+
+    def submit(self, send: Awaitable[Any], priority: int | None = None) -> asyncio.Task:
+        """Send in the background; failures are logged instead of raised.
+
+        ``priority`` overrides the caller's priority for this send.
+        """
+        if priority is None:
+            task = asyncio.ensure_future(send)
+        else:
+            # The task copies the context, priority included, when created
+            with outbound_priority(priority):
+                task = asyncio.ensure_future(send)
+        self._detached.add(task)
+        task.add_done_callback(self._detached_done)
+        return task
+
+    def _detached_done(self, task: asyncio.Task) -> None:
+        self._detached.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background send failed: %s", task.exception())
+
+    def _push(self, request: _Request) -> None:
+        heapq.heappush(self._heap, (request.priority, request.seq, request))
+        depth = self.depth()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        self._wake.set()
+
+    # -- lifecycle --------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None:
+            self._global = _TokenBucket(
+                self.global_rate, self.global_rate, asyncio.get_running_loop().time()
+            )
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Send what is queued (up to ``timeout`` seconds), then stop."""
+        if self._task is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (self.depth() or self._in_flight or self._detached) and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        dropped = 0
+        for _, _, request in self._heap:
+            dropped += self._abandon(request)
+        for held in self._held.values():
+            for request in held:
+                dropped += self._abandon(request)
+        self._heap.clear()
+        self._held.clear()
+        self._releases.clear()
+        if dropped:
+            logger.warning("Outbound dispatcher stopped with %s unsent messages", dropped)
+
+    @staticmethod
+    def _abandon(request: _Request) -> int:
+        if request.future.done():
+            return 0
+        request.future.set_exception(RuntimeError("Outbound dispatcher stopped"))
+        request.future.exception()
+        return 1
+
+    # -- scheduling -------------------------------------------------------
+
+    def _bucket(self, chat_id: int | str, now: float) -> _TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if isinstance(chat_id, int) and chat_id > 0:
+                bucket = _TokenBucket(self.chat_rate, self.chat_burst, now)
+            else:
+                bucket = _TokenBucket(self.group_rate, 1, now)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _release_due(self, now: float) -> None:
+        while self._releases and self._releases[0][0] <= now:
+            _, chat_id = heapq.heappop(self._releases)
+            for request in self._held.pop(chat_id, ()):
+                heapq.heappush(self._heap, (request.priority, request.seq, request))
+
+    def _pop_ready(self, now: float) -> _Request | None:
+        while self._heap:
+            _, _, request = heapq.heappop(self._heap)
+            if request.future.done():
+                # The caller was cancelled while waiting
+                continue
+            held = self._held.get(request.chat_id)
+            if held is not None:
+                held.append(request)
+                continue
+            bucket = self._bucket(request.chat_id, now)
+            wait = bucket.wait_time(now)
+            if wait > 0:
+                self._held[request.chat_id] = deque([request])
+                heapq.heappush(self._releases, (now + wait, request.chat_id))
+                continue
+            bucket.take()
+            return request
+        return None
+
+    async def _sleep(self, timeout: float | None) -> None:
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            self._release_due(now)
+            if not self._heap:
+                await self._sleep(self._releases[0][0] - now if self._releases else None)
+                continue
+            wait = self._global.wait_time(now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            request = self._pop_ready(now)
+            if request is None:
+                # Every queued message is for a throttled chat
+                await self._sleep(self._releases[0][0] - now if self._releases else None)
+                continue
+            self._global.take()
+            task = asyncio.create_task(self._send(request))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+            if len(self._chats) > 10_000:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        for chat_id in [c for c, b in self._chats.items() if b.idle(now)]:
+            if chat_id not in self._held:
+                del self._chats[chat_id]
+
+    async def _send(self, request: _Request) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            result = await request.make_request(request.bot, request.method)
+        except TelegramRetryAfter as e:
+            request.attempts += 1
+            if request.attempts > self.max_retries:
+                self.failed += 1
+                if not request.future.done():
+                    request.future.set_exception(e)
+                return
+            self.retried += 1
+            logger.info(
+                "RetryAfter %ss for chat %s, requeueing", e.retry_after, request.chat_id
+            )
+            self._bucket(request.chat_id, loop.time()).pause_until(loop.time() + e.retry_after)
+            self._push(request)
+        except Exception as e:
+            self.failed += 1
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            self.sent += 1
+            self.total_wait += loop.time() - request.enqueued_at
+            if not request.future.done():
+                request.future.set_result(result)
+
+    # -- metrics ----------------------------------------------------------
+
+    def depth(self) -> int:
+        return len(self._heap) + sum(len(held) for held in self._held.values())
+
+    def stats(self) -> dict:
+        by_priority: dict[int, int] = {}
+        for priority, _, _ in self._heap:
+            by_priority[priority] = by_priority.get(priority, 0) + 1
+        return {
+            "queued": self.depth(),
+            "queued_by_priority": by_priority,
+            "held_chats": len(self._held),
+            "in_flight": len(self._in_flight),
+            "background": len(self._detached),
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_wait": self.total_wait / self.sent if self.sent else 0.0,
+        }
+
+
+outbound_dispatcher = OutboundDispatcher(
+    OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_GROUP_RATE,
+    OUTBOUND_MAX_RETRIES,
+)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from database.models import PointHold
+from services.point_ledger import record_points
+
+logger = logging.getLogger(__name__)
+
+HELD = "held"
+RELEASED = "released"
+CAPTURED = "captured"
+
+# Key in ``Session.info`` holding holds settled but not yet committed
+_SESSION_KEY = "point_hold_releases"
+
+
+class PointHolds:
+    """Points each user has reserved in auctions, kept in memory.
+
+    A bid ``reserve``s its amount before it is written, in the same step
+    as the availability check, so two bids from one user can't both spend
+    the same points. The reservation is dropped when the bid is outbid,
+    the auction is cancelled, or the points are deducted from the winner.
+    """
+
+    def __init__(self):
+        self._held: dict[int, int] = {}
+
+    def held(self, user_id: int) -> int:
+        return self._held.get(user_id, 0)
+
+    def available(self, user_id: int, balance: float) -> float:
+        """Return the part of ``balance`` not reserved by a bid."""
+        return balance - self._held.get(user_id, 0)
+
+    def reserve(self, user_id: int, amount: int, balance: float) -> bool:
+        """Reserve ``amount`` if that much of ``balance`` is still available."""
+        if self.available(user_id, balance) < amount:
+            return False
+        self._held[user_id] = self._held.get(user_id, 0) + amount
+        return True
+
+    def release(self, user_id: int, amount: int) -> None:
+        remaining = self._held.get(user_id, 0) - amount
+        if remaining > 0:
+            self._held[user_id] = remaining
+        else:
+            self._held.pop(user_id, None)
+
+    async def load(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """Read the open holds from ``point_holds``."""
+        async with session_factory() as session:
+            rows = await session.execute(
+                select(PointHold.user_id, func.sum(PointHold.amount))
+                .where(PointHold.status == HELD)
+                .group_by(PointHold.user_id)
+            )
+            self._held = {user_id: int(total) for user_id, total in rows}
+        logger.info("Loaded point holds of %s users", len(self._held))
+
+    def stats(self) -> dict:
+        return {"users": len(self._held), "held": sum(self._held.values())}
+
+
+point_holds = PointHolds()
+
+
+def place_hold(session: AsyncSession, auction_id: int, user_id: int, amount: int) -> None:
+    """Record a hold already ``reserve``d in memory."""
+    session.add(PointHold(user_id=user_id, auction_id=auction_id, amount=amount))
+
+
+async def release_holds(session: AsyncSession, *auction_ids: int) -> None:
+    """Release every open hold on the auctions once ``session`` commits."""
+    rows = (
+        await session.execute(
+            select(PointHold.id, PointHold.user_id, PointHold.amount).where(
+                PointHold.auction_id.in_(auction_ids), PointHold.status == HELD
+            )
+        )
+    ).all()
+    if not rows:
+        return
+    await session.execute(
+        update(PointHold)
+        .where(PointHold.id.in_([row.id for row in rows]))
+        .values(status=RELEASED, settled_at=datetime.utcnow())
+    )
+    session.info.setdefault(_SESSION_KEY, []).extend(
+        (row.user_id, row.amount) for row in rows
+    )
+
+
+async def capture_holds(session: AsyncSession, winners: dict[int, int]) -> dict[int, int]:
+    """Deduct the points held by winning bids.
+
+    ``winners`` maps auction id to winner id. Returns the amount captured
+    per auction; auctions whose winner holds nothing there are left out.
+    """
+    rows = (
+        await session.execute(
+            select(PointHold.id, PointHold.auction_id, PointHold.user_id, PointHold.amount).where(
+                PointHold.auction_id.in_(list(winners)), PointHold.status == HELD
+            )
+        )
+    ).all()
+    captured = [row for row in rows if winners[row.auction_id] == row.user_id]
+    if not captured:
+        return {}
+    await session.execute(
+        update(PointHold)
+        .where(PointHold.id.in_([row.id for row in captured]))
+        .values(status=CAPTURED, settled_at=datetime.utcnow())
+    )
+    for row in captured:
+        record_points(session, row.user_id, -row.amount, "auction")
+    session.info.setdefault(_SESSION_KEY, []).extend(
+        (row.user_id, row.amount) for row in captured
+    )
+    return {row.auction_id: row.amount for row in captured}
+
+
+@event.listens_for(Session, "after_commit")
+def _release_committed_holds(session: Session) -> None:
+    for user_id, amount in session.info.pop(_SESSION_KEY, ()):
+        point_holds.release(user_id, amount)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_rolled_back_holds(session: Session, transaction) -> None:
+    # Committed releases were already popped; anything left was rolled back
+    if transaction.parent is None:
+        session.info.pop(_SESSION_KEY, None)
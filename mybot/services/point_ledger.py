@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+
+from sqlalchemy import bindparam, event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from database.models import PointLedgerEntry, User
+from utils.config import POINTS_FLUSH_BATCH_SIZE, POINTS_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Key in ``Session.info`` holding deltas recorded but not yet committed
+_SESSION_KEY = "point_deltas"
+
+
+class PointAggregator:
+    """Fold point ledger entries into ``users.points`` in the background.
+
+    Awarding points only appends a ``PointLedgerEntry`` to the caller's
+    session. Once that session commits, the delta is added to an in-memory
+    per-user buffer so balance reads stay current, and a background task
+    applies all unapplied ledger rows to ``users.points`` in batches. Rows
+    left unapplied by a crash are replayed on the next ``start``.
+
+    ``_seq`` is odd while a batch is being committed and discounted, so
+    ``balance`` never pairs a ``users.points`` read with a ``pending``
+    total from the other side of a flush.
+
+    Deductions are also counted in ``_debits`` from the moment they are
+    recorded until their session commits or rolls back, so a spend checked
+    in one session sees the uncommitted spends of every other one.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: dict[int, float] = {}
+        self._debits: dict[int, float] = {}
+        self._buffered = 0
+        self._seq = 0
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+
+    def enqueue(self, user_id: int, amount: float) -> None:
+        """Buffer a committed delta for ``user_id``."""
+        self._pending[user_id] = self._pending.get(user_id, 0) + amount
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self._wake.set()
+
+    def pending(self, user_id: int) -> float:
+        """Return committed points not yet folded into ``users.points``."""
+        return self._pending.get(user_id, 0)
+
+    def debits(self, user_id: int) -> float:
+        """Return deductions recorded for ``user_id`` but not yet committed."""
+        return self._debits.get(user_id, 0)
+
+    def _add_debit(self, user_id: int, amount: float) -> None:
+        remaining = self._debits.get(user_id, 0) + amount
+        if remaining > 1e-9:
+            self._debits[user_id] = remaining
+        else:
+            self._debits.pop(user_id, None)
+
+    async def balance(self, session: AsyncSession, user_id: int) -> float | None:
+        """Return ``users.points`` read fresh plus the committed points not folded in.
+
+        ``None`` if the user doesn't exist.
+        """
+        while True:
+            seq = self._seq
+            if seq % 2 == 0:
+                points = await session.scalar(select(User.points).where(User.id == user_id))
+                if self._seq == seq:
+                    if points is None and await session.get(User, user_id) is None:
+                        return None
+                    return (points or 0) + self.pending(user_id)
+            # A flush moved points between the two reads: wait for it and retry
+            async with self._lock:
+                pass
+
+    def _discount(self, user_id: int, amount: float) -> None:
+        remaining = self._pending.get(user_id, 0) - amount
+        if abs(remaining) < 1e-9:
+            self._pending.pop(user_id, None)
+        else:
+            self._pending[user_id] = remaining
+
+    async def start(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """Replay unapplied ledger rows and start the flush loop."""
+        self._session_factory = session_factory
+        replayed = await self.flush(replay=True)
+        if replayed:
+            logger.info("Replayed %s unapplied point ledger entries", replayed)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and apply whatever is still buffered."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self._buffered:
+                continue
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Error flushing point ledger")
+
+    async def flush(self, *, replay: bool = False) -> int:
+        """Apply unapplied ledger rows to user balances. Returns rows applied."""
+        if self._session_factory is None:
+            return 0
+        applied = 0
+        users = User.__table__
+        add_points = (
+            update(users)
+            .where(users.c.id == bindparam("uid"))
+            .values(points=func.coalesce(users.c.points, 0) + bindparam("delta"))
+        )
+        async with self._lock:
+            self._buffered = 0
+            while True:
+                async with self._session_factory() as session:
+                    stmt = (
+                        select(
+                            PointLedgerEntry.id,
+                            PointLedgerEntry.user_id,
+                            PointLedgerEntry.amount,
+                        )
+                        .where(PointLedgerEntry.applied == False)
+                        .order_by(PointLedgerEntry.id)
+                        .limit(self.batch_size)
+                    )
+                    rows = (await session.execute(stmt)).all()
+                    if not rows:
+                        break
+                    totals: dict[int, float] = defaultdict(float)
+                    for _, user_id, amount in rows:
+                        totals[user_id] += amount
+                    await session.execute(
+                        add_points,
+                        [{"uid": uid, "delta": delta} for uid, delta in totals.items()],
+                    )
+                    await session.execute(
+                        update(PointLedgerEntry)
+                        .where(PointLedgerEntry.id.in_([row[0] for row in rows]))
+                        .values(applied=True)
+                    )
+                    self._seq += 1
+                    try:
+                        await session.commit()
+                        # Rows replayed at startup were never buffered in this process
+                        if not replay:
+                            for user_id, delta in totals.items():
+                                self._discount(user_id, delta)
+                    finally:
+                        self._seq += 1
+                applied += len(rows)
+                if len(rows) < self.batch_size:
+                    break
+        return applied
+
+
+point_aggregator = PointAggregator(POINTS_FLUSH_INTERVAL, POINTS_FLUSH_BATCH_SIZE)
+
+
+def record_points(
+    session: AsyncSession, user_id: int, amount: float, reason: str | None = None
+) -> PointLedgerEntry:
+    """Append a ledger entry to ``session``; it is buffered once committed.
+
+    A deduction is reserved right away: until ``session`` commits or rolls
+    back, ``outstanding_debits`` reports it to every other session.
+    """
+    entry = PointLedgerEntry(user_id=user_id, amount=amount, reason=reason)
+    session.add(entry)
+    session.info.setdefault(_SESSION_KEY, []).append((user_id, amount))
+    if amount < 0:
+        point_aggregator._add_debit(user_id, -amount)
+    return entry
+
+
+def uncommitted_points(session: AsyncSession, user_id: int) -> float:
+    """Return deltas recorded in ``session`` for ``user_id`` but not committed."""
+    return sum(amount for uid, amount in session.info.get(_SESSION_KEY, ()) if uid == user_id)
+
+
+def outstanding_debits(session: AsyncSession, user_id: int) -> float:
+    """Return deductions for ``user_id`` recorded in other sessions and not yet committed.
+
+    Spends must check against the balance minus this, in the same step as
+    they ``record_points``, so two sessions can't spend the same points.
+    """
+    own = -sum(
+        amount
+        for uid, amount in session.info.get(_SESSION_KEY, ())
+        if uid == user_id and amount < 0
+    )
+    return point_aggregator.debits(user_id) - own
+
+
+def _release_debits(deltas) -> None:
+    for user_id, amount in deltas:
+        if amount < 0:
+            point_aggregator._add_debit(user_id, amount)
+
+
+@event.listens_for(Session, "after_commit")
+def _buffer_committed_points(session: Session) -> None:
+    deltas = session.info.pop(_SESSION_KEY, ())
+    for user_id, amount in deltas:
+        point_aggregator.enqueue(user_id, amount)
+    # Now counted in ``pending`` instead
+    _release_debits(deltas)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_rolled_back_points(session: Session, transaction) -> None:
+    # Committed deltas were already popped; anything left was rolled back
+    if transaction.parent is None:
+        _release_debits(session.info.pop(_SESSION_KEY, ()))
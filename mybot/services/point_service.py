@@ -6,6 +6,14 @@ from aiogram import Bot
 from services.level_service import LevelService
 from services.achievement_service import AchievementService
 from services.event_service import EventService
+from services.point_ledger import (
+    outstanding_debits,
+    point_aggregator,
+    record_points,
+    uncommitted_points,
+)
+from services.point_holds import point_holds
+from services.notification_buffer import notify
 import datetime
 import logging
 
@@ -29,47 +37,22 @@ class PointService:
         now = datetime.datetime.utcnow()
         if progress.last_activity_at and (now - progress.last_activity_at).total_seconds() < 30:
             return None
-        progress = await self.add_points(user_id, 1, bot=bot)
+        progress = await self.add_points(user_id, 1, bot=bot, reason="message")
         progress.messages_sent += 1
         await self.session.commit()
         ach_service = AchievementService(self.session)
         await ach_service.check_message_achievements(user_id, progress.messages_sent, bot=bot)
-        new_badges = await ach_service.check_user_badges(user_id)
-        for badge in new_badges:
-            await ach_service.award_badge(user_id, badge.id)
-            if bot:
-                await bot.send_message(
-                    user_id,
-                    f"🏅 Has obtenido la insignia {badge.icon or ''} {badge.name}!",
-                )
+        await ach_service.grant_badges_for(user_id, "messages", progress.messages_sent, bot=bot)
         return progress
 
     async def award_reaction(
         self, user: User, message_id: int, bot: Bot
     ) -> UserStats | None:
-        progress = await self.add_points(user.id, 0.5, bot=bot)
-        ach_service = AchievementService(self.session)
-        new_badges = await ach_service.check_user_badges(user.id)
-        for badge in new_badges:
-            await ach_service.award_badge(user.id, badge.id)
-            if bot:
-                await bot.send_message(
-                    user.id,
-                    f"🏅 Has obtenido la insignia {badge.icon or ''} {badge.name}!",
-                )
+        progress = await self.add_points(user.id, 0.5, bot=bot, reason="reaction")
         return progress
 
     async def award_poll(self, user_id: int, bot: Bot) -> UserStats:
-        progress = await self.add_points(user_id, 2, bot=bot)
-        ach_service = AchievementService(self.session)
-        new_badges = await ach_service.check_user_badges(user_id)
-        for badge in new_badges:
-            await ach_service.award_badge(user_id, badge.id)
-            if bot:
-                await bot.send_message(
-                    user_id,
-                    f"🏅 Has obtenido la insignia {badge.icon or ''} {badge.name}!",
-                )
+        progress = await self.add_points(user_id, 2, bot=bot, reason="poll")
         return progress
 
     async def daily_checkin(self, user_id: int, bot: Bot) -> tuple[bool, UserStats]:
@@ -77,7 +60,7 @@ class PointService:
         now = datetime.datetime.utcnow()
         if progress.last_checkin_at and (now - progress.last_checkin_at).total_seconds() < 86400:
             return False, progress
-        progress = await self.add_points(user_id, 10, bot=bot)
+        progress = await self.add_points(user_id, 10, bot=bot, reason="checkin")
         if progress.last_checkin_at and (now.date() - progress.last_checkin_at.date()).days == 1:
             progress.checkin_streak += 1
         else:
@@ -86,17 +69,32 @@ class PointService:
         await self.session.commit()
         ach_service = AchievementService(self.session)
         await ach_service.check_checkin_achievements(user_id, progress.checkin_streak, bot=bot)
-        new_badges = await ach_service.check_user_badges(user_id)
-        for badge in new_badges:
-            await ach_service.award_badge(user_id, badge.id)
-            if bot:
-                await bot.send_message(
-                    user_id,
-                    f"🏅 Has obtenido la insignia {badge.icon or ''} {badge.name}!",
-                )
+        await ach_service.grant_badges_for(user_id, "login_streak", progress.checkin_streak, bot=bot)
         return True, progress
 
-    async def add_points(self, user_id: int, points: float, *, bot: Bot | None = None) -> UserStats:
+    async def _balance(self, user_id: int) -> float | None:
+        """Return the user's points plus ledger deltas not yet folded into them.
+
+        ``users.points`` is read from the database, not from a ``User``
+        loaded earlier in the session, which may predate a flush.
+        """
+        balance = await point_aggregator.balance(self.session, user_id)
+        if balance is None:
+            return None
+        return balance + uncommitted_points(self.session, user_id)
+
+    def _available(self, user_id: int, balance: float) -> float:
+        """Return the part of ``balance`` not held by bids or spent by other sessions."""
+        return point_holds.available(user_id, balance) - outstanding_debits(self.session, user_id)
+
+    async def add_points(
+        self,
+        user_id: int,
+        points: float,
+        *,
+        bot: Bot | None = None,
+        reason: str | None = None,
+    ) -> UserStats:
         user = await self.session.get(User, user_id)
         if not user:
             logger.warning(
@@ -105,7 +103,6 @@ class PointService:
             user = User(id=user_id, points=0)
             self.session.add(user)
             await self.session.commit()
-            await self.session.refresh(user)
 
         multiplier = 1
         if bot:
@@ -114,50 +111,49 @@ class PointService:
             multiplier *= event_mult
 
         total = points * multiplier
-        user.points += total
+        record_points(self.session, user_id, total, reason)
         progress = await self._get_or_create_progress(user_id)
         progress.last_activity_at = datetime.datetime.utcnow()
         await self.session.commit()
-        await self.session.refresh(progress)
-        await self.session.refresh(user)
+        balance = await self._balance(user_id)
         level_service = LevelService(self.session)
-        await level_service.check_for_level_up(user, bot=bot)
-
-        ach_service = AchievementService(self.session)
-        new_badges = await ach_service.check_user_badges(user_id)
-        for badge in new_badges:
-            await ach_service.award_badge(user_id, badge.id)
-            if bot:
-                await bot.send_message(
-                    user_id,
-                    f"🏅 Has obtenido la insignia {badge.icon or ''} {badge.name}!",
-                )
+        await level_service.check_for_level_up(user, bot=bot, points=balance)
         logger.info(
-            f"User {user_id} gained {total} points (base {points}, x{multiplier}). Total: {user.points}"
+            f"User {user_id} gained {total} points (base {points}, x{multiplier}). Total: {balance}"
         )
-        if bot and user.points - progress.last_notified_points >= 5:
-            await bot.send_message(
+        if bot and balance - progress.last_notified_points >= 5:
+            await notify(
+                bot,
                 user_id,
-                f"Has acumulado {user.points:.1f} puntos en total",
+                f"Has acumulado {balance:.1f} puntos en total",
+                key="points_total",
             )
-            progress.last_notified_points = user.points
+            progress.last_notified_points = balance
             await self.session.commit()
         return progress
 
-    async def deduct_points(self, user_id: int, points: int) -> User | None:
+    async def deduct_points(
+        self, user_id: int, points: int, *, reason: str | None = None
+    ) -> User | None:
         user = await self.session.get(User, user_id)
-        if user and user.points >= points:
-            user.points -= points
+        balance = await self._balance(user_id) if user else None
+        # Points held by auction bids can't be spent elsewhere; checked and
+        # recorded in one step so concurrent spends see this one
+        if balance is not None and self._available(user_id, balance) >= points:
+            record_points(self.session, user_id, -points, reason)
             await self.session.commit()
-            await self.session.refresh(user)
-            logger.info(f"User {user_id} lost {points} points. Total: {user.points}")
+            logger.info(f"User {user_id} lost {points} points. Total: {balance - points}")
             return user
         logger.warning(f"Failed to deduct {points} points from user {user_id}. Not enough points or user not found.")
         return None
 
-    async def get_user_points(self, user_id: int) -> int:
-        user = await self.session.get(User, user_id)
-        return user.points if user else 0
+    async def get_user_points(self, user_id: int) -> float:
+        """Return the user's current balance, including unflushed ledger entries."""
+        return await self._balance(user_id) or 0
+
+    async def get_available_points(self, user_id: int) -> float:
+        """Return the balance minus the points held by bids or being spent elsewhere."""
+        return self._available(user_id, await self.get_user_points(user_id))
 
     async def get_top_users(self, limit: int = 10) -> list[User]:
         """Return the top users ordered by points."""
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from sqlalchemy import bindparam, delete, event, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from database.models import ButtonReaction, ReactionCount
+from utils.cache import AsyncTTLCache
+from utils.config import REACTION_COUNTS_CACHE_SIZE, REACTION_COUNTS_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Key in ``Session.info`` holding reactions recorded but not yet committed
+_SESSION_KEY = "reaction_deltas"
+
+_Key = tuple[int, str]
+
+
+class ReactionCounter:
+    """Reaction totals per post, served from memory.
+
+    Registering a reaction records it on the caller's session. Once that
+    session commits, the reaction is added to the post's in-memory totals
+    and to a buffer that a background task writes to ``reaction_counts``
+    in batches. Totals are read from ``reaction_counts`` the first time a
+    post is looked at; ``reconcile`` rebuilds the table from
+    ``button_reactions`` at startup, recovering anything a crash lost.
+    """
+
+    def __init__(self, flush_interval: float, cache_size: int):
+        self.flush_interval = flush_interval
+        self._totals = AsyncTTLCache(cache_size, 86400)
+        self._pending: dict[_Key, int] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        self.flushed = 0
+
+    def increment(self, message_id: int, reaction_type: str) -> None:
+        """Count a committed reaction."""
+        key = (message_id, reaction_type)
+        self._pending[key] = self._pending.get(key, 0) + 1
+        totals = self._totals.get(message_id)
+        if totals is not None:
+            totals[reaction_type] = totals.get(reaction_type, 0) + 1
+
+    async def get(self, message_id: int) -> dict[str, int]:
+        """Return ``{reaction_type: count}`` for a post."""
+        totals = await self._totals.get_or_load(message_id, lambda: self._load(message_id))
+        return dict(totals)
+
+    async def _load(self, message_id: int) -> dict[str, int]:
+        # The lock keeps a flush from moving deltas out of ``_pending``
+        # between the read and the overlay below
+        async with self._lock:
+            async with self._session_factory() as session:
+                rows = await session.execute(
+                    select(ReactionCount.reaction_type, ReactionCount.count).where(
+                        ReactionCount.message_id == message_id
+                    )
+                )
+                totals = {reaction_type: count for reaction_type, count in rows}
+            for (mid, reaction_type), delta in self._pending.items():
+                if mid == message_id:
+                    totals[reaction_type] = totals.get(reaction_type, 0) + delta
+            return totals
+
+    async def reconcile(self) -> None:
+        """Rebuild ``reaction_counts`` from ``button_reactions``."""
+        async with self._lock:
+            async with self._session_factory() as session:
+                await session.execute(delete(ReactionCount))
+                await session.execute(
+                    insert(ReactionCount).from_select(
+                        ["message_id", "reaction_type", "count"],
+                        select(
+                            ButtonReaction.message_id,
+                            ButtonReaction.reaction_type,
+                            func.count(ButtonReaction.id),
+                        ).group_by(ButtonReaction.message_id, ButtonReaction.reaction_type),
+                    )
+                )
+                await session.commit()
+            self._pending.clear()
+            self._totals.clear()
+
+    async def start(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """Reconcile the stored totals and start the flush loop."""
+        self._session_factory = session_factory
+        await self.reconcile()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still buffered."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if not self._pending:
+                continue
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Error flushing reaction counts")
+
+    async def flush(self) -> int:
+        """Write buffered reactions to ``reaction_counts``. Returns rows touched."""
+        if self._session_factory is None or not self._pending:
+            return 0
+        table = ReactionCount.__table__
+        add_count = (
+            update(table)
+            .where(
+                table.c.message_id == bindparam("mid"),
+                table.c.reaction_type == bindparam("rtype"),
+            )
+            .values(count=table.c.count + bindparam("delta"))
+        )
+        async with self._lock:
+            batch, self._pending = self._pending, {}
+            try:
+                async with self._session_factory() as session:
+                    existing = set(
+                        (
+                            await session.execute(
+                                select(table.c.message_id, table.c.reaction_type).where(
+                                    tuple_(table.c.message_id, table.c.reaction_type).in_(
+                                        list(batch)
+                                    )
+                                )
+                            )
+                        ).all()
+                    )
+                    updates = [
+                        {"mid": mid, "rtype": rtype, "delta": delta}
+                        for (mid, rtype), delta in batch.items()
+                        if (mid, rtype) in existing
+                    ]
+                    inserts = [
+                        {"message_id": mid, "reaction_type": rtype, "count": delta}
+                        for (mid, rtype), delta in batch.items()
+                        if (mid, rtype) not in existing
+                    ]
+                    if updates:
+                        await session.execute(add_count, updates)
+                    if inserts:
+                        await session.execute(insert(table), inserts)
+                    await session.commit()
+            except BaseException:
+                # Keep the deltas for the next flush
+                for key, delta in batch.items():
+                    self._pending[key] = self._pending.get(key, 0) + delta
+                raise
+        self.flushed += len(batch)
+        return len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "cache": self._totals.stats(),
+        }
+
+
+reaction_counter = ReactionCounter(REACTION_COUNTS_FLUSH_INTERVAL, REACTION_COUNTS_CACHE_SIZE)
+
+
+def record_reaction(session: AsyncSession, message_id: int, reaction_type: str) -> None:
+    """Note a reaction added to ``session``; it is counted once committed."""
+    session.info.setdefault(_SESSION_KEY, []).append((message_id, reaction_type))
+
+
+@event.listens_for(Session, "after_commit")
+def _count_committed_reactions(session: Session) -> None:
+    for message_id, reaction_type in session.info.pop(_SESSION_KEY, ()):
+        reaction_counter.increment(message_id, reaction_type)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_rolled_back_reactions(session: Session, transaction) -> None:
+    # Committed reactions were already popped; anything left was rolled back
+    if transaction.parent is None:
+        session.info.pop(_SESSION_KEY, None)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Sequence
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.setup import after_commit
+from keyboards.inline_post_kb import get_reaction_kb
+from services.reaction_counter import reaction_counter
+from utils.cache import AsyncTTLCache
+from utils.config import REACTION_EDIT_WINDOW
+
+logger = logging.getLogger(__name__)
+
+
+class _Post:
+    __slots__ = (
+        "bot",
+        "chat_id",
+        "message_id",
+        "reactions",
+        "dirty",
+        "task",
+        "last_edit",
+        "last_markup",
+    )
+
+    def __init__(self, bot: Bot, chat_id: int, message_id: int, reactions: Sequence[str]):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.reactions = reactions
+        self.dirty = False
+        self.task: asyncio.Task | None = None
+        self.last_edit = 0.0
+        self.last_markup = None
+
+
+class ReactionMarkupCoalescer:
+    """Batches keyboard edits of interactive posts.
+
+    A press marks its post dirty; at most one ``edit_message_reply_markup``
+    per post runs per ``window`` seconds, rendering the counts held by
+    ``reaction_counter`` at that moment, and no edit is sent if the
+    keyboard would look the same as the last one sent.
+    """
+
+    def __init__(self, window: float, max_posts: int = 5000, idle_ttl: float = 3600):
+        self.window = window
+        self._posts = AsyncTTLCache(max_posts, idle_ttl)
+        self._pending: dict[asyncio.Task, _Post] = {}
+        self.presses = 0
+        self.edits = 0
+        self.unchanged = 0
+
+    def record(
+        self,
+        session: AsyncSession,
+        bot: Bot,
+        chat_id: int,
+        message_id: int,
+        reactions: Sequence[str],
+    ) -> None:
+        """Queue an edit of the post once ``session`` commits."""
+        after_commit(session, lambda: self._touch(bot, chat_id, message_id, reactions))
+
+    def _touch(
+        self, bot: Bot, chat_id: int, message_id: int, reactions: Sequence[str]
+    ) -> None:
+        key = (chat_id, message_id)
+        post = self._posts.get(key)
+        if post is None:
+            post = _Post(bot, chat_id, message_id, reactions)
+        self._posts.set(key, post)
+        post.reactions = reactions
+        post.dirty = True
+        self.presses += 1
+        if post.task is None:
+            post.task = asyncio.create_task(self._edit_when_due(post))
+            self._pending[post.task] = post
+            post.task.add_done_callback(lambda task: self._pending.pop(task, None))
+
+    async def _edit_when_due(self, post: _Post, *, wait: bool = True) -> None:
+        try:
+            while post.dirty:
+                delay = post.last_edit + self.window - time.monotonic()
+                if wait and delay > 0:
+                    await asyncio.sleep(delay)
+                post.dirty = False
+                await self._edit(post)
+        except Exception:
+            logger.exception(
+                "Failed to update reaction markup for chat %s, message %s",
+                post.chat_id,
+                post.message_id,
+            )
+        finally:
+            post.task = None
+
+    async def _edit(self, post: _Post) -> None:
+        counts = await reaction_counter.get(post.message_id)
+        markup = get_reaction_kb(
+            reactions=post.reactions,
+            current_counts=counts,
+            message_id=post.message_id,
+            channel_id=post.chat_id,
+        )
+        if markup == post.last_markup:
+            self.unchanged += 1
+            return
+        post.last_edit = time.monotonic()
+        try:
+            await post.bot.edit_message_reply_markup(
+                chat_id=str(post.chat_id),
+                message_id=post.message_id,
+                reply_markup=markup,
+            )
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                logger.error(
+                    "Failed to update reaction markup for chat %s, message %s: %s",
+                    post.chat_id,
+                    post.message_id,
+                    e,
+                )
+                return
+        except TelegramAPIError as e:
+            logger.error(
+                "Unexpected API error updating reaction markup for chat %s, message %s: %s",
+                post.chat_id,
+                post.message_id,
+                e,
+            )
+            return
+        post.last_markup = markup
+        self.edits += 1
+
+    async def stop(self) -> None:
+        """Send the edits still waiting for their window, then stop."""
+        waiting = list(self._pending.items())
+        for task, _ in waiting:
+            task.cancel()
+        await asyncio.gather(*(task for task, _ in waiting), return_exceptions=True)
+        for _, post in waiting:
+            post.dirty = True
+            await self._edit_when_due(post, wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "posts": len(self._posts),
+            "pending": len(self._pending),
+            "presses": self.presses,
+            "edits": self.edits,
+            "unchanged": self.unchanged,
+        }
+
+
+reaction_markup = ReactionMarkupCoalescer(REACTION_EDIT_WINDOW)
@@ -3,14 +3,41 @@ import logging
 from datetime import datetime, timedelta
 from aiogram import Bot
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, func, select, update
 
-from database.models import PendingChannelRequest, BotConfig, User
-from utils.config import CHANNEL_SCHEDULER_INTERVAL, VIP_SCHEDULER_INTERVAL
-from services.config_service import ConfigService
+from database.models import (
+    Auction,
+    AuctionParticipant,
+    AuctionSettlement,
+    AuctionStatus,
+    BroadcastRun,
+    ConfigEntry,
+    PendingChannelRequest,
+    User,
+)
+from utils.config import (
+    CONFIG_SYNC_INTERVAL,
+    VIP_RECONCILE_BATCH_SIZE,
+    VIP_RECONCILE_RATE,
+    VIP_SCHEDULER_INTERVAL,
+)
+from services.config_service import ConfigService, subscribe_config, sync_config_version
 from services.auction_service import AuctionService
 from services.free_channel_service import FreeChannelService
 from services.subscription_service import SubscriptionService
+from utils.text_utils import anonymize_username
+from utils.vip_membership import vip_index
+from services.outbound_dispatcher import PRIORITY_BROADCAST, PRIORITY_NOTIFICATION, outbound_priority
+from services.broadcast_engine import FAILED, BroadcastEngine, BroadcastJob
+from services.due_scheduler import (
+    AUCTIONS_JOB,
+    CHANNEL_REQUESTS_JOB,
+    CONFIG_SYNC_JOB,
+    FREE_CHANNEL_CLEANUP_JOB,
+    VIP_MEMBERSHIP_JOB,
+    VIP_SUBSCRIPTIONS_JOB,
+    due_scheduler,
+)
 
 
 async def run_channel_request_check(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
@@ -23,168 +50,257 @@ async def run_channel_request_check(bot: Bot, session_factory: async_sessionmake
             logging.info(f"Processed {processed_count} pending channel requests")
 
 
-async def channel_request_scheduler(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
-    """Background task processing channel join requests."""
-    logging.info("Channel request scheduler started")
-    interval = CHANNEL_SCHEDULER_INTERVAL
-    try:
-        while True:
-            await run_channel_request_check(bot, session_factory)
-            async with session_factory() as session:
-                config_service = ConfigService(session)
-                value = await config_service.get_value("channel_scheduler_interval")
-                if value and value.isdigit():
-                    interval = int(value)
-            await asyncio.sleep(interval)
-    except asyncio.CancelledError:
-        logging.info("Channel request scheduler cancelled")
-        raise
-    except Exception:
-        logging.exception("Unhandled error in channel request scheduler")
-
-
 async def run_vip_subscription_check(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
     """Check VIP expirations and send reminders once."""
-    async with session_factory() as session:
-        now = datetime.utcnow()
-        remind_threshold = now + timedelta(hours=24)
-        config_service = ConfigService(session)
-        reminder_msg = await config_service.get_value("vip_reminder_message")
-        farewell_msg = await config_service.get_value("vip_farewell_message")
-        if not reminder_msg:
-            reminder_msg = "Tu suscripción VIP expira pronto."
-        if not farewell_msg:
-            farewell_msg = "Tu suscripción VIP ha expirado."
-        stmt = select(User).where(
+    # Reminders and farewells queue behind interactive replies
+    with outbound_priority(PRIORITY_BROADCAST):
+        await _run_vip_subscription_check(bot, session_factory)
+
+
+class VipReminderJob(BroadcastJob):
+    """Remind VIPs whose subscription ends within 24 hours."""
+
+    name = "vip_reminder"
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def query(self, now: datetime) -> Select:
+        return select(User).where(
             User.role == "vip",
-            User.vip_expires_at <= remind_threshold,
+            User.vip_expires_at <= now + timedelta(hours=24),
             User.vip_expires_at > now,
             (User.last_reminder_sent_at.is_(None))
             | (User.last_reminder_sent_at <= now - timedelta(hours=24)),
         )
-        result = await session.execute(stmt)
-        users = result.scalars().all()
-        for user in users:
-            try:
-                await bot.send_message(user.id, reminder_msg)
-                user.last_reminder_sent_at = now
-                logging.info("Sent VIP expiry reminder to %s", user.id)
-            except Exception as e:
-                logging.exception("Failed to send reminder to %s: %s", user.id, e)
-
-        stmt = select(User).where(
+
+    async def deliver(self, bot: Bot, user: User) -> None:
+        await bot.send_message(user.id, self.text)
+
+    def apply(self, user: User, outcome: str, now: datetime) -> None:
+        # Users who blocked the bot are marked too so they aren't retried every pass
+        if outcome != FAILED:
+            user.last_reminder_sent_at = now
+            logging.info("Sent VIP expiry reminder to %s (%s)", user.id, outcome)
+
+
+class VipExpiryJob(BroadcastJob):
+    """Remove expired VIPs from the channel, downgrade them and say goodbye."""
+
+    name = "vip_expiry"
+
+    def __init__(self, text: str, vip_channel_id: int | None):
+        self.text = text
+        self.vip_channel_id = vip_channel_id
+
+    def query(self, now: datetime) -> Select:
+        return select(User).where(
             User.role == "vip",
             User.vip_expires_at.is_not(None),
             User.vip_expires_at <= now,
         )
-        result = await session.execute(stmt)
-        expired_users = result.scalars().all()
-        vip_channel_id = await ConfigService(session).get_vip_channel_id()
-        for user in expired_users:
-            try:
-                if vip_channel_id:
-                    await bot.ban_chat_member(vip_channel_id, user.id)
-                    await bot.unban_chat_member(vip_channel_id, user.id)
-            except Exception as e:
-                logging.exception("Failed to remove %s from VIP channel: %s", user.id, e)
-            user.role = "free"
-            await bot.send_message(user.id, farewell_msg)
-            logging.info("VIP expired for %s", user.id)
-        await session.commit()
+
+    async def deliver(self, bot: Bot, user: User) -> None:
+        try:
+            if self.vip_channel_id:
+                await bot.ban_chat_member(self.vip_channel_id, user.id)
+                await bot.unban_chat_member(self.vip_channel_id, user.id)
+        except Exception as e:
+            logging.exception("Failed to remove %s from VIP channel: %s", user.id, e)
+        await bot.send_message(user.id, self.text)
+
+    def apply(self, user: User, outcome: str, now: datetime) -> None:
+        # ``user`` was selected again after delivery: don't downgrade a renewal
+        if user.role != "vip" or user.vip_expires_at is None or user.vip_expires_at > now:
+            return
+        # The role changes whether or not the farewell got through
+        user.role = "free"
+        vip_index.discard(user.id)
+        logging.info("VIP expired for %s", user.id)
+
+
+async def _run_vip_subscription_check(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
+    async with session_factory() as session:
+        config_service = ConfigService(session)
+        reminder_msg = await config_service.get_value("vip_reminder_message")
+        farewell_msg = await config_service.get_value("vip_farewell_message")
+        vip_channel_id = await config_service.get_vip_channel_id()
+    if not reminder_msg:
+        reminder_msg = "Tu suscripción VIP expira pronto."
+    if not farewell_msg:
+        farewell_msg = "Tu suscripción VIP ha expirado."
+
+    engine = BroadcastEngine(bot, session_factory)
+    await engine.run(VipReminderJob(reminder_msg))
+    await engine.run(VipExpiryJob(farewell_msg, vip_channel_id))
+
+
+# ConfigEntry key holding the last user id checked by the membership sweep.
+# It is read and written directly, not through ConfigService: it isn't
+# configuration and must not bump the config version every tick.
+VIP_RECONCILE_CURSOR_KEY = "vip_membership_cursor"
 
 
 async def run_vip_membership_check(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
-    """Ensure users in the VIP channel have the correct role."""
+    """Reconcile one slice of users against the VIP channel.
+
+    Joins are normally picked up from ``chat_member`` updates; this catches
+    anything missed (e.g. while the bot was offline). Each call checks the
+    next ``VIP_RECONCILE_BATCH_SIZE`` non-VIP users after the stored cursor
+    and wraps around once it reaches the end.
+    """
     async with session_factory() as session:
-        vip_channel_id = await ConfigService(session).get_vip_channel_id()
+        config_service = ConfigService(session)
+        vip_channel_id = await config_service.get_vip_channel_id()
         if not vip_channel_id:
             return
-        stmt = select(User).where(User.role != "vip")
-        result = await session.execute(stmt)
-        users = result.scalars().all()
+        cursor = await session.scalar(
+            select(ConfigEntry.value).where(ConfigEntry.key == VIP_RECONCILE_CURSOR_KEY)
+        )
+        stmt = select(User.id).where(User.role != "vip")
+        if cursor and cursor.lstrip("-").isdigit():
+            stmt = stmt.where(User.id > int(cursor))
+        stmt = stmt.order_by(User.id).limit(VIP_RECONCILE_BATCH_SIZE)
+        user_ids = (await session.scalars(stmt)).all()
+
+    # Rate-limited lookups run with no session open
+    members = []
+    for user_id in user_ids:
+        try:
+            member = await bot.get_chat_member(vip_channel_id, user_id)
+            if member.status in {"member", "administrator", "creator"}:
+                members.append(user_id)
+        except Exception:
+            pass
+        # A rate of 0 means no throttle
+        if VIP_RECONCILE_RATE > 0:
+            await asyncio.sleep(1 / VIP_RECONCILE_RATE)
+
+    async with session_factory() as session:
+        sub_service = SubscriptionService(session)
         updated = 0
-        for user in users:
-            try:
-                member = await bot.get_chat_member(vip_channel_id, user.id)
-                if member.status in {"member", "administrator", "creator"}:
-                    user.role = "vip"
-                    sub_service = SubscriptionService(session)
-                    sub = await sub_service.get_subscription(user.id)
-                    if not sub:
-                        await sub_service.create_subscription(user.id, None)
-                    updated += 1
-            except Exception:
-                continue
+        if members:
+            users = (await session.scalars(select(User).where(User.id.in_(members)))).all()
+            for user in users:
+                try:
+                    updated += await sub_service.sync_channel_member(user)
+                except Exception:
+                    logging.exception("Failed to sync VIP channel member %s", user.id)
+                    await session.rollback()
+
+        # A short slice means the end was reached: start over next time
+        next_cursor = str(user_ids[-1]) if len(user_ids) == VIP_RECONCILE_BATCH_SIZE else ""
+        entry = await session.get(ConfigEntry, VIP_RECONCILE_CURSOR_KEY)
+        if entry:
+            entry.value = next_cursor
+        else:
+            session.add(ConfigEntry(key=VIP_RECONCILE_CURSOR_KEY, value=next_cursor))
+        await session.commit()
         if updated:
-            await session.commit()
             logging.info("Synced %s users to VIP role via channel", updated)
 
 
-async def vip_subscription_scheduler(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
-    """Background task checking VIP subscriptions."""
-    logging.info("VIP subscription scheduler started")
-    interval = VIP_SCHEDULER_INTERVAL
-    try:
-        while True:
-            await run_vip_subscription_check(bot, session_factory)
-            async with session_factory() as session:
-                config_service = ConfigService(session)
-                value = await config_service.get_value("vip_scheduler_interval")
-                if value and value.isdigit():
-                    interval = int(value)
-            await asyncio.sleep(interval)
-    except asyncio.CancelledError:
-        logging.info("VIP subscription scheduler cancelled")
-        raise
-    except Exception:
-        logging.exception("Unhandled error in VIP subscription scheduler")
-
-
-async def vip_membership_scheduler(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
-    """Background task syncing VIP roles based on channel membership."""
-    logging.info("VIP membership scheduler started")
-    interval = VIP_SCHEDULER_INTERVAL
-    try:
-        while True:
-            await run_vip_membership_check(bot, session_factory)
-            async with session_factory() as session:
-                config_service = ConfigService(session)
-                value = await config_service.get_value("vip_scheduler_interval")
-                if value and value.isdigit():
-                    interval = int(value)
-            await asyncio.sleep(interval)
-    except asyncio.CancelledError:
-        logging.info("VIP membership scheduler cancelled")
-        raise
-    except Exception:
-        logging.exception("Unhandled error in VIP membership scheduler")
-
-
 async def run_auction_monitor_check(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
-    """Check for expired auctions and end them automatically."""
+    """End expired auctions, then announce the results not sent yet."""
     async with session_factory() as session:
         auction_service = AuctionService(session)
         try:
-            expired_auctions = await auction_service.check_expired_auctions(bot)
+            expired_auctions = await auction_service.check_expired_auctions()
             if expired_auctions:
                 logging.info(f"Auto-ended {len(expired_auctions)} expired auctions")
         except Exception as e:
             logging.exception("Error in auction monitor check: %s", e)
+    with outbound_priority(PRIORITY_NOTIFICATION):
+        await _run_auction_result_notifications(bot, session_factory)
+
+
+class AuctionResultJob(BroadcastJob):
+    """Tell the participants of settled auctions who won."""
+
+    name = "auction_results"
+
+    def __init__(
+        self,
+        auctions: dict[int, Auction],
+        winners: dict[int, User],
+        participations: dict[int, list[int]],
+    ):
+        self.auctions = auctions
+        self.winners = winners
+        self.participations = participations
+
+    def query(self, now: datetime) -> Select:
+        return select(User).where(User.id.in_(list(self.participations)))
 
+    def _text(self, auction: Auction, user_id: int) -> str:
+        if auction.winner_id == user_id:
+            return (
+                f"🎉 ¡Felicidades! Has ganado la subasta '{auction.name}'\n"
+                f"🏆 Premio: {auction.prize_description}\n"
+                f"💰 Puja ganadora: {auction.current_highest_bid} puntos\n\n"
+                f"Te contactaremos pronto para entregarte tu premio."
+            )
+        winner = self.winners.get(auction.winner_id)
+        winner_display = anonymize_username(winner, user_id) if winner else "Nadie"
+        return (
+            f"🏁 Subasta finalizada: '{auction.name}'\n"
+            f"🏆 Ganador: {winner_display}\n"
+            f"💰 Puja ganadora: {auction.current_highest_bid} puntos\n"
+            f"🎁 Premio: {auction.prize_description}"
+        )
+
+    async def deliver(self, bot: Bot, user: User) -> None:
+        for auction_id in self.participations[user.id]:
+            await bot.send_message(user.id, self._text(self.auctions[auction_id], user.id))
+
+
+async def _run_auction_result_notifications(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
+    async with session_factory() as session:
+        # A run interrupted by a restart resumes with the auctions it started with
+        cutoff = await session.scalar(
+            select(BroadcastRun.reference_time)
+            .where(BroadcastRun.job == AuctionResultJob.name, BroadcastRun.status == "running")
+            .order_by(BroadcastRun.id.desc())
+            .limit(1)
+        ) or datetime.utcnow()
+        ids = (
+            await session.scalars(
+                select(AuctionSettlement.auction_id).where(
+                    AuctionSettlement.notified_at.is_(None),
+                    AuctionSettlement.settled_at <= cutoff,
+                )
+            )
+        ).all()
+        if not ids:
+            return
+        auctions = {
+            auction.id: auction
+            for auction in (await session.scalars(select(Auction).where(Auction.id.in_(ids)))).all()
+        }
+        winner_ids = {auction.winner_id for auction in auctions.values() if auction.winner_id}
+        winners = {
+            user.id: user
+            for user in (await session.scalars(select(User).where(User.id.in_(winner_ids)))).all()
+        }
+        participations: dict[int, list[int]] = {}
+        rows = await session.execute(
+            select(AuctionParticipant.user_id, AuctionParticipant.auction_id).where(
+                AuctionParticipant.auction_id.in_(ids)
+            )
+        )
+        for user_id, auction_id in rows:
+            participations.setdefault(user_id, []).append(auction_id)
 
-async def auction_monitor_scheduler(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
-    """Background task monitoring auction expirations."""
-    logging.info("Auction monitor scheduler started")
-    interval = 60  # Check every minute for auction expirations
-    try:
-        while True:
-            await run_auction_monitor_check(bot, session_factory)
-            await asyncio.sleep(interval)
-    except asyncio.CancelledError:
-        logging.info("Auction monitor scheduler cancelled")
-        raise
-    except Exception:
-        logging.exception("Unhandled error in auction monitor scheduler")
+    if participations:
+        job = AuctionResultJob(auctions, winners, participations)
+        await BroadcastEngine(bot, session_factory).run(job)
+    async with session_factory() as session:
+        await session.execute(
+            update(AuctionSettlement)
+            .where(AuctionSettlement.auction_id.in_(ids))
+            .values(notified_at=datetime.utcnow())
+        )
+        await session.commit()
 
 
 async def run_free_channel_cleanup(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
@@ -199,16 +315,100 @@ async def run_free_channel_cleanup(bot: Bot, session_factory: async_sessionmaker
             logging.exception("Error in free channel cleanup: %s", e)
 
 
-async def free_channel_cleanup_scheduler(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
-    """Background task for cleaning up old channel requests."""
-    logging.info("Free channel cleanup scheduler started")
-    interval = 86400  # Run once per day
-    try:
-        while True:
-            await run_free_channel_cleanup(bot, session_factory)
-            await asyncio.sleep(interval)
-    except asyncio.CancelledError:
-        logging.info("Free channel cleanup scheduler cancelled")
-        raise
-    except Exception:
-        logging.exception("Unhandled error in free channel cleanup scheduler")
\ No newline at end of file
+async def run_config_sync(bot: Bot, session_factory: async_sessionmaker[AsyncSession]):
+    """Pick up config changes made by other bot processes."""
+    async with session_factory() as session:
+        if await sync_config_version(session):
+            logging.info("Config changed in another process, reloading")
+
+
+async def _next_channel_request_due(session: AsyncSession) -> datetime | None:
+    oldest = await session.scalar(
+        select(func.min(PendingChannelRequest.request_timestamp)).where(
+            PendingChannelRequest.approved == False
+        )
+    )
+    if oldest is None:
+        return None
+    wait_minutes = await FreeChannelService(session, None).get_wait_time_minutes()
+    return oldest + timedelta(minutes=wait_minutes)
+
+
+async def _next_vip_subscription_due(session: AsyncSession) -> datetime | None:
+    """Next reminder (24h before an expiry) or expiry among VIP users."""
+    now = datetime.utcnow()
+    vip = (User.role == "vip", User.vip_expires_at.is_not(None))
+    next_expiry = await session.scalar(
+        select(func.min(User.vip_expires_at)).where(*vip, User.vip_expires_at > now)
+    )
+    next_reminder = await session.scalar(
+        select(func.min(User.vip_expires_at)).where(
+            *vip, User.vip_expires_at > now + timedelta(hours=24)
+        )
+    )
+    candidates = [next_expiry]
+    if next_reminder is not None:
+        candidates.append(next_reminder - timedelta(hours=24))
+    if await session.scalar(
+        select(User.id).where(*vip, User.vip_expires_at <= now).limit(1)
+    ):
+        candidates.append(now)
+    return min((c for c in candidates if c is not None), default=None)
+
+
+def _vip_membership_interval(value: str | None) -> int:
+    return int(value) if value and value.isdigit() else VIP_SCHEDULER_INTERVAL
+
+
+async def _next_vip_membership_due(session: AsyncSession) -> datetime:
+    value = await ConfigService(session).get_value("vip_scheduler_interval")
+    return datetime.utcnow() + timedelta(seconds=_vip_membership_interval(value))
+
+
+def _on_vip_interval_changed(key: str, value: str | None) -> None:
+    # Count the new interval from now instead of waiting out the old one
+    due_scheduler.reschedule(
+        VIP_MEMBERSHIP_JOB,
+        datetime.utcnow() + timedelta(seconds=_vip_membership_interval(value)),
+    )
+
+
+async def _next_auction_due(session: AsyncSession) -> datetime | None:
+    if await session.scalar(
+        select(AuctionSettlement.auction_id).where(AuctionSettlement.notified_at.is_(None)).limit(1)
+    ):
+        # Results still to announce
+        return datetime.utcnow()
+    return await session.scalar(
+        select(func.min(Auction.end_time)).where(Auction.status == AuctionStatus.ACTIVE)
+    )
+
+
+async def _next_cleanup_due(session: AsyncSession) -> datetime:
+    return datetime.utcnow() + timedelta(days=1)
+
+
+def register_scheduled_jobs() -> None:
+    """Register the periodic checks on ``due_scheduler``."""
+    due_scheduler.register(
+        CHANNEL_REQUESTS_JOB, run_channel_request_check, next_due=_next_channel_request_due
+    )
+    due_scheduler.register(
+        VIP_SUBSCRIPTIONS_JOB, run_vip_subscription_check, next_due=_next_vip_subscription_due
+    )
+    due_scheduler.register(
+        VIP_MEMBERSHIP_JOB,
+        run_vip_membership_check,
+        next_due=_next_vip_membership_due,
+        max_idle=None,
+    )
+    due_scheduler.register(AUCTIONS_JOB, run_auction_monitor_check, next_due=_next_auction_due)
+    due_scheduler.register(
+        FREE_CHANNEL_CLEANUP_JOB,
+        run_free_channel_cleanup,
+        next_due=_next_cleanup_due,
+        max_idle=None,
+    )
+    if CONFIG_SYNC_INTERVAL > 0:
+        due_scheduler.register(CONFIG_SYNC_JOB, run_config_sync, max_idle=CONFIG_SYNC_INTERVAL)
+    subscribe_config("vip_scheduler_interval", _on_vip_interval_changed)
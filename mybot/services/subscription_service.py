@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from aiogram import Bot
@@ -8,11 +8,22 @@ from aiogram import Bot
 from services.config_service import ConfigService
 
 from database.models import VipSubscription, User, Token, Tariff
+from database.setup import after_commit
+from utils.vip_membership import vip_index
+from services.due_scheduler import VIP_SUBSCRIPTIONS_JOB, due_scheduler
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def schedule_vip_expiry(session: AsyncSession, expires_at: datetime | None) -> None:
+    """Wake the VIP check in time for the reminder before ``expires_at``."""
+    if expires_at is not None:
+        due_scheduler.schedule_on_commit(
+            session, VIP_SUBSCRIPTIONS_JOB, expires_at - timedelta(hours=24)
+        )
+
+
 class SubscriptionService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -29,9 +40,28 @@ class SubscriptionService:
         self.session.add(sub)
         await self.session.commit()
         await self.session.refresh(sub)
+        after_commit(self.session, lambda: vip_index.set(user_id, True, valid_until=expires_at))
+        schedule_vip_expiry(self.session, expires_at)
         logger.info(f"Created VIP subscription for user {user_id}, expires: {expires_at}")
         return sub
 
+    async def sync_channel_member(self, user: User) -> bool:
+        """Give ``user`` the VIP role for being in the VIP channel.
+
+        Returns ``True`` if the role changed. A subscription without
+        expiry is created when the user has none.
+        """
+        user_id = user.id
+        after_commit(self.session, lambda: vip_index.set(user_id, True))
+        if user.role == "vip":
+            return False
+        user.role = "vip"
+        if not await self.get_subscription(user.id):
+            await self.create_subscription(user.id, None)
+        else:
+            await self.session.commit()
+        return True
+
     async def get_statistics(self) -> tuple[int, int, int]:
         """Return total, active and expired subscription counts."""
         now = datetime.utcnow()
@@ -75,8 +105,6 @@ class SubscriptionService:
 
     async def extend_subscription(self, user_id: int, days: int) -> VipSubscription:
         """Extend an existing subscription or create one if missing."""
-        from datetime import timedelta
-
         now = datetime.utcnow()
         sub = await self.get_subscription(user_id)
         new_exp = now + timedelta(days=days)
@@ -101,6 +129,9 @@ class SubscriptionService:
             user.last_reminder_sent_at = None
 
         await self.session.commit()
+        expires_at = sub.expires_at
+        after_commit(self.session, lambda: vip_index.set(user_id, True, valid_until=expires_at))
+        schedule_vip_expiry(self.session, user.vip_expires_at if user else sub.expires_at)
         logger.info(f"Extended VIP subscription for user {user_id} by {days} days")
         return sub
 
@@ -127,6 +158,7 @@ class SubscriptionService:
                     logger.exception("Failed to remove %s from VIP channel: %s", user_id, e)
 
         await self.session.commit()
+        after_commit(self.session, lambda: vip_index.set(user_id, False))
         logger.info(f"Revoked VIP subscription for user {user_id}")
 
     async def set_subscription_expiration(
@@ -151,6 +183,11 @@ class SubscriptionService:
                 user.vip_expires_at = expires_at
 
         await self.session.commit()
+        if expires_at is None or expires_at > datetime.utcnow():
+            after_commit(self.session, lambda: vip_index.set(user_id, True, valid_until=expires_at))
+            schedule_vip_expiry(self.session, expires_at)
+        else:
+            after_commit(self.session, lambda: vip_index.discard(user_id))
         logger.info(
             "Set VIP expiration for user %s to %s", user_id, expires_at
         )
@@ -30,12 +30,96 @@ VIP_CHANNEL_ID = int(os.environ.get("VIP_CHANNEL_ID", "0"))
 # disables handling of free channel join requests.
 FREE_CHANNEL_ID = int(os.environ.get("FREE_CHANNEL_ID", "0"))
 
-# Default scheduler intervals in seconds. These can be overridden via
-# environment variables and further adjusted at runtime using the admin
+# Default interval in seconds of the VIP channel membership sweep. It can be
+# overridden via the environment and adjusted at runtime using the admin
 # configuration menu.
-CHANNEL_SCHEDULER_INTERVAL = int(os.environ.get("CHANNEL_SCHEDULER_INTERVAL", "30"))
 VIP_SCHEDULER_INTERVAL = int(os.environ.get("VIP_SCHEDULER_INTERVAL", "3600"))
 
+# Database connection pool settings. ``DB_POOL_SIZE`` and
+# ``DB_MAX_OVERFLOW`` size the pool used for PostgreSQL; SQLite keeps
+# ``DB_POOL_SIZE`` connections open without overflow. ``DB_POOL_RECYCLE``
+# is in seconds and ``DB_POOL_PRE_PING`` accepts ``1``/``0``.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") == "1"
+
+# Point changes are written to the ledger immediately and folded into
+# ``users.points`` by a background task every ``POINTS_FLUSH_INTERVAL``
+# seconds, or sooner once ``POINTS_FLUSH_BATCH_SIZE`` entries are pending.
+POINTS_FLUSH_INTERVAL = float(os.environ.get("POINTS_FLUSH_INTERVAL", "2"))
+POINTS_FLUSH_BATCH_SIZE = int(os.environ.get("POINTS_FLUSH_BATCH_SIZE", "500"))
+
+# In-memory VIP membership index. Positive answers are kept for
+# ``VIP_CACHE_TTL`` seconds (or until the subscription expires), negative
+# ones for ``VIP_CACHE_NEGATIVE_TTL``; at most ``VIP_CACHE_MAX_SIZE`` users.
+VIP_CACHE_TTL = int(os.environ.get("VIP_CACHE_TTL", "600"))
+VIP_CACHE_NEGATIVE_TTL = int(os.environ.get("VIP_CACHE_NEGATIVE_TTL", "120"))
+VIP_CACHE_MAX_SIZE = int(os.environ.get("VIP_CACHE_MAX_SIZE", "10000"))
+
+# Message, reaction and poll activity is queued and applied in the
+# background: records are coalesced per user for ``ACTIVITY_BATCH_WINDOW``
+# seconds (at most ``ACTIVITY_BATCH_SIZE`` per batch). Once
+# ``ACTIVITY_QUEUE_SIZE`` records are waiting, handlers wait up to
+# ``ACTIVITY_ENQUEUE_TIMEOUT`` seconds for room before the record is dropped.
+ACTIVITY_BATCH_WINDOW = float(os.environ.get("ACTIVITY_BATCH_WINDOW", "1"))
+ACTIVITY_BATCH_SIZE = int(os.environ.get("ACTIVITY_BATCH_SIZE", "200"))
+ACTIVITY_QUEUE_SIZE = int(os.environ.get("ACTIVITY_QUEUE_SIZE", "10000"))
+ACTIVITY_ENQUEUE_TIMEOUT = float(os.environ.get("ACTIVITY_ENQUEUE_TIMEOUT", "0.5"))
+
+# Outgoing messages go through a rate-limited dispatcher: at most
+# ``OUTBOUND_GLOBAL_RATE`` per second overall, ``OUTBOUND_CHAT_RATE`` per
+# second to a private chat (bursts of ``OUTBOUND_CHAT_BURST``) and
+# ``OUTBOUND_GROUP_RATE`` per second to groups and channels. A request
+# refused with RetryAfter is retried up to ``OUTBOUND_MAX_RETRIES`` times.
+OUTBOUND_GLOBAL_RATE = float(os.environ.get("OUTBOUND_GLOBAL_RATE", "25"))
+OUTBOUND_CHAT_RATE = float(os.environ.get("OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_CHAT_BURST = int(os.environ.get("OUTBOUND_CHAT_BURST", "3"))
+OUTBOUND_GROUP_RATE = float(os.environ.get("OUTBOUND_GROUP_RATE", "0.33"))
+OUTBOUND_MAX_RETRIES = int(os.environ.get("OUTBOUND_MAX_RETRIES", "3"))
+
+# Scheduler broadcasts (VIP reminders and expirations) handle users in
+# checkpointed chunks of ``BROADCAST_CHUNK_SIZE``, delivering to at most
+# ``BROADCAST_CONCURRENCY`` of them at once.
+BROADCAST_CHUNK_SIZE = int(os.environ.get("BROADCAST_CHUNK_SIZE", "50"))
+BROADCAST_CONCURRENCY = int(os.environ.get("BROADCAST_CONCURRENCY", "10"))
+
+# VIP channel membership is tracked from chat_member updates. A background
+# reconciliation still checks ``VIP_RECONCILE_BATCH_SIZE`` users per
+# scheduler tick (at most ``VIP_RECONCILE_RATE`` lookups per second, 0 for
+# no limit) and resumes from where the previous tick stopped.
+VIP_RECONCILE_BATCH_SIZE = int(os.environ.get("VIP_RECONCILE_BATCH_SIZE", "100"))
+VIP_RECONCILE_RATE = max(float(os.environ.get("VIP_RECONCILE_RATE", "5")), 0.0)
+
+# Scheduled jobs run when their next item (auction end, join approval, VIP
+# expiry) is due. ``SCHEDULER_MAX_IDLE`` caps the time between two runs of
+# the same job; items a run could not process are retried after
+# ``SCHEDULER_RETRY_DELAY`` seconds.
+SCHEDULER_MAX_IDLE = float(os.environ.get("SCHEDULER_MAX_IDLE", "3600"))
+SCHEDULER_RETRY_DELAY = float(os.environ.get("SCHEDULER_RETRY_DELAY", "60"))
+
+# Config values are cached per process. When several bot processes share
+# the database, set ``CONFIG_SYNC_INTERVAL`` (seconds) so each one checks
+# the config version counter and reloads after another process's writes;
+# ``0`` disables the check.
+CONFIG_SYNC_INTERVAL = float(os.environ.get("CONFIG_SYNC_INTERVAL", "0"))
+
+# Reaction keyboards of interactive posts are edited at most once per
+# ``REACTION_EDIT_WINDOW`` seconds per post, with the latest counts.
+REACTION_EDIT_WINDOW = float(os.environ.get("REACTION_EDIT_WINDOW", "3"))
+
+# Reaction totals are kept in memory and written to ``reaction_counts``
+# every ``REACTION_COUNTS_FLUSH_INTERVAL`` seconds; totals of at most
+# ``REACTION_COUNTS_CACHE_SIZE`` posts stay in memory.
+REACTION_COUNTS_FLUSH_INTERVAL = float(os.environ.get("REACTION_COUNTS_FLUSH_INTERVAL", "5"))
+REACTION_COUNTS_CACHE_SIZE = int(os.environ.get("REACTION_COUNTS_CACHE_SIZE", "5000"))
+
+# Auction participants get at most one "outbid" message per auction every
+# ``BID_NOTIFY_WINDOW`` seconds, sent ``BID_NOTIFY_CONCURRENCY`` at a time.
+BID_NOTIFY_WINDOW = float(os.environ.get("BID_NOTIFY_WINDOW", "10"))
+BID_NOTIFY_CONCURRENCY = int(os.environ.get("BID_NOTIFY_CONCURRENCY", "10"))
+
 # Default reaction button texts used on channel posts when no custom values
 
 # are configured via the admin settings menu. They should be provided as a
@@ -49,5 +133,32 @@ class Config:
     CHANNEL_ID = VIP_CHANNEL_ID
     FREE_CHANNEL_ID = FREE_CHANNEL_ID
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///gamification.db")
-    CHANNEL_SCHEDULER_INTERVAL = CHANNEL_SCHEDULER_INTERVAL
     VIP_SCHEDULER_INTERVAL = VIP_SCHEDULER_INTERVAL
+    DB_POOL_SIZE = DB_POOL_SIZE
+    DB_MAX_OVERFLOW = DB_MAX_OVERFLOW
+    DB_POOL_TIMEOUT = DB_POOL_TIMEOUT
+    DB_POOL_RECYCLE = DB_POOL_RECYCLE
+    DB_POOL_PRE_PING = DB_POOL_PRE_PING
+    POINTS_FLUSH_INTERVAL = POINTS_FLUSH_INTERVAL
+    POINTS_FLUSH_BATCH_SIZE = POINTS_FLUSH_BATCH_SIZE
+    ACTIVITY_BATCH_WINDOW = ACTIVITY_BATCH_WINDOW
+    ACTIVITY_BATCH_SIZE = ACTIVITY_BATCH_SIZE
+    ACTIVITY_QUEUE_SIZE = ACTIVITY_QUEUE_SIZE
+    ACTIVITY_ENQUEUE_TIMEOUT = ACTIVITY_ENQUEUE_TIMEOUT
+    OUTBOUND_GLOBAL_RATE = OUTBOUND_GLOBAL_RATE
+    OUTBOUND_CHAT_RATE = OUTBOUND_CHAT_RATE
+    OUTBOUND_CHAT_BURST = OUTBOUND_CHAT_BURST
+    OUTBOUND_GROUP_RATE = OUTBOUND_GROUP_RATE
+    OUTBOUND_MAX_RETRIES = OUTBOUND_MAX_RETRIES
+    BROADCAST_CHUNK_SIZE = BROADCAST_CHUNK_SIZE
+    BROADCAST_CONCURRENCY = BROADCAST_CONCURRENCY
+    VIP_RECONCILE_BATCH_SIZE = VIP_RECONCILE_BATCH_SIZE
+    VIP_RECONCILE_RATE = VIP_RECONCILE_RATE
+    SCHEDULER_MAX_IDLE = SCHEDULER_MAX_IDLE
+    SCHEDULER_RETRY_DELAY = SCHEDULER_RETRY_DELAY
+    CONFIG_SYNC_INTERVAL = CONFIG_SYNC_INTERVAL
+    REACTION_EDIT_WINDOW = REACTION_EDIT_WINDOW
+    REACTION_COUNTS_FLUSH_INTERVAL = REACTION_COUNTS_FLUSH_INTERVAL
+    REACTION_COUNTS_CACHE_SIZE = REACTION_COUNTS_CACHE_SIZE
+    BID_NOTIFY_WINDOW = BID_NOTIFY_WINDOW
+    BID_NOTIFY_CONCURRENCY = BID_NOTIFY_CONCURRENCY
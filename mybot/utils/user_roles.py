@@ -2,10 +2,10 @@ from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from .config import ADMIN_IDS, VIP_CHANNEL_ID
+from .vip_membership import vip_index
 from database.models import User, VipSubscription
 import os
-import time
-from typing import Dict, Tuple
+from typing import Tuple
 from datetime import datetime
 import logging
 
@@ -13,9 +13,6 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_VIP_MULTIPLIER = int(os.environ.get("VIP_POINTS_MULTIPLIER", "2"))
 
-# Cache user roles for a short time to avoid repeated API calls
-_ROLE_CACHE: Dict[int, Tuple[str, float]] = {}
-
 
 def is_admin(user_id: int) -> bool:
     """Check if the user is an admin."""
@@ -23,7 +20,20 @@ def is_admin(user_id: int) -> bool:
 
 
 async def is_vip_member(bot: Bot, user_id: int, session: AsyncSession | None = None) -> bool:
-    """Check if the user should be considered a VIP."""
+    """Check if the user should be considered a VIP.
+
+    Answers come from ``vip_index``; concurrent misses for the same user
+    share a single database/channel lookup.
+    """
+    return await vip_index.resolve(
+        user_id, lambda: _load_vip_status(bot, user_id, session)
+    )
+
+
+async def _load_vip_status(
+    bot: Bot, user_id: int, session: AsyncSession | None
+) -> Tuple[bool, datetime | None]:
+    """Resolve VIP status from the database, falling back to the VIP channel."""
     from services.config_service import ConfigService
 
     # First check database subscription status
@@ -35,7 +45,7 @@ async def is_vip_member(bot: Bot, user_id: int, session: AsyncSession | None = N
                 # Check if subscription is still valid
                 if user.vip_expires_at is None or user.vip_expires_at > datetime.utcnow():
                     logger.debug(f"User {user_id} is VIP via database record")
-                    return True
+                    return True, user.vip_expires_at
                 else:
                     # Subscription expired, update role
                     user.role = "free"
@@ -49,7 +59,7 @@ async def is_vip_member(bot: Bot, user_id: int, session: AsyncSession | None = N
             if subscription:
                 if subscription.expires_at is None or subscription.expires_at > datetime.utcnow():
                     logger.debug(f"User {user_id} is VIP via subscription table")
-                    return True
+                    return True, subscription.expires_at
                 else:
                     logger.debug(f"User {user_id} subscription expired")
         except Exception as e:
@@ -68,16 +78,17 @@ async def is_vip_member(bot: Bot, user_id: int, session: AsyncSession | None = N
 
     if not vip_channel_id:
         logger.debug(f"No VIP channel configured, user {user_id} is not VIP")
-        return False
+        return False, None
 
     try:
         member = await bot.get_chat_member(vip_channel_id, user_id)
         is_member = member.status in {"member", "administrator", "creator"}
         logger.debug(f"User {user_id} channel membership check: {is_member} (status: {member.status})")
-        return is_member
     except Exception as e:
         logger.warning(f"Error checking channel membership for user {user_id}: {e}")
-        return False
+        is_member = False
+    # Negative answers are cached too so failures don't hit the API on every award
+    return is_member, None
 
 
 async def get_points_multiplier(bot: Bot, user_id: int, session: AsyncSession | None = None) -> int:
@@ -95,42 +106,26 @@ async def get_user_role(
     bot: Bot, user_id: int, session: AsyncSession | None = None
 ) -> str:
     """Return the role for the given user (admin, vip or free)."""
-    now = time.time()
-    cached = _ROLE_CACHE.get(user_id)
-    
-    # Use cache only for non-admin users and only for 2 minutes
-    if cached and now < cached[1] and not is_admin(user_id):
-        logger.debug(f"Using cached role for user {user_id}: {cached[0]}")
-        return cached[0]
-
-    # Check admin first (highest priority)
+    # Admins come from configuration, so there is nothing to cache
     if is_admin(user_id):
-        role = "admin"
-        _ROLE_CACHE[user_id] = (role, now + 120)  # cache for 2 minutes
         logger.debug(f"User {user_id} is admin")
-        return role
-    
-    # Check VIP status
+        return "admin"
+
     try:
         if await is_vip_member(bot, user_id, session=session):
-            role = "vip"
             logger.debug(f"User {user_id} is VIP")
-        else:
-            role = "free"
-            logger.debug(f"User {user_id} is free user")
+            return "vip"
     except Exception as e:
         logger.error(f"Error determining user role for {user_id}: {e}")
-        role = "free"
-
-    _ROLE_CACHE[user_id] = (role, now + 120)  # cache for 2 minutes
-    return role
+    logger.debug(f"User {user_id} is free user")
+    return "free"
 
 
 def clear_role_cache(user_id: int = None):
     """Clear role cache for a specific user or all users."""
     if user_id:
-        _ROLE_CACHE.pop(user_id, None)
+        vip_index.discard(user_id)
         logger.debug(f"Cleared role cache for user {user_id}")
     else:
-        _ROLE_CACHE.clear()
+        vip_index.clear()
         logger.debug("Cleared all role cache")
\ No newline at end of file
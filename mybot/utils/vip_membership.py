@@ -0,0 +1,64 @@
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from .cache import AsyncTTLCache
+from .config import VIP_CACHE_MAX_SIZE, VIP_CACHE_NEGATIVE_TTL, VIP_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+# Loaders return ``(is_vip, valid_until)``; ``valid_until`` is a UTC expiry or None
+VipStatus = tuple[bool, datetime | None]
+
+
+class VipMembershipIndex:
+    """Bounded in-memory answer to "is this user VIP?".
+
+    Entries are written whenever we learn a user's status: from
+    ``chat_member`` updates on the VIP channel, from subscription writes and
+    from the fallback lookup in ``is_vip_member``. Positive entries never
+    outlive the subscription expiry they were created with, negative ones
+    use a shorter TTL, and the least recently used entry is evicted once
+    ``max_size`` is reached. Role and multiplier resolution share it.
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._cache = AsyncTTLCache(max_size, ttl)
+
+    def _ttl_for(self, status: VipStatus) -> float:
+        is_vip, valid_until = status
+        ttl = self.ttl if is_vip else self.negative_ttl
+        if valid_until is not None:
+            ttl = min(ttl, (valid_until - datetime.utcnow()).total_seconds())
+        return ttl
+
+    def get(self, user_id: int) -> bool | None:
+        """Return the cached status, or ``None`` when unknown or expired."""
+        status = self._cache.get(user_id)
+        return status[0] if status is not None else None
+
+    def set(self, user_id: int, is_vip: bool, valid_until: datetime | None = None) -> None:
+        """Record ``user_id``'s status, expiring no later than ``valid_until`` (UTC)."""
+        status = (is_vip, valid_until)
+        self._cache.set(user_id, status, self._ttl_for(status))
+
+    async def resolve(
+        self, user_id: int, loader: Callable[[], Awaitable[VipStatus]]
+    ) -> bool:
+        """Return the cached status or run ``loader`` once for concurrent misses."""
+        status = await self._cache.get_or_load(user_id, loader, ttl=self._ttl_for)
+        return status[0]
+
+    def discard(self, user_id: int) -> None:
+        self._cache.discard(user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+vip_index = VipMembershipIndex(VIP_CACHE_MAX_SIZE, VIP_CACHE_TTL, VIP_CACHE_NEGATIVE_TTL)
@@ -0,0 +1,123 @@
+"""Fail if any hot query in ``services/`` is planned as a full table scan.
+
+Run it against the database the bot uses (``DATABASE_URL``)::
+
+    python scripts/check_query_plans.py
+
+Each statement is built by the service that runs it where the service
+exposes it, and otherwise copies the query at the location noted next to
+it; keep those in sync when the service changes. The script runs
+``EXPLAIN`` on each and exits with status 1 if the plan scans a whole
+table instead of using an index.
+"""
+import asyncio
+import datetime
+import os
+import re
+import sys
+
+# The bot's modules import each other as top-level packages (``database``,
+# ``services``), so run with ``mybot/`` on the path like the bot itself
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mybot"))
+
+from sqlalchemy import select
+
+from database.setup import init_db, close_db
+from database.models import (
+    Bid,
+    ButtonReaction,
+    PendingChannelRequest,
+    PointLedgerEntry,
+    User,
+    UserBadge,
+    UserMissionEntry,
+)
+from services.scheduler import VipReminderJob
+
+NOW = datetime.datetime(2024, 1, 1)
+
+HOT_QUERIES = {
+    # services/message_service.py, MessageService.register_reaction
+    "MessageService.register_reaction": select(ButtonReaction).where(
+        ButtonReaction.message_id == 1,
+        ButtonReaction.user_id == 1,
+    ),
+    # services/mission_service.py, MissionService.update_progress
+    "MissionService.update_progress": select(UserMissionEntry).where(
+        UserMissionEntry.user_id == 1,
+        UserMissionEntry.mission_id == "mission",
+    ),
+    # services/auction_service.py, AuctionService._write_bid (resets the winning bid)
+    "AuctionService._write_bid": select(Bid).where(
+        Bid.auction_id == 1,
+        Bid.is_winning == True,
+    ),
+    # services/free_channel_service.py, FreeChannelService.process_pending_requests
+    "FreeChannelService.process_pending_requests": select(PendingChannelRequest).where(
+        PendingChannelRequest.approved == False,
+        PendingChannelRequest.request_timestamp <= NOW,
+    ),
+    "VipReminderJob.query": VipReminderJob("").query(NOW),
+    # services/point_service.py, PointService.get_top_users
+    "PointService.get_top_users": select(User).order_by(User.points.desc()).limit(10),
+    # services/badge_rules.py, RuleEngine._badge_mask
+    "RuleEngine._badge_mask": select(UserBadge.badge_id).where(UserBadge.user_id == 1),
+    # services/point_ledger.py, PointAggregator.flush
+    "PointAggregator.flush": select(PointLedgerEntry.id)
+    .where(PointLedgerEntry.applied == False)
+    .order_by(PointLedgerEntry.id)
+    .limit(500),
+}
+
+# SQLite reports "SCAN <table>" without "USING ... INDEX" for full scans;
+# PostgreSQL reports "Seq Scan"
+_SQLITE_FULL_SCAN = re.compile(r"\bSCAN (?!.*\bUSING\b.*\bINDEX\b)")
+_POSTGRES_FULL_SCAN = re.compile(r"\bSeq Scan\b")
+
+
+def _explain(connection, stmt) -> list[str]:
+    compiled = stmt.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, params)
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql("EXPLAIN " + compiled.string, params)
+    return [row[0] for row in rows]
+
+
+def _check(connection) -> list[str]:
+    if connection.dialect.name == "sqlite":
+        full_scan = _SQLITE_FULL_SCAN
+    else:
+        # Tiny tables make the planner prefer sequential scans regardless
+        connection.exec_driver_sql("SET enable_seqscan = off")
+        full_scan = _POSTGRES_FULL_SCAN
+    failures = []
+    for name, stmt in HOT_QUERIES.items():
+        plan = _explain(connection, stmt)
+        scans = [line for line in plan if full_scan.search(line)]
+        status = "FULL SCAN" if scans else "ok"
+        print(f"[{status}] {name}")
+        for line in plan:
+            print(f"    {line}")
+        if scans:
+            failures.append(name)
+    return failures
+
+
+async def main() -> int:
+    engine = await init_db()
+    try:
+        async with engine.connect() as conn:
+            failures = await conn.run_sync(_check)
+    finally:
+        await close_db()
+    if failures:
+        print(f"{len(failures)} hot queries do a full scan: {', '.join(failures)}")
+        return 1
+    print("All hot queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))